@@ -38,6 +38,7 @@ good text editor, while still having very good IDE features for Python.
 
 __version__ = '0.10.0'
 
-from jedi.api import Script, Interpreter, NotFoundError, set_debug_function
+from jedi.api import Script, Interpreter, Project, Deadline, NotFoundError, \
+    set_debug_function
 from jedi.api import preload_module, defined_names, names
 from jedi import settings
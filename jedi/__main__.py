@@ -40,9 +40,109 @@ def _start_linter():
                 raise
 
 
-if len(sys.argv) == 2 and sys.argv[1] == 'repl':
-    # don't want to use __main__ only for repl yet, maybe we want to use it for
-    # something else. So just use the keyword ``repl`` for now.
-    print(join(dirname(abspath(__file__)), 'api', 'replstartup.py'))
-elif len(sys.argv) > 1 and sys.argv[1] == 'linter':
-    _start_linter()
+def _start_cache_gc():
+    """
+    Removes old modules from the filesystem cache, see
+    :data:`jedi.settings.cache_max_bytes` and
+    :data:`jedi.settings.cache_max_age`.
+    """
+    from jedi.parser.utils import ParserPickling
+
+    count, freed = ParserPickling.garbage_collect()
+    print('Removed %s modules (%.1f MB).' % (count, freed / 1024.0 / 1024))
+
+
+def _find_python_files(sys_path):
+    import os
+
+    seen = set()
+    for directory in sys_path:
+        if not isdir(directory):
+            continue
+        for root, dirnames, filenames in os.walk(directory):
+            for filename in filenames:
+                if filename.endswith('.py'):
+                    # Imports look modules up by the path on the sys path,
+                    # the real path only finds files that were seen already.
+                    path = os.path.join(root, filename)
+                    real_path = os.path.realpath(path)
+                    if real_path not in seen:
+                        seen.add(real_path)
+                        yield path
+
+
+def _warm_file(path):
+    from jedi.parser.utils import cache_file
+
+    try:
+        return path, cache_file(path), None
+    except Exception as e:
+        return path, 0, '%s: %s' % (type(e).__name__, e)
+
+
+def _start_cache_warm():
+    """
+    Parses all the Python files on the ``sys.path`` of a virtualenv and saves
+    them in the filesystem cache::
+
+        python -m jedi cache warm [VENV] [--processes N]
+
+    Without ``VENV`` the active virtualenv (``$VIRTUAL_ENV``) or the ``sys.path``
+    of this interpreter is used.
+    """
+    import multiprocessing
+    import os
+    import time
+    from jedi.evaluate.sys_path import get_venv_path
+
+    args = sys.argv[3:]
+    processes = None
+    if '--processes' in args:
+        index = args.index('--processes')
+        processes = int(args[index + 1])
+        del args[index:index + 2]
+    venv = args[0] if args else os.environ.get('VIRTUAL_ENV')
+    sys_path = sys.path if venv is None else get_venv_path(venv)
+
+    paths = list(_find_python_files(sys_path))
+    print('Parsing %s files.' % len(paths))
+    start = time.time()
+    parsed = parsed_bytes = errors = 0
+    pool = multiprocessing.Pool(processes)
+    try:
+        results = pool.imap_unordered(_warm_file, paths, chunksize=16)
+        for i, (path, size, error) in enumerate(results, 1):
+            if error is not None:
+                errors += 1
+                print('\n%s: %s' % (path, error))
+            elif size:
+                parsed += 1
+                parsed_bytes += size
+            if i % 100 == 0 or i == len(paths):
+                elapsed = max(time.time() - start, 1e-6)
+                sys.stdout.write('\r%s/%s files, %.1f files/s, %.2f MB/s'
+                                 % (i, len(paths), i / elapsed,
+                                    parsed_bytes / elapsed / 1024 / 1024))
+                sys.stdout.flush()
+    finally:
+        pool.close()
+        pool.join()
+    print('\nParsed %s files (%.1f MB) in %.1f s, %s were already cached, '
+          '%s failed.' % (parsed, parsed_bytes / 1024.0 / 1024,
+                          time.time() - start, len(paths) - parsed - errors,
+                          errors))
+
+
+# The guard is needed for ``multiprocessing``, which imports this module again
+# in new processes on some platforms.
+if __name__ == '__main__':
+    if len(sys.argv) == 2 and sys.argv[1] == 'repl':
+        # don't want to use __main__ only for repl yet, maybe we want to use
+        # it for something else. So just use the keyword ``repl`` for now.
+        print(join(dirname(abspath(__file__)), 'api', 'replstartup.py'))
+    elif len(sys.argv) > 1 and sys.argv[1] == 'linter':
+        _start_linter()
+    elif sys.argv[1:] == ['cache', 'gc']:
+        _start_cache_gc()
+    elif sys.argv[1:3] == ['cache', 'warm']:
+        _start_cache_warm()
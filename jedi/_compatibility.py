@@ -152,6 +152,23 @@ else:
     eval(compile("""def exec_function(source, global_map):
                         exec source in global_map """, 'blub', 'exec'))
 
+# string interning: Returns an equal string that is shared by all the callers,
+# to save memory for strings that occur often (names, indentation).
+if is_py3:
+    intern_string = sys.intern
+else:
+    _interned_strings = {}
+
+    def intern_string(string):
+        # Python 2 cannot intern unicode strings, they are kept in a table.
+        try:
+            return _interned_strings[string]
+        except KeyError:
+            if len(_interned_strings) >= 100000:
+                _interned_strings.clear()
+            _interned_strings[string] = string
+            return string
+
 # re-raise function
 if is_py3:
     def reraise(exception, traceback):
@@ -7,17 +7,25 @@ Alternatively, if you don't need a custom function and are happy with printing
 debug messages to stdout, simply call :func:`set_debug_function` without
 arguments.
 
-.. warning:: Please, note that Jedi is **not thread safe**.
+Different scripts can be used in different threads at the same time, the
+caches they share are thread safe. Scripts of the same file (``path``) share
+the tree of their source, their calls are serialized. Imports of the file
+don't use that tree, they load the file.
+
+.. warning:: Scripts of the same :class:`Project` share their evaluator, they
+   must not be used concurrently.
 """
 import os
 import warnings
 import sys
+import time
+import functools
 
 from jedi._compatibility import unicode
 from jedi.parser import load_grammar
 from jedi.parser import tree
-from jedi.parser.fast import FastParser
-from jedi.parser.utils import save_parser
+from jedi.parser.fast import FastParser, edit_source
+from jedi.parser.utils import save_parser, parser_cache, _is_up_to_date
 from jedi import debug
 from jedi import settings
 from jedi import common
@@ -30,6 +38,7 @@ from jedi.api.completion import Completion
 from jedi.evaluate import Evaluator
 from jedi.evaluate import representation as er
 from jedi.evaluate import imports
+from jedi.evaluate.cache import MemoizeDependencies
 from jedi.evaluate.param import try_iter_content
 from jedi.evaluate.helpers import get_module_names
 from jedi.evaluate.sys_path import get_venv_path
@@ -40,6 +49,41 @@ from jedi.evaluate.iterable import unpack_tuple_to_dict
 sys.setrecursionlimit(2000)
 
 
+def _api_call(func):
+    """
+    Decorator for the API methods of :class:`Script`. The fast parser of the
+    buffer is shared by the scripts of the same path and updated in place,
+    other threads don't update it during the call. The evaluator, that might
+    be shared by the scripts of a project, uses the deadline of the script
+    during the call.
+    """
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if self._parser is not None:
+            # Called by another API method of the script.
+            return func(self, *args, **kwargs)
+
+        parser = self._parse()
+        lock = getattr(parser, 'lock', None)  # Only fast parsers are shared.
+        if lock is not None:
+            lock.acquire()
+        self._parser = parser
+        evaluator = self._evaluator
+        deadline = evaluator.deadline
+        evaluator.deadline = self._deadline
+        try:
+            if lock is not None and parser.source != self._source:
+                # Another thread updated it before the lock was acquired.
+                parser.update(self._source)
+            return func(self, *args, **kwargs)
+        finally:
+            evaluator.deadline = deadline
+            self._parser = None
+            if lock is not None:
+                lock.release()
+    return wrapper
+
+
 class NotFoundError(Exception):
     """A custom error to avoid catching the wrong exceptions.
 
@@ -87,11 +131,17 @@ class Script(object):
     :type encoding: str
     :param sys_path: ``sys.path`` to use during analysis of the script
     :type sys_path: list
+    :param project: The :class:`Project` of the script. Scripts of the same
+        project share their evaluator, ``sys_path`` is then ignored.
+    :type project: :class:`Project`
+    :param deadline: Stops type inference when it's expired, the results are
+        then incomplete.
+    :type deadline: :class:`Deadline`
 
     """
     def __init__(self, source=None, line=None, column=None, path=None,
                  encoding='utf-8', source_path=None, source_encoding=None,
-                 sys_path=None):
+                 sys_path=None, project=None, deadline=None):
         if source_path is not None:
             warnings.warn("Use path instead of source_path.", DeprecationWarning)
             path = source_path
@@ -120,21 +170,32 @@ class Script(object):
             raise ValueError('`column` parameter is not in a valid range.')
         self._pos = line, column
         self._path = path
+        # The parser of the buffer during an API call.
+        self._parser = None
 
         cache.clear_time_caches()
         debug.reset_time()
-        self._grammar = load_grammar(version='%s.%s' % sys.version_info[:2])
-        if sys_path is None:
-            venv = os.getenv('VIRTUAL_ENV')
-            if venv:
-                sys_path = list(get_venv_path(venv))
-        self._evaluator = Evaluator(self._grammar, sys_path=sys_path)
+        if project is None:
+            self._grammar = load_grammar(version='%s.%s' % sys.version_info[:2])
+            self._evaluator = Evaluator(self._grammar, _get_sys_path(sys_path))
+        else:
+            self._grammar = project.grammar
+            self._evaluator = project._get_evaluator(self.path, self._source)
+        self._deadline = deadline
         debug.speed('init')
 
-    def _get_module(self):
+    def _parse(self):
         cache.invalidate_star_import_cache(self._path)
-        parser = FastParser(self._grammar, self._source, self.path)
-        save_parser(self.path, parser, pickling=False)
+        parser = FastParser(self._grammar, self._source, self.path,
+                            record_checkpoints=True, buffer=True)
+        save_parser(self.path, parser, pickling=False, buffer=True)
+        parser_cache.pin(self.path, self._evaluator)
+        return parser
+
+    def _get_module(self):
+        parser = self._parser
+        if parser is None:
+            parser = self._parse()
 
         module = self._evaluator.wrap(parser.module)
         imports.add_module(self._evaluator, unicode(module.name), module)
@@ -153,6 +214,7 @@ class Script(object):
     def __repr__(self):
         return '<%s: %s>' % (self.__class__.__name__, repr(self._orig_path))
 
+    @_api_call
     def completions(self):
         """
         Return :class:`classes.Completion` objects. Those objects contain
@@ -170,6 +232,7 @@ class Script(object):
         debug.speed('completions end')
         return completions
 
+    @_api_call
     def goto_definitions(self):
         """
         Return the definitions of a the path under the cursor.  goto function!
@@ -196,6 +259,7 @@ class Script(object):
         # the API.
         return helpers.sorted_definitions(set(defs))
 
+    @_api_call
     def goto_assignments(self, follow_imports=False):
         """
         Return the first definition found, while optionally following imports.
@@ -231,6 +295,7 @@ class Script(object):
             return []
         return list(self._evaluator.goto(name))
 
+    @_api_call
     def usages(self, additional_module_paths=()):
         """
         Return :class:`classes.Definition` objects, which contain all
@@ -242,9 +307,7 @@ class Script(object):
 
         :rtype: list of :class:`classes.Definition`
         """
-        temp, settings.dynamic_flow_information = \
-            settings.dynamic_flow_information, False
-        try:
+        with self._evaluator.override_settings(dynamic_flow_information=False):
             user_stmt = self._get_module().get_statement_for_position(self._pos)
             definitions = self._goto()
             if not definitions and isinstance(user_stmt, tree.Import):
@@ -272,11 +335,10 @@ class Script(object):
 
             for d in set(definitions):
                 names.append(classes.Definition(self._evaluator, d))
-        finally:
-            settings.dynamic_flow_information = temp
 
         return helpers.sorted_definitions(set(names))
 
+    @_api_call
     def call_signatures(self):
         """
         Return the function object of the call you're currently in.
@@ -298,7 +360,7 @@ class Script(object):
         if call_signature_details is None:
             return []
 
-        with common.scale_speed_settings(settings.scale_call_signatures):
+        with common.scale_speed_settings(self._evaluator, settings.scale_call_signatures):
             definitions = helpers.cache_call_signatures(
                 self._evaluator,
                 call_signature_details.bracket_leaf,
@@ -313,6 +375,7 @@ class Script(object):
                                       call_signature_details.keyword_name_str)
                 for d in definitions if hasattr(d, 'py__call__')]
 
+    @_api_call
     def _analysis(self):
         self._evaluator.is_analysis = True
         self._evaluator.analysis_modules = [self._get_module()]
@@ -344,6 +407,150 @@ class Script(object):
             self._evaluator.is_analysis = False
 
 
+def _get_sys_path(sys_path):
+    if sys_path is None:
+        venv = os.getenv('VIRTUAL_ENV')
+        if venv:
+            return list(get_venv_path(venv))
+    return sys_path
+
+
+class Project(object):
+    """
+    A project keeps the state of |jedi| between calls: Every :class:`Script`
+    of a project uses the same evaluator, therefore the builtins, imported
+    modules and results of type inference are reused.
+
+    If the source of a script or the file of an imported module changes, only
+    the results of type inference that depend on it are dropped. The scripts
+    of a project must not be used by different threads at the same time.
+
+    >>> project = Project()
+    >>> script = Script('import json; json.l', 1, 19, project=project)
+
+    :param sys_path: ``sys.path`` to use for the scripts of the project, see
+        :class:`Script`.
+    :type sys_path: list
+    """
+    def __init__(self, sys_path=None):
+        self.grammar = load_grammar(version='%s.%s' % sys.version_info[:2])
+        self._evaluator = Evaluator(self.grammar, _get_sys_path(sys_path))
+        self._dependencies = MemoizeDependencies(self._evaluator.memoize_cache)
+        self._evaluator.memoize_dependencies = self._dependencies
+        # Maps the paths of scripts to their last source.
+        self._sources = {}
+
+    @property
+    def sys_path(self):
+        return self._evaluator.sys_path
+
+    def apply_edit(self, path, start_pos, end_pos, text):
+        """
+        Replaces the code between ``start_pos`` and ``end_pos`` (``(line,
+        column)`` tuples) in the last source of the script ``path`` with
+        ``text``. Editors can pass their edits instead of the whole buffer,
+        only the changed lines are parsed again.
+
+        Positions after the end of a line or of the source are at the end of
+        it (see :func:`jedi.parser.fast.edit_source`).
+
+        :return: The new source, for the next :class:`Script` of ``path``.
+        :rtype: str
+        """
+        path = os.path.abspath(path) if path else None
+        try:
+            source = self._sources[path]
+        except KeyError:
+            raise ValueError('There was no script of %s in the project.' % path)
+        text = common.source_to_unicode(text)
+        new_source = edit_source(source, start_pos, end_pos, text)
+
+        item = parser_cache.get(path)
+        if item is not None:
+            self._dependencies.invalidate(item.parser.module)
+            # Imports of the file don't use the parser of its buffer.
+            if item.buffer and isinstance(item.parser, FastParser):
+                with item.parser.lock:
+                    item.parser.update(new_source)
+        self._sources[path] = new_source
+        return new_source
+
+    def _get_evaluator(self, path, source):
+        """
+        Returns the evaluator for a script. Modules and inferred types that
+        are not valid anymore are removed first.
+        """
+        evaluator = self._evaluator
+        if self._sources.get(path, source) != source:
+            item = parser_cache.peek(path)
+            if item is not None:
+                # The parser of a script might reuse its module.
+                self._dependencies.invalidate(item.parser.module)
+        self._sources[path] = source
+
+        for name, module in list(evaluator.modules.items()):
+            if self._is_outdated(module):
+                debug.dbg('project: module %s changed', name)
+                del evaluator.modules[name]
+                self._dependencies.invalidate(module.base)
+
+        evaluator.analysis = []
+        evaluator.reset_recursion_limitations()
+        return evaluator
+
+    def _is_outdated(self, module):
+        path = getattr(module, 'path', None)
+        if path is None or path in self._sources:
+            # Compiled modules don't change and the modules of scripts are
+            # checked with their source.
+            return False
+        item = parser_cache.peek(path)
+        if item is None or item.parser.module is not module.base:
+            return True
+        try:
+            p_time = os.path.getmtime(path)
+        except OSError:
+            return True
+        if not _is_up_to_date(path, p_time, item.change_time, item.size,
+                              item.digest):
+            return True
+        if item.digest is not None:
+            # Like `load_parser`, the file isn't hashed again.
+            item.change_time = p_time
+        return False
+
+
+class Deadline(object):
+    """
+    Limits the time of type inference. An editor doesn't want to wait for
+    pathological code: Once ``timeout`` seconds passed or :meth:`cancel` was
+    called (e.g. by another thread, because the user typed on), |jedi| stops
+    evaluating and returns the results it found until then.
+
+    >>> deadline = Deadline(0.5)
+    >>> script = Script('import json; json.l', 1, 19, deadline=deadline)
+
+    :param timeout: The time in seconds, ``None`` means no time limit.
+    :type timeout: float
+    """
+    def __init__(self, timeout=None):
+        self._end = None if timeout is None else time.time() + timeout
+        self._expired = False
+
+    def cancel(self):
+        """
+        Expires the deadline now.
+        """
+        self._expired = True
+
+    def is_expired(self):
+        if not self._expired and self._end is not None \
+                and time.time() > self._end:
+            # Stays expired, even if the clock is changed.
+            self._expired = True
+        return self._expired
+
+
 class Interpreter(Script):
     """
     Jedi API for Python REPLs.
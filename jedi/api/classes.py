@@ -383,7 +383,7 @@ class BaseDefinition(object):
             return ''
 
         path = self._definition.get_parent_until().path
-        parser = load_parser(path)
+        parser = load_parser(path, buffer=True)
         lines = common.splitlines(parser.source)
 
         line_nr = self._name.start_pos[0]
@@ -122,6 +122,48 @@ def _get_code_for_stack(code_lines, module, position):
         return _get_code(code_lines, user_stmt.get_start_pos_of_prefix(), position)
 
 
+def _get_checkpoint(grammar, module, position):
+    """
+    Returns the last parser checkpoint before ``position`` as a tuple of the
+    position of the checkpoint and its stack, or None if the parsers of the
+    module are not known.
+    """
+    try:
+        parsers = module.parsers
+    except AttributeError:
+        return None  # Only the fast parser keeps its parsers.
+
+    # The parsers are sorted, search the one of the part at position.
+    line, column = position
+    low, high = 0, len(parsers)
+    while low < high:
+        middle = (low + high) // 2
+        if parsers[middle].position_modifier.line < line:
+            low = middle + 1
+        else:
+            high = middle
+    if not low:
+        return None
+    p = parsers[low - 1]
+    if p._grammar is not grammar:
+        return None  # The symbols of the stack belong to another grammar.
+    offset = p.position_modifier.line
+    position = line - offset, column
+
+    checkpoints = p.checkpoints
+    low, high = 0, len(checkpoints)
+    while low < high:
+        middle = (low + high) // 2
+        if checkpoints[middle][0] <= position:
+            low = middle + 1
+        else:
+            high = middle
+    if not low:
+        return None
+    (line, column), stack = checkpoints[low - 1]
+    return (line + offset, column), stack
+
+
 def get_stack_at_position(grammar, code_lines, module, pos):
     """
     Returns the possible node names (e.g. import_from, xor_test or yield_stmt).
@@ -129,11 +171,16 @@ def get_stack_at_position(grammar, code_lines, module, pos):
     class EndMarkerReached(Exception):
         pass
 
-    def tokenize_without_endmarker(code):
+    class NewlineReached(Exception):
+        pass
+
+    def tokenize_without_endmarker(code, single_line=False):
         tokens = tokenize.source_tokens(code, use_exact_op_types=True)
         for token_ in tokens:
             if token_.string == safeword:
                 raise EndMarkerReached()
+            elif single_line and token_.type == tokenize.NEWLINE:
+                raise NewlineReached()
             else:
                 yield token_
 
@@ -142,6 +189,23 @@ def get_stack_at_position(grammar, code_lines, module, pos):
     # completion.
     # Use Z as a prefix because it's not part of a number suffix.
     safeword = 'ZZZ_USER_WANTS_TO_COMPLETE_HERE_WITH_JEDI'
+
+    checkpoint = _get_checkpoint(grammar, module, pos) if code else None
+    if checkpoint is not None:
+        # The parser of the module stored its stack at the start of the
+        # line, only the line up to the position has to be parsed.
+        start_pos, stack = checkpoint
+        line_code = _get_code(code_lines, start_pos, pos) + safeword
+        p = parser.ParserWithRecovery(grammar, line_code, start_parsing=False)
+        try:
+            p.resume(stack, tokenize_without_endmarker(line_code, True))
+        except EndMarkerReached:
+            return Stack(p.stack)
+        except NewlineReached:
+            # The position is not on the line of the checkpoint (e.g. on an
+            # empty line), the indentation decides about the stack.
+            pass
+
     # Remove as many indents from **all** code lines as possible.
     code = code + safeword
 
@@ -9,10 +9,11 @@ available:
   which can be useful if there's user interaction and the user cannot react
   faster than a certain time.
 
-This module is one of the reasons why |jedi| is not thread-safe. As you can see
-there are global variables, which are holding the cache information. Some of
-these variables are being cleaned after every API usage.
+As you can see there are global variables, which are holding the cache
+information. They are shared by all threads, changes are guarded by a lock.
+Some of these variables are being cleaned after every API usage.
 """
+import threading
 import time
 
 from jedi import settings
@@ -20,6 +21,7 @@ from jedi.parser.utils import parser_cache
 from jedi.parser.utils import underscore_memoization
 
 _time_caches = {}
+_time_caches_lock = threading.Lock()
 
 
 def clear_time_caches(delete_all=False):
@@ -29,20 +31,19 @@ def clear_time_caches(delete_all=False):
     :param delete_all: Deletes also the cache that is normally not deleted,
         like parser cache, which is important for faster parsing.
     """
-    global _time_caches
-
-    if delete_all:
-        for cache in _time_caches.values():
-            cache.clear()
-        parser_cache.clear()
-    else:
-        # normally just kill the expired entries, not all
-        for tc in _time_caches.values():
-            # check time_cache for expired entries
-            for key, (t, value) in list(tc.items()):
-                if t < time.time():
-                    # delete expired entries
-                    del tc[key]
+    with _time_caches_lock:
+        if delete_all:
+            for cache in _time_caches.values():
+                cache.clear()
+            parser_cache.clear()
+        else:
+            # normally just kill the expired entries, not all
+            for tc in _time_caches.values():
+                # check time_cache for expired entries
+                for key, (t, value) in list(tc.items()):
+                    if t < time.time():
+                        # delete expired entries
+                        del tc[key]
 
 
 def time_cache(time_add_setting):
@@ -101,12 +102,11 @@ def cache_star_import(func):
 
 def _invalidate_star_import_cache_module(module, only_main=False):
     """ Important if some new modules are being reparsed """
-    try:
-        t, modules = _time_caches['star_import_cache_validity'][module]
-    except KeyError:
-        pass
-    else:
-        del _time_caches['star_import_cache_validity'][module]
+    with _time_caches_lock:
+        try:
+            del _time_caches['star_import_cache_validity'][module]
+        except KeyError:
+            pass
 
         # This stuff was part of load_parser. However since we're most likely
         # not going to use star import caching anymore, just ignore it.
@@ -3,11 +3,11 @@ import sys
 import contextlib
 import functools
 import re
+import threading
 from itertools import chain
 from ast import literal_eval
 
 from jedi._compatibility import unicode, reraise
-from jedi import settings
 
 
 class UncaughtAttributeError(Exception):
@@ -81,17 +81,12 @@ class PushBackIterator(object):
         return self.current
 
 
-@contextlib.contextmanager
-def scale_speed_settings(factor):
-    a = settings.max_executions
-    b = settings.max_until_execution_unique
-    settings.max_executions *= factor
-    settings.max_until_execution_unique *= factor
-    try:
-        yield
-    finally:
-        settings.max_executions = a
-        settings.max_until_execution_unique = b
+def scale_speed_settings(evaluator, factor):
+    get_setting = evaluator.get_setting
+    return evaluator.override_settings(
+        max_executions=get_setting('max_executions') * factor,
+        max_until_execution_unique=get_setting('max_until_execution_unique') * factor
+    )
 
 
 def indent_block(text, indention='    '):
@@ -104,6 +99,23 @@ def indent_block(text, indention='    '):
     return '\n'.join(map(lambda s: indention + s, lines)) + temp
 
 
+_sys_path_lock = threading.RLock()
+
+
+@contextlib.contextmanager
+def replaced_sys_path(sys_path):
+    """
+    Context manager that replaces ``sys.path``. It's global, therefore only
+    one thread at a time can replace it.
+    """
+    with _sys_path_lock:
+        temp, sys.path = sys.path, sys_path
+        try:
+            yield
+        finally:
+            sys.path = temp
+
+
 @contextlib.contextmanager
 def ignored(*exceptions):
     """
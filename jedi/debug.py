@@ -1,6 +1,7 @@
 from jedi._compatibility import encoding, is_py3, u
 import inspect
 import os
+import threading
 import time
 
 def _lazy_colorama_init():
@@ -62,25 +63,34 @@ enable_notice = False
 # callback, interface: level, str
 debug_function = None
 ignored_modules = ['jedi.parser']
-_debug_indent = 0
-_start_time = time.time()
+
+
+class _ThreadState(threading.local):
+    """
+    The indentation and the start time of the messages, every thread has its
+    own.
+    """
+    def __init__(self):
+        self.indent = 0
+        self.start_time = time.time()
+
+
+_state = _ThreadState()
 
 
 def reset_time():
-    global _start_time, _debug_indent
-    _start_time = time.time()
-    _debug_indent = 0
+    _state.start_time = time.time()
+    _state.indent = 0
 
 
 def increase_indent(func):
     """Decorator for makin """
     def wrapper(*args, **kwargs):
-        global _debug_indent
-        _debug_indent += 1
+        _state.indent += 1
         try:
             return func(*args, **kwargs)
         finally:
-            _debug_indent -= 1
+            _state.indent -= 1
     return wrapper
 
 
@@ -94,7 +104,7 @@ def dbg(message, *args, **kwargs):
         frm = inspect.stack()[1]
         mod = inspect.getmodule(frm[0])
         if not (mod.__name__ in ignored_modules):
-            i = ' ' * _debug_indent
+            i = ' ' * _state.indent
             _lazy_colorama_init()
             debug_function(color, i + 'dbg: ' + message % tuple(u(repr(a)) for a in args))
 
@@ -104,7 +114,7 @@ def warning(message, *args, **kwargs):
     assert not kwargs
 
     if debug_function and enable_warning:
-        i = ' ' * _debug_indent
+        i = ' ' * _state.indent
         if format:
             message = message % tuple(u(repr(a)) for a in args)
         debug_function('RED', i + 'warning: ' + message)
@@ -113,8 +123,8 @@ def warning(message, *args, **kwargs):
 def speed(name):
     if debug_function and enable_speed:
         now = time.time()
-        i = ' ' * _debug_indent
-        debug_function('YELLOW', i + 'speed: ' + '%s %s' % (name, now - _start_time))
+        i = ' ' * _state.indent
+        debug_function('YELLOW', i + 'speed: ' + '%s %s' % (name, now - _state.start_time))
 
 
 def print_to_stdout(color, str_out):
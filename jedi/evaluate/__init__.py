@@ -60,12 +60,14 @@ only *evaluates* what needs to be *evaluated*. All the statements and modules
 that are not used are just being ignored.
 """
 
+import contextlib
 import copy
 import sys
 from itertools import chain
 
 from jedi.parser import tree
 from jedi import debug
+from jedi import settings
 from jedi.evaluate import representation as er
 from jedi.evaluate import imports
 from jedi.evaluate import recursion
@@ -83,6 +85,8 @@ class Evaluator(object):
     def __init__(self, grammar, sys_path=None):
         self.grammar = grammar
         self.memoize_cache = {}  # for memoize decorators
+        # Tracks what the memoized results depend on, see `MemoizeDependencies`.
+        self.memoize_dependencies = None
         # To memorize modules -> equals `sys.modules`.
         self.modules = {}  # like `sys.modules`.
         self.compiled_cache = {}  # see `evaluate.compiled.create()`
@@ -91,6 +95,11 @@ class Evaluator(object):
         self.predefined_if_name_dict_dict = {}
         self.dynamic_params_depth = 0
         self.is_analysis = False
+        # Settings that are changed for this evaluator only, other threads
+        # don't see them. See `override_settings`.
+        self._settings = {}
+        # The `jedi.api.Deadline` of the current request.
+        self.deadline = None
 
         if sys_path is None:
             sys_path = sys.path
@@ -105,6 +114,37 @@ class Evaluator(object):
         # Constants
         self.BUILTINS = compiled.get_special_object(self, 'BUILTINS')
 
+    def get_setting(self, name):
+        """
+        Returns the setting ``name`` of :mod:`jedi.settings`, unless it's
+        overridden for this evaluator.
+        """
+        try:
+            return self._settings[name]
+        except KeyError:
+            return getattr(settings, name)
+
+    def is_expired(self):
+        """
+        Returns True if the deadline of the current request passed (or it was
+        cancelled). The evaluation stops then and the types that were found
+        until then are the result.
+        """
+        return self.deadline is not None and self.deadline.is_expired()
+
+    @contextlib.contextmanager
+    def override_settings(self, **kwargs):
+        """
+        Changes settings for the evaluations in the ``with`` block. Unlike
+        changing :mod:`jedi.settings` this doesn't affect other evaluators.
+        """
+        old = self._settings
+        self._settings = dict(old, **kwargs)
+        try:
+            yield
+        finally:
+            self._settings = old
+
     def reset_recursion_limitations(self):
         self.recursion_detector = recursion.RecursionDetector(self)
         self.execution_recursion_detector = recursion.ExecutionRecursionDetector(self)
@@ -197,6 +237,9 @@ class Evaluator(object):
         return types
 
     def eval_element(self, element):
+        if self.is_expired():
+            debug.warning('deadline expired, not evaluating %s', element)
+            return set()
         if isinstance(element, iterable.AlreadyEvaluated):
             return set(element)
         elif isinstance(element, iterable.MergedNodes):
@@ -415,6 +458,11 @@ class Evaluator(object):
 
     @debug.increase_indent
     def execute(self, obj, arguments=(), trailer=None):
+        if self.is_expired() and not isinstance(obj, compiled.CompiledObject):
+            # Compiled objects are cheap to execute, there's also code that
+            # relies on their results (e.g. instances of builtin types).
+            debug.warning('deadline expired, not executing %s', obj)
+            return set()
         if not isinstance(arguments, param.Arguments):
             arguments = param.Arguments(self, arguments, trailer)
 
@@ -2,10 +2,13 @@
 - the popular ``memoize_default`` works like a typical memoize and returns the
   default otherwise.
 - ``CachedMetaClass`` uses ``memoize_default`` to do the same with classes.
+- ``MemoizeDependencies`` tracks which modules the memoized results depend on.
 """
 
 import inspect
 
+from jedi.parser import tree
+
 NO_DEFAULT = object()
 
 
@@ -20,11 +23,16 @@ def memoize_default(default=NO_DEFAULT, evaluator_is_first_arg=False, second_arg
     def func(function):
         def wrapper(obj, *args, **kwargs):
             if evaluator_is_first_arg:
-                cache = obj.memoize_cache
+                evaluator = obj
+                subject = args[0] if args else None
             elif second_arg_is_evaluator:  # needed for meta classes
-                cache = args[0].memoize_cache
+                evaluator = args[0]
+                subject = args[1] if len(args) > 1 else None
             else:
-                cache = obj._evaluator.memoize_cache
+                evaluator = obj._evaluator
+                subject = obj
+            cache = evaluator.memoize_cache
+            dependencies = evaluator.memoize_dependencies
 
             try:
                 memo = cache[function]
@@ -34,14 +42,28 @@ def memoize_default(default=NO_DEFAULT, evaluator_is_first_arg=False, second_arg
 
             key = (obj, args, frozenset(kwargs.items()))
             if key in memo:
+                if dependencies is not None:
+                    dependencies.use(function, key)
                 return memo[key]
             else:
                 if default is not NO_DEFAULT:
                     memo[key] = default
-                rv = function(obj, *args, **kwargs)
-                if inspect.isgenerator(rv):
-                    rv = list(rv)
-                memo[key] = rv
+                if dependencies is not None:
+                    dependencies.push()
+                try:
+                    rv = function(obj, *args, **kwargs)
+                    if inspect.isgenerator(rv):
+                        rv = list(rv)
+                    if evaluator.is_expired() and not second_arg_is_evaluator:
+                        # The result might be incomplete, because the
+                        # evaluation stopped. Creating wrappers (the meta
+                        # class) doesn't evaluate anything.
+                        memo.pop(key, None)
+                    else:
+                        memo[key] = rv
+                finally:
+                    if dependencies is not None:
+                        dependencies.pop(function, key, subject)
                 return rv
         return wrapper
     return func
@@ -56,3 +78,90 @@ class CachedMetaClass(type):
     @memoize_default(None, second_arg_is_evaluator=True)
     def __call__(self, *args, **kwargs):
         return super(CachedMetaClass, self).__call__(*args, **kwargs)
+
+
+def _get_module(obj):
+    """
+    Returns the tree module of ``obj`` or None, if it doesn't belong to one
+    (e.g. compiled objects).
+    """
+    try:
+        module = obj.get_parent_until()
+    except AttributeError:
+        return None
+    if isinstance(module, tree.Module):
+        # A `ModuleWrapper`, the module is its base.
+        return getattr(module, 'base', module)
+    return None
+
+
+class MemoizeDependencies(object):
+    """
+    Records the modules that the results in the ``memoize_cache`` of an
+    evaluator depend on. If a module changes, :meth:`invalidate` only drops
+    the results that depend on it, all the others stay valid.
+
+    A result depends on the module of the object it's memoized for, on the
+    modules it read (see :func:`add_dependency`) and on everything the
+    memoized results it used depend on.
+    """
+    def __init__(self, cache):
+        self._cache = cache
+        # The modules of the results that are being evaluated.
+        self._stack = []
+        # Maps `function -> key -> modules` and `module -> (function, key)`.
+        self._dependencies = {}
+        self._results = {}
+
+    def add(self, obj):
+        if self._stack:
+            module = _get_module(obj)
+            if module is not None:
+                self._stack[-1].add(module)
+
+    def use(self, function, key):
+        if self._stack:
+            modules = self._dependencies.get(function, {}).get(key)
+            if modules:
+                self._stack[-1].update(modules)
+
+    def push(self):
+        self._stack.append(set())
+
+    def pop(self, function, key, subject):
+        if subject is not None:
+            # Getting the module might use other results, they belong to
+            # this result as well.
+            self.add(subject)
+        modules = frozenset(self._stack.pop())
+        if self._stack:
+            self._stack[-1].update(modules)
+        if not modules:
+            return
+
+        self._dependencies.setdefault(function, {})[key] = modules
+        for module in modules:
+            self._results.setdefault(module, set()).add((function, key))
+
+    def invalidate(self, module):
+        """
+        Drops all the results that depend on ``module``.
+        """
+        for function, key in self._results.pop(module, ()):
+            self._cache.get(function, {}).pop(key, None)
+            modules = self._dependencies[function].pop(key, ())
+            for other in modules:
+                results = self._results.get(other)
+                if results is not None:
+                    results.discard((function, key))
+
+
+def add_dependency(evaluator, obj):
+    """
+    Tells the memoized results that are being evaluated that they depend on
+    the module of ``obj``. Only needed for modules that are read without
+    using a memoized result of an object of the module.
+    """
+    dependencies = evaluator.memoize_dependencies
+    if dependencies is not None:
+        dependencies.add(obj)
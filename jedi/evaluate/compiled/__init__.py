@@ -8,6 +8,7 @@ import os
 from functools import partial
 
 from jedi._compatibility import builtins as _builtins, unicode
+from jedi import common
 from jedi import debug
 from jedi.cache import underscore_memoization, memoize_method
 from jedi.parser.tree import Param, Base, Operator, zero_position_modifier
@@ -360,9 +361,9 @@ def load_module(evaluator, path=None, name=None):
         p, _, dotted_path = path.partition(os.path.sep)
         sys_path.insert(0, p)
 
-    temp, sys.path = sys.path, sys_path
     try:
-        __import__(dotted_path)
+        with common.replaced_sys_path(sys_path):
+            __import__(dotted_path)
     except RuntimeError:
         if 'PySide' in dotted_path or 'PyQt' in dotted_path:
             # RuntimeError: the PyQt4.QtCore and PyQt5.QtCore modules both wrap
@@ -374,8 +375,6 @@ def load_module(evaluator, path=None, name=None):
         # If a module is "corrupt" or not really a Python module or whatever.
         debug.warning('Module %s not importable.', path)
         return None
-    finally:
-        sys.path = temp
 
     # Just access the cache after import, because of #59 as well as the very
     # complicated import structure of Python.
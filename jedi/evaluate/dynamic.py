@@ -22,7 +22,7 @@ from jedi._compatibility import unicode
 from jedi.parser import tree
 from jedi import settings
 from jedi import debug
-from jedi.evaluate.cache import memoize_default
+from jedi.evaluate.cache import memoize_default, add_dependency
 from jedi.evaluate import imports
 
 
@@ -120,13 +120,15 @@ def search_function_call(evaluator, func):
         result = []
         i = 0
         for mod in imports.get_modules_containing_name(evaluator, [current_module], func_name):
+            add_dependency(evaluator, mod)
             for name, trailer in get_possible_nodes(mod, func_name):
                 i += 1
 
                 # This is a simple way to stop Jedi's dynamic param recursion
                 # from going wild: The deeper Jedi's in the recursin, the less
                 # code should be evaluated.
-                if i * evaluator.dynamic_params_depth > MAX_PARAM_SEARCHES:
+                if i * evaluator.dynamic_params_depth > MAX_PARAM_SEARCHES \
+                        or evaluator.is_expired():
                     return listener.param_possibilities
 
                 for typ in evaluator.goto_definitions(name):
@@ -21,7 +21,6 @@ from jedi.parser import tree
 from jedi import debug
 from jedi import common
 from jedi.common import unite
-from jedi import settings
 from jedi.evaluate import representation as er
 from jedi.evaluate import dynamic
 from jedi.evaluate import compiled
@@ -460,7 +459,7 @@ def check_flow_information(evaluator, flow, search_name, pos):
 
     ensures that `k` is a string.
     """
-    if not settings.dynamic_flow_information:
+    if not evaluator.get_setting('dynamic_flow_information'):
         return None
 
     result = set()
@@ -21,6 +21,7 @@ from jedi._compatibility import find_module, unicode
 from jedi import common
 from jedi import debug
 from jedi.parser import fast
+from jedi.parser.skeleton import SkeletonParser
 from jedi.parser import tree
 from jedi.parser.utils import save_parser, load_parser, parser_cache
 from jedi.evaluate import sys_path
@@ -29,7 +30,7 @@ from jedi import settings
 from jedi.common import source_to_unicode
 from jedi.evaluate import compiled
 from jedi.evaluate import analysis
-from jedi.evaluate.cache import memoize_default, NO_DEFAULT
+from jedi.evaluate.cache import memoize_default, NO_DEFAULT, add_dependency
 
 
 def completion_names(evaluator, imp, pos):
@@ -266,9 +267,12 @@ class Importer(object):
 
         module_name = '.'.join(import_parts)
         try:
-            return set([self._evaluator.modules[module_name]])
+            module = self._evaluator.modules[module_name]
         except KeyError:
             pass
+        else:
+            add_dependency(self._evaluator, module)
+            return set([module])
 
         if len(import_path) > 1:
             # This is a recursive way of importing that works great with
@@ -315,12 +319,9 @@ class Importer(object):
                 debug.dbg('search_module %s in %s', import_parts[-1], self.file_path)
                 # Override the sys.path. It works only good that way.
                 # Injecting the path directly into `find_module` did not work.
-                sys.path, temp = sys_path, sys.path
-                try:
+                with common.replaced_sys_path(sys_path):
                     module_file, module_path, is_pkg = \
                         find_module(import_parts[-1])
-                finally:
-                    sys.path = temp
             except ImportError:
                 # The module is not a package.
                 _add_error(self._evaluator, import_path[-1])
@@ -361,6 +362,7 @@ class Importer(object):
                 module._parent_module = parent_module
 
         self._evaluator.modules[module_name] = module
+        add_dependency(self._evaluator, module)
         return set([module])
 
     def _generate_name(self, name):
@@ -459,8 +461,11 @@ def _load_module(evaluator, path=None, source=None, sys_path=None, parent_module
                     source = f.read()
         else:
             return compiled.load_module(evaluator, path)
-        p = path
-        p = fast.FastParser(evaluator.grammar, common.source_to_unicode(source), p)
+        source = common.source_to_unicode(source)
+        if settings.skeleton_parser:
+            p = SkeletonParser(evaluator.grammar, source, path)
+        else:
+            p = fast.FastParser(evaluator.grammar, source, path)
         save_parser(path, p)
         return p.module
 
@@ -469,6 +474,9 @@ def _load_module(evaluator, path=None, source=None, sys_path=None, parent_module
 
     cached = load_parser(path)
     module = load(source) if cached is None else cached.module
+    # The evaluator keeps references to the module, it shouldn't be parsed
+    # again while the evaluator is still in use.
+    parser_cache.pin(path, evaluator)
     module = evaluator.wrap(module)
     return module
 
@@ -487,13 +495,14 @@ def get_modules_containing_name(evaluator, mods, name):
     Search a name in the directories of modules.
     """
     def check_python_file(path):
+        item = parser_cache.get(path)
+        # The buffers of scripts might be updated by other threads.
+        if item is not None and not item.buffer:
+            return item.parser.module
         try:
-            return parser_cache[path].parser.module
-        except KeyError:
-            try:
-                return check_fs(path)
-            except IOError:
-                return None
+            return check_fs(path)
+        except IOError:
+            return None
 
     def check_fs(path):
         with open(path, 'rb') as f:
@@ -511,7 +520,7 @@ def get_modules_containing_name(evaluator, mods, name):
         mod_paths.add(m.path)
         yield m
 
-    if settings.dynamic_params_for_other_modules:
+    if evaluator.get_setting('dynamic_params_for_other_modules'):
         paths = set(settings.additional_dynamic_modules)
         for p in mod_paths:
             if p is not None:
@@ -524,6 +533,8 @@ def get_modules_containing_name(evaluator, mods, name):
                             paths.add(d + os.path.sep + entry)
 
         for p in sorted(paths):
+            if evaluator.is_expired():
+                break
             # make testing easier, sort it - same results on every interpreter
             c = check_python_file(p)
             if c is not None and c not in mods and not isinstance(c, compiled.CompiledObject):
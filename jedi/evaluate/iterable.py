@@ -696,63 +696,61 @@ def _check_array_additions(evaluator, compare_array, module, is_list):
             return node
         return node.get_parent_until(er.FunctionExecution)
 
-    temp_param_add, settings.dynamic_params_for_other_modules = \
-        settings.dynamic_params_for_other_modules, False
-
     search_names = ['append', 'extend', 'insert'] if is_list else ['add', 'update']
     comp_arr_parent = get_execution_parent(compare_array)
 
     added_types = set()
-    for add_name in search_names:
-        try:
-            possible_names = module.used_names[add_name]
-        except KeyError:
-            continue
-        else:
-            for name in possible_names:
-                # Check if the original scope is an execution. If it is, one
-                # can search for the same statement, that is in the module
-                # dict. Executions are somewhat special in jedi, since they
-                # literally copy the contents of a function.
-                if isinstance(comp_arr_parent, er.FunctionExecution):
-                    if comp_arr_parent.start_pos < name.start_pos < comp_arr_parent.end_pos:
-                        name = comp_arr_parent.name_for_position(name.start_pos)
-                    else:
-                        # Don't check definitions that are not defined in the
-                        # same function. This is not "proper" anyway. It also
-                        # improves Jedi's speed for array lookups, since we
-                        # don't have to check the whole source tree anymore.
+    with evaluator.override_settings(dynamic_params_for_other_modules=False):
+        for add_name in search_names:
+            try:
+                possible_names = module.used_names[add_name]
+            except KeyError:
+                continue
+            else:
+                for name in possible_names:
+                    if evaluator.is_expired():
+                        break
+                    # Check if the original scope is an execution. If it is, one
+                    # can search for the same statement, that is in the module
+                    # dict. Executions are somewhat special in jedi, since they
+                    # literally copy the contents of a function.
+                    if isinstance(comp_arr_parent, er.FunctionExecution):
+                        if comp_arr_parent.start_pos < name.start_pos < comp_arr_parent.end_pos:
+                            name = comp_arr_parent.name_for_position(name.start_pos)
+                        else:
+                            # Don't check definitions that are not defined in the
+                            # same function. This is not "proper" anyway. It also
+                            # improves Jedi's speed for array lookups, since we
+                            # don't have to check the whole source tree anymore.
+                            continue
+                    trailer = name.parent
+                    power = trailer.parent
+                    trailer_pos = power.children.index(trailer)
+                    try:
+                        execution_trailer = power.children[trailer_pos + 1]
+                    except IndexError:
                         continue
-                trailer = name.parent
-                power = trailer.parent
-                trailer_pos = power.children.index(trailer)
-                try:
-                    execution_trailer = power.children[trailer_pos + 1]
-                except IndexError:
-                    continue
-                else:
-                    if execution_trailer.type != 'trailer' \
-                            or execution_trailer.children[0] != '(' \
-                            or execution_trailer.children[1] == ')':
+                    else:
+                        if execution_trailer.type != 'trailer' \
+                                or execution_trailer.children[0] != '(' \
+                                or execution_trailer.children[1] == ')':
+                            continue
+                    power = helpers.call_of_leaf(name, cut_own_trailer=True)
+                    # InstanceElements are special, because they don't get copied,
+                    # but have this wrapper around them.
+                    if isinstance(comp_arr_parent, er.InstanceElement):
+                        power = er.get_instance_el(evaluator, comp_arr_parent.instance, power)
+
+                    if evaluator.recursion_detector.push_stmt(power):
+                        # Check for recursion. Possible by using 'extend' in
+                        # combination with function calls.
                         continue
-                power = helpers.call_of_leaf(name, cut_own_trailer=True)
-                # InstanceElements are special, because they don't get copied,
-                # but have this wrapper around them.
-                if isinstance(comp_arr_parent, er.InstanceElement):
-                    power = er.get_instance_el(evaluator, comp_arr_parent.instance, power)
-
-                if evaluator.recursion_detector.push_stmt(power):
-                    # Check for recursion. Possible by using 'extend' in
-                    # combination with function calls.
-                    continue
-                try:
-                    if compare_array in evaluator.eval_element(power):
-                        # The arrays match. Now add the results
-                        added_types |= check_additions(execution_trailer.children[1], add_name)
-                finally:
-                    evaluator.recursion_detector.pop_stmt()
-    # reset settings
-    settings.dynamic_params_for_other_modules = temp_param_add
+                    try:
+                        if compare_array in evaluator.eval_element(power):
+                            # The arrays match. Now add the results
+                            added_types |= check_additions(execution_trailer.children[1], add_name)
+                    finally:
+                        evaluator.recursion_detector.pop_stmt()
     debug.dbg('Dynamic array result %s' % added_types, color='MAGENTA')
     return added_types
 
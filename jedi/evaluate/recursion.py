@@ -3,12 +3,11 @@ Recursions are the recipe of |jedi| to conquer Python code. However, someone
 must stop recursions going mad. Some settings are here to make |jedi| stop at
 the right time. You can read more about them :ref:`here <settings-recursion>`.
 
-Next to :mod:`jedi.evaluate.cache` this module also makes |jedi| not
-thread-safe. Why?  ``execution_recursion_decorator`` uses class variables to
-count the function calls.
+The detectors are attributes of the evaluator, like the caches of
+:mod:`jedi.evaluate.cache`. Evaluators in different threads therefore don't
+count each other's function calls.
 """
 from jedi import debug
-from jedi import settings
 from jedi.evaluate import iterable
 
 
@@ -137,7 +136,8 @@ class ExecutionRecursionDetector(object):
         self.execution_funcs.add(execution.base)
         self.parent_execution_funcs.append(execution.base)
 
-        if self.execution_count > settings.max_executions:
+        get_setting = self._evaluator.get_setting
+        if self.execution_count > get_setting('max_executions'):
             return True
 
         if isinstance(execution.base, (iterable.Array, iterable.Generator)):
@@ -147,11 +147,11 @@ class ExecutionRecursionDetector(object):
             return False
 
         if in_par_execution_funcs:
-            if self.recursion_level > settings.max_function_recursion_level:
+            if self.recursion_level > get_setting('max_function_recursion_level'):
                 return True
         if in_execution_funcs and \
-                len(self.execution_funcs) > settings.max_until_execution_unique:
+                len(self.execution_funcs) > get_setting('max_until_execution_unique'):
             return True
-        if self.execution_count > settings.max_executions_without_builtins:
+        if self.execution_count > get_setting('max_executions_without_builtins'):
             return True
         return False
@@ -17,6 +17,7 @@ complexity of the ``Parser`` (there's another parser sitting inside
 """
 import os
 import re
+import weakref
 
 from jedi.parser import tree as pt
 from jedi.parser import tokenize
@@ -24,6 +25,8 @@ from jedi.parser.token import (DEDENT, INDENT, ENDMARKER, NEWLINE, NUMBER,
                                STRING)
 from jedi.parser.pgen2.pgen import generate_grammar
 from jedi.parser.pgen2.parse import PgenParser
+from jedi.parser.utils import ParserPickling
+from jedi import settings
 
 OPERATOR_KEYWORDS = 'and', 'for', 'if', 'else', 'in', 'is', 'lambda', 'not', 'or'
 # Not used yet. In the future I intend to add something like KeywordStatement
@@ -32,6 +35,7 @@ STATEMENT_KEYWORDS = 'assert', 'del', 'global', 'nonlocal', 'raise', \
 
 
 _loaded_grammars = {}
+_node_tables = weakref.WeakKeyDictionary()
 
 
 class ParseError(Exception):
@@ -55,7 +59,26 @@ def load_grammar(version='3.4'):
     try:
         return _loaded_grammars[path]
     except KeyError:
-        return _loaded_grammars.setdefault(path, generate_grammar(path))
+        return _loaded_grammars.setdefault(path, _load_cached_grammar(path))
+
+
+def _load_cached_grammar(path):
+    """
+    Generating the grammar tables is a noticable cost at startup, therefore
+    the tables are pickled next to the parser cache.
+    """
+    if not settings.use_filesystem_cache:
+        return generate_grammar(path)
+
+    grammar = ParserPickling.load_grammar(path)
+    if grammar is None:
+        grammar = generate_grammar(path)
+        try:
+            ParserPickling.save_grammar(path, grammar)
+        except (IOError, OSError):
+            # Not being able to write the cache is not a reason to fail.
+            pass
+    return grammar
 
 
 class ParserSyntaxError(object):
@@ -116,8 +139,11 @@ class Parser(object):
         self.source = source
         self._start_symbol = start_symbol
         self._grammar = grammar
+        self._node_table = self._get_node_table(grammar)
 
         self._parsed = None
+        # The stack the parser starts with, see `resume`.
+        self._start_stack = None
 
         if start_parsing:
             if tokenizer is None:
@@ -133,11 +159,12 @@ class Parser(object):
             self._grammar, self.convert_node, self.convert_leaf,
             self.error_recovery, start_number
         )
+        if self._start_stack is not None:
+            pgen_parser.stack[:] = self._start_stack
 
-        try:
-            self._parsed = pgen_parser.parse(tokenizer)
-        finally:
-            self.stack = pgen_parser.stack
+        # The stack is changed in place, it's also visible while parsing.
+        self.stack = pgen_parser.stack
+        self._parsed = pgen_parser.parse(tokenizer)
 
         if self._start_symbol == 'file_input' != self._parsed.type:
             # If there's only one statement, we get back a non-module. That's
@@ -149,6 +176,18 @@ class Parser(object):
         if self._added_newline:
             self.remove_last_newline()
 
+    def resume(self, checkpoint, tokenizer):
+        """
+        Parses the tokens like :meth:`parse`, but starts with the stack of
+        ``checkpoint`` (see :attr:`ParserWithRecovery.checkpoints`) instead
+        of the start symbol. The nodes that were on the stack are not known,
+        the tokens are parsed as if they were not there.
+        """
+        dfas = self._grammar.dfas
+        self._start_stack = [(dfas[type_], state, (type_, []))
+                             for type_, state in checkpoint]
+        return self.parse(tokenizer)
+
     def get_parsed_node(self):
         # TODO rename to get_root_node
         return self._parsed
@@ -157,6 +196,48 @@ class Parser(object):
                        add_token_callback):
         raise ParseError
 
+    LEAF_MAPPING = {
+        STRING: pt.String,
+        NUMBER: pt.Number,
+        NEWLINE: pt.Newline,
+        INDENT: pt.Indent,
+        DEDENT: pt.Dedent,
+        ENDMARKER: pt.EndMarker,
+    }
+
+    @staticmethod
+    def _get_node_table(grammar):
+        """
+        Returns a dict mapping the symbol numbers of ``grammar`` to
+        ``(symbol, class, kind)``, where ``class`` is the class of the node
+        (None for a plain ``Node``) and ``kind`` tells ``convert_node`` which
+        names have to be updated after creating the node (None for most
+        nodes). It's only built once per grammar.
+        """
+        try:
+            return _node_tables[grammar]
+        except KeyError:
+            pass
+
+        table = {}
+        for type, symbol in grammar.number2symbol.items():
+            cls = Parser.AST_MAPPING.get(symbol)
+            kind = None
+            if cls is None:
+                pass
+            elif symbol == 'global_stmt':
+                kind = 'global'
+            elif issubclass(cls, pt.Lambda):
+                kind = 'lambda'
+            elif issubclass(cls, (pt.ClassOrFunc, pt.Module)) \
+                    and symbol in ('funcdef', 'classdef', 'file_input'):
+                kind = 'scope'
+            elif issubclass(cls, pt.CompFor):
+                kind = 'comp_for'
+            table[type] = symbol, cls, kind
+        _node_tables[grammar] = table
+        return table
+
     def convert_node(self, grammar, type, children):
         """
         Convert raw node information to a Node instance.
@@ -165,20 +246,20 @@ class Parser(object):
         grammar rule produces a new complete node, so that the tree is build
         strictly bottom-up.
         """
-        symbol = grammar.number2symbol[type]
-        try:
-            new_node = Parser.AST_MAPPING[symbol](children)
-        except KeyError:
-            new_node = pt.Node(symbol, children)
+        symbol, cls, kind = self._node_table[type]
+        if cls is None:
+            return pt.Node(symbol, children)
 
+        new_node = cls(children)
         # We need to check raw_node always, because the same node can be
         # returned by convert multiple times.
-        if symbol == 'global_stmt':
+        if kind is None:
+            pass
+        elif kind == 'global':
             self._global_names += new_node.get_global_names()
-        elif isinstance(new_node, pt.Lambda):
+        elif kind == 'lambda':
             new_node.names_dict = self._scope_names_stack.pop()
-        elif isinstance(new_node, (pt.ClassOrFunc, pt.Module)) \
-                and symbol in ('funcdef', 'classdef', 'file_input'):
+        elif kind == 'scope':
             # scope_name_stack handling
             scope_names = self._scope_names_stack.pop()
             if isinstance(new_node, pt.ClassOrFunc):
@@ -188,7 +269,7 @@ class Parser(object):
                 arr = self._scope_names_stack[-1].setdefault(n.value, [])
                 arr.append(n)
             new_node.names_dict = scope_names
-        elif isinstance(new_node, pt.CompFor):
+        elif kind == 'comp_for':
             # The name definitions of comprehenions shouldn't be part of the
             # current scope. They are part of the comprehension scope.
             for n in new_node.get_defined_names():
@@ -211,20 +292,8 @@ class Parser(object):
                 arr = self._scope_names_stack[-1].setdefault(name.value, [])
                 arr.append(name)
                 return name
-        elif type == STRING:
-            return pt.String(self.position_modifier, value, start_pos, prefix)
-        elif type == NUMBER:
-            return pt.Number(self.position_modifier, value, start_pos, prefix)
-        elif type == NEWLINE:
-            return pt.Newline(self.position_modifier, value, start_pos, prefix)
-        elif type == INDENT:
-            return pt.Indent(self.position_modifier, value, start_pos, prefix)
-        elif type == DEDENT:
-            return pt.Dedent(self.position_modifier, value, start_pos, prefix)
-        elif type == ENDMARKER:
-            return pt.EndMarker(self.position_modifier, value, start_pos, prefix)
-        else:
-            return pt.Operator(self.position_modifier, value, start_pos, prefix)
+        cls = Parser.LEAF_MAPPING.get(type, pt.Operator)
+        return cls(self.position_modifier, value, start_pos, prefix)
 
     def remove_last_newline(self):
         """
@@ -289,10 +358,19 @@ class ParserWithRecovery(Parser):
     :param source: The codebase for the parser. Must be unicode.
     :param module_path: The path of the module in the file system, may be None.
     :type module_path: str
+
+    With ``record_checkpoints``, the parser stores :attr:`checkpoints`: the
+    state of the stack before the first token of every logical line.
+    Completions use them to continue parsing at the line of the cursor (see
+    :meth:`Parser.resume`). Only the buffers of scripts need them.
     """
     def __init__(self, grammar, source, module_path=None, tokenizer=None,
-                 start_parsing=True):
+                 start_parsing=True, record_checkpoints=False):
         self.syntax_errors = []
+        # A list of `((line, column), stack)` tuples. The stack is a tuple
+        # of `(symbol number, dfa state)` tuples.
+        self.checkpoints = []
+        self._record_checkpoints = record_checkpoints
 
         self._omit_dedent_list = []
         self._indent_counter = 0
@@ -318,7 +396,10 @@ class ParserWithRecovery(Parser):
             self.module.global_names = self._global_names
 
     def parse(self, tokenizer):
-        return super(ParserWithRecovery, self).parse(self._tokenize(self._tokenize(tokenizer)))
+        tokenizer = self._tokenize(self._tokenize(tokenizer))
+        if self._record_checkpoints:
+            tokenizer = self._add_checkpoints(tokenizer)
+        return super(ParserWithRecovery, self).parse(tokenizer)
 
     def error_recovery(self, grammar, stack, arcs, typ, value, start_pos, prefix,
                        add_token_callback):
@@ -329,10 +410,16 @@ class ParserWithRecovery(Parser):
         """
         def current_suite(stack):
             # For now just discard everything that is not a suite or
-            # file_input, if we detect an error.
-            for index, (dfa, state, (type_, nodes)) in reversed(list(enumerate(stack))):
+            # file_input, if we detect an error. The stack is walked from the
+            # top, so the cost depends on the size of the broken statement,
+            # not on how deeply it's nested.
+            number2symbol = grammar.number2symbol
+            index = len(stack)
+            while index:
+                index -= 1
+                type_, nodes = stack[index][2]
                 # `suite` can sometimes be only simple_stmt, not stmt.
-                symbol = grammar.number2symbol[type_]
+                symbol = number2symbol[type_]
                 if symbol == 'file_input':
                     break
                 elif symbol == 'suite' and len(nodes) > 1:
@@ -405,5 +492,25 @@ class ParserWithRecovery(Parser):
 
             yield typ, value, start_pos, prefix
 
+    def _add_checkpoints(self, tokenizer):
+        checkpoints = self.checkpoints
+        last = None
+        new_line = True
+        for token in tokenizer:
+            typ = token[0]
+            if typ == NEWLINE:
+                new_line = True
+            elif new_line and typ not in (INDENT, DEDENT, ENDMARKER):
+                # The parser is done with the previous tokens, the stack
+                # doesn't contain the line yet.
+                new_line = False
+                stack = tuple((node[0], state) for dfa, state, node in self.stack)
+                if stack == last:
+                    # Most lines share the stack with the previous line.
+                    stack = last
+                checkpoints.append((token[2], stack))
+                last = stack
+            yield token
+
     def __repr__(self):
         return "<%s: %s>" % (type(self).__name__, self.module)
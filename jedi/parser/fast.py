@@ -4,6 +4,8 @@ anything changes, it only reparses the changed parts. But because it's not
 finished (and still not working as I want), I won't document it any further.
 """
 import re
+import threading
+from bisect import bisect_right
 from itertools import chain
 
 from jedi._compatibility import use_metaclass
@@ -23,6 +25,8 @@ class FastModule(tree.Module):
 
     def __init__(self, module_path):
         super(FastModule, self).__init__([])
+        self._used_names = MergedNamesDict([])
+        self._global_names = []
         self.modules = []
         self.reset_caches()
         self.names_dict = {}
@@ -30,19 +34,31 @@ class FastModule(tree.Module):
 
     def reset_caches(self):
         self.modules = []
+        # The parsers of the modules, in the same order.
+        self.parsers = []
+        # The merged names are updated with the names of the new modules once
+        # they are used.
+        self._names_changed = True
         try:
-            del self._used_names  # Remove the used names cache.
+            del self._position_index  # Positions change while reparsing.
         except AttributeError:
-            pass  # It was never used.
+            pass
+
+    def _update_names(self):
+        if self._names_changed:
+            self._used_names.update([m.used_names for m in self.modules])
+            self._global_names = [name for m in self.modules for name in m.global_names]
+            self._names_changed = False
 
     @property
-    @underscore_memoization
     def used_names(self):
-        return MergedNamesDict([m.used_names for m in self.modules])
+        self._update_names()
+        return self._used_names
 
     @property
     def global_names(self):
-        return [name for m in self.modules for name in m.global_names]
+        self._update_names()
+        return self._global_names
 
     @property
     def error_statements(self):
@@ -69,45 +85,124 @@ class FastModule(tree.Module):
 
 
 class MergedNamesDict(object):
+    """
+    The names dicts of the parts of a module, merged into one. Every name is
+    mapped to the dicts that contain it, therefore a lookup doesn't depend on
+    the number of parts. If the parts change, :meth:`update` only changes the
+    names of the parts that are not reused.
+    """
     def __init__(self, dicts):
         self.dicts = dicts
+        # The mapping is created on the first lookup.
+        self._index = None
+        self._order = None
+
+    def __getstate__(self):
+        # The order is based on object ids.
+        return (self.dicts,)
+
+    def __setstate__(self, state):
+        self.dicts, = state
+        self._index = None
+        self._order = None
+
+    def _get_index(self):
+        if self._index is None:
+            self._order = dict((id(dct), i) for i, dct in enumerate(self.dicts))
+            index = {}
+            for dct in self.dicts:
+                for key in dct:
+                    index.setdefault(key, []).append(dct)
+            self._index = index
+        return self._index
+
+    def _find(self, dicts, position):
+        """
+        Bisects the dicts of a name (sorted like ``self.dicts``) for the dict
+        at ``position`` in ``self.dicts``.
+        """
+        order = self._order
+        low, high = 0, len(dicts)
+        while low < high:
+            middle = (low + high) // 2
+            if order[id(dicts[middle])] < position:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def update(self, dicts):
+        """
+        Replaces the merged dicts with ``dicts``. The dicts at the beginning
+        and at the end that didn't change are not looked at.
+        """
+        old = self.dicts
+        self.dicts = dicts
+        index = self._index
+        if index is None:
+            return
+
+        start = 0
+        length = min(len(old), len(dicts))
+        while start < length and old[start] is dicts[start]:
+            start += 1
+        end = 0
+        while end < length - start and old[-1 - end] is dicts[-1 - end]:
+            end += 1
+
+        order = self._order
+        for dct in old[start:len(old) - end]:
+            position = order[id(dct)]
+            for key in dct:
+                lst = index[key]
+                del lst[self._find(lst, position)]
+                if not lst:
+                    del index[key]
+            del order[id(dct)]
+
+        for i in range(start, len(dicts)):
+            order[id(dicts[i])] = i
+        for i in range(start, len(dicts) - end):
+            dct = dicts[i]
+            for key in dct:
+                lst = index.setdefault(key, [])
+                lst.insert(self._find(lst, i), dct)
 
     def __iter__(self):
-        return iter(set(key for dct in self.dicts for key in dct))
+        return iter(self._get_index())
 
     def __getitem__(self, value):
-        return list(chain.from_iterable(dct.get(value, []) for dct in self.dicts))
+        dicts = self._get_index().get(value, ())
+        return list(chain.from_iterable(dct[value] for dct in dicts))
 
     def items(self):
-        dct = {}
-        for d in self.dicts:
-            for key, values in d.items():
-                try:
-                    dct_values = dct[key]
-                    dct_values += values
-                except KeyError:
-                    dct[key] = list(values)
-        return dct.items()
+        return [(key, self[key]) for key in self._get_index()]
 
     def values(self):
-        lst = []
-        for dct in self.dicts:
-            lst += dct.values()
-        return lst
+        return [self[key] for key in self._get_index()]
 
 
 class CachedFastParser(type):
     """ This is a metaclass for caching `FastParser`. """
-    def __call__(self, grammar, source, module_path=None):
+    def __call__(self, grammar, source, module_path=None,
+                 record_checkpoints=False, buffer=False):
         if not settings.fast_parser:
             return ParserWithRecovery(grammar, source, module_path)
 
         pi = parser_cache.get(module_path, None)
-        if pi is None or isinstance(pi.parser, ParserWithRecovery):
-            p = super(CachedFastParser, self).__call__(grammar, source, module_path)
+        # The parsers of imported modules and the ones of the buffers of
+        # scripts are never the same (see `ParserCacheItem.buffer`).
+        if pi is None or not isinstance(pi.parser, FastParser) \
+                or pi.buffer != buffer:
+            p = super(CachedFastParser, self).__call__(grammar, source, module_path,
+                                                       record_checkpoints)
         else:
             p = pi.parser  # pi is a `cache.ParserCacheItem`
-            p.update(source)
+            with p.lock:
+                # Parts that are reused keep the checkpoints they were parsed
+                # with.
+                p.record_checkpoints |= record_checkpoints
+                p.update(source)
         return p
 
 
@@ -116,6 +211,7 @@ class ParserNode(object):
         self._fast_module = fast_module
         self.parent = None
         self._node_children = []
+        self._names_dict = None
 
         self.source = source
         self.hash = hash(source)
@@ -195,7 +291,11 @@ class ParserNode(object):
             dcts = [n.parser.module.names_dict for n in self._node_children]
             # Need to insert the own node as well.
             dcts.insert(0, self._content_scope.names_dict)
-            self._content_scope.names_dict = MergedNamesDict(dcts)
+            if self._names_dict is None:
+                self._names_dict = MergedNamesDict(dcts)
+            else:
+                self._names_dict.update(dcts)
+            self._content_scope.names_dict = self._names_dict
             endmarker = self.parser.get_parsed_node().children[-1]
             assert endmarker.type == 'endmarker'
             last_parser = self._node_children[-1].parser
@@ -206,7 +306,12 @@ class ParserNode(object):
         if self.is_root_node():
             return 0
 
-        return self.parser.module.children[0].start_pos[1]
+        # The column doesn't depend on the line offset of the node.
+        try:
+            return self._column
+        except AttributeError:
+            self._column = self.parser.module.children[0].start_pos[1]
+            return self._column
 
     def add_node(self, node, start_line, indent):
         """
@@ -226,6 +331,7 @@ class ParserNode(object):
         m = node.parser.module
         node.parser.position_modifier.line = start_line - 1
         self._fast_module.modules.append(m)
+        self._fast_module.parsers.append(node.parser)
         node.parent = self
 
         self._node_children.append(node)
@@ -260,47 +366,131 @@ class FastParser(use_metaclass(CachedFastParser)):
                              % ('|'.join(_FLOWS_NEED_SPACE),
                                 '|'.join(_FLOWS_NEED_COLON)))
 
-    def __init__(self, grammar, source, module_path=None):
+    def __init__(self, grammar, source, module_path=None,
+                 record_checkpoints=False):
         # set values like `tree.Module`.
         self._grammar = grammar
         self.module_path = module_path
+        # Passed to the parsers of the parts, see `ParserWithRecovery`.
+        self.record_checkpoints = record_checkpoints
+        # The cached parser is shared by threads, updates hold the lock.
+        # Scripts hold it as well while they use the tree.
+        self.lock = threading.RLock()
         self._reset_caches()
         self.update(source)
 
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state['lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.RLock()
+
     def _reset_caches(self):
         self.module = FastModule(self.module_path)
         self.root_node = self.current_node = ParserNode(self.module, self, '')
+        # The lines, parts and checkpoints of the last split.
+        self._lines = []
+        self._parts = []
+        self._checkpoints = []
 
     def get_parsed_node(self):
         return self.module
 
     def update(self, source):
+        """
+        Updates the module with the new ``source``. Only the lines that
+        changed since the last update are split again and only the parts that
+        changed are parsed again.
+        """
         # Variables for testing purposes: It is important that the number of
         # parsers used can be minimized. With these variables we can test
         # against that.
-        self.number_parsers_used = 0
-        self.number_of_splits = 0
-        self.number_of_misses = 0
-        self.module.reset_caches()
-        self.source = source
-        try:
-            self._parse(source)
-        except:
-            # FastParser is cached, be careful with exceptions.
-            self._reset_caches()
-            raise
+        with self.lock:
+            self.number_parsers_used = 0
+            self.number_of_splits = 0
+            self.number_of_misses = 0
+            self.module.reset_caches()
+            self.source = source
+            try:
+                self._parse(source)
+            except:
+                # FastParser is cached, be careful with exceptions.
+                self._reset_caches()
+                raise
+
+    def apply_edit(self, start_pos, end_pos, text):
+        """
+        Replaces the code between ``start_pos`` and ``end_pos`` (``(line,
+        column)`` tuples like the positions of the tree) with ``text`` and
+        updates the module. This way editors can pass their edits instead of
+        the whole buffer. See :func:`edit_source` for positions that are out
+        of range.
+        """
+        with self.lock:
+            self.update(edit_source(self.source, start_pos, end_pos, text))
 
     def _split_parts(self, source):
         """
         Split the source code into different parts. This makes it possible to
         parse each part seperately and therefore cache parts of the file and
         not everything.
+
+        Only the lines that changed since the last call are split again. The
+        state of the splitter is stored after every line that starts a part.
+        Splitting resumes at the last of these checkpoints before the first
+        changed line and stops as soon as it reaches a checkpoint after the
+        changed lines with the same state as before, the following parts are
+        the old ones.
         """
-        def gen_part():
-            text = ''.join(current_lines)
-            del current_lines[:]
-            self.number_of_splits += 1
-            return text
+        # Split only new lines. Distinction between \r\n is the tokenizer's
+        # job.
+        # It seems like there's no problem with form feed characters here,
+        # because we're not counting lines.
+        lines = source.splitlines(True)
+        old_lines = self._lines
+        old_parts = self._parts
+        old_checkpoints = self._checkpoints
+
+        # The lines before `first` and after `new_end` (`old_end` in the old
+        # lines) didn't change.
+        first = 0
+        length = min(len(lines), len(old_lines))
+        while first < length and lines[first] == old_lines[first]:
+            first += 1
+        suffix = 0
+        while suffix < length - first and lines[-1 - suffix] == old_lines[-1 - suffix]:
+            suffix += 1
+        new_end = len(lines) - suffix
+        old_end = len(old_lines) - suffix
+        delta = new_end - old_end
+
+        # A checkpoint is (next line, number of parts, number of lines in the
+        # current part, state).
+        i = bisect_right(old_checkpoints, (first, float('inf'))) - 1
+        if i >= 0:
+            start, count, current, state = old_checkpoints[i]
+            parts = list(old_parts[:count])
+            checkpoints = old_checkpoints[:i + 1]
+            indent_list, new_indent, parentheses_level, flow_indent, \
+                is_decorator = state
+            indent_list = list(indent_list)
+            current_lines = [''.join(lines[start - current:start])]
+        else:
+            start = 0
+            parts = []
+            checkpoints = []
+            current_lines = []
+            is_decorator = False
+            # Use -1, because that indent is always smaller than any other.
+            indent_list = [-1, 0]
+            new_indent = False
+            parentheses_level = 0
+            flow_indent = None
+        old_starts = dict((c[0], j) for j, c in enumerate(old_checkpoints)
+                          if c[0] - c[2] >= old_end)
 
         def just_newlines(current_lines):
             for line in current_lines:
@@ -309,31 +499,23 @@ class FastParser(use_metaclass(CachedFastParser)):
                     return False
             return True
 
-        # Split only new lines. Distinction between \r\n is the tokenizer's
-        # job.
-        # It seems like there's no problem with form feed characters here,
-        # because we're not counting lines.
-        self._lines = source.splitlines(True)
-        current_lines = []
-        is_decorator = False
-        # Use -1, because that indent is always smaller than any other.
-        indent_list = [-1, 0]
-        new_indent = False
-        parentheses_level = 0
-        flow_indent = None
         previous_line = None
         # All things within flows are simply being ignored.
-        for i, l in enumerate(self._lines):
+        for i in range(start, len(lines)):
+            l = lines[i]
             # Handle backslash newline escaping.
             if l.endswith('\\\n') or l.endswith('\\\r\n'):
                 if previous_line is not None:
                     previous_line += l
                 else:
                     previous_line = l
+                    line_start = i
                 continue
             if previous_line is not None:
                 l = previous_line + l
                 previous_line = None
+            else:
+                line_start = i
 
             # check for dedents
             s = l.lstrip('\t \n\r')
@@ -348,13 +530,14 @@ class FastParser(use_metaclass(CachedFastParser)):
                     indent_list[-1] = indent
                 new_indent = False
 
+            split = False
             while indent < indent_list[-1]:  # -> dedent
                 indent_list.pop()
                 # This automatically resets the flow_indent if there was a
                 # dedent or a flow just on one line (with one simple_stmt).
                 new_indent = False
                 if flow_indent is None and current_lines and not parentheses_level:
-                    yield gen_part()
+                    split = True
                 flow_indent = None
 
             # Check lines for functions/classes and split the code there.
@@ -366,8 +549,9 @@ class FastParser(use_metaclass(CachedFastParser)):
                         if not parentheses_level:
                             flow_indent = indent
                     else:
-                        if not is_decorator and not just_newlines(current_lines):
-                            yield gen_part()
+                        if not split and not is_decorator \
+                                and not just_newlines(current_lines):
+                            split = True
                     is_decorator = '@' == m.group(1)
                     if not is_decorator:
                         parentheses_level = 0
@@ -381,12 +565,39 @@ class FastParser(use_metaclass(CachedFastParser)):
                 max(0, (l.count('(') + l.count('[') + l.count('{') -
                         l.count(')') - l.count(']') - l.count('}')))
 
+            if split:
+                parts.append(''.join(current_lines))
+                current_lines = []
             current_lines.append(l)
 
-        if previous_line is not None:
-            current_lines.append(previous_line)
-        if current_lines:
-            yield gen_part()
+            if split:
+                current = i + 1 - line_start
+                state = (tuple(indent_list), new_indent, parentheses_level,
+                         flow_indent, is_decorator)
+                checkpoints.append((i + 1, len(parts), current, state))
+                try:
+                    j = old_starts[i + 1 - delta]
+                except KeyError:
+                    continue
+                old = old_checkpoints[j]
+                if old[2] == current and old[3] == state:
+                    # Everything after this point is the same as before.
+                    offset = len(parts) - old[1]
+                    parts += old_parts[old[1]:]
+                    checkpoints += [(n + delta, c + offset, current, state)
+                                    for n, c, current, state in old_checkpoints[j + 1:]]
+                    break
+        else:
+            if previous_line is not None:
+                current_lines.append(previous_line)
+            if current_lines:
+                parts.append(''.join(current_lines))
+
+        self._lines = lines
+        self._parts = parts
+        self._checkpoints = checkpoints
+        self.number_of_splits = len(parts)
+        return parts
 
     def _parse(self, source):
         """ :type source: str """
@@ -413,7 +624,7 @@ class FastParser(use_metaclass(CachedFastParser)):
             # we know that the parser went further (`def` start in a
             # docstring). So just parse the next part.
             if code_part_end_line == last_end_line:
-                self._parse_part(code_part, source[start:], code_part_end_line, nodes)
+                self._parse_part(code_part, source, start, code_part_end_line, nodes)
             else:
                 self.number_of_misses += 1
                 # Means that some lines where not fully parsed. Parse it now.
@@ -426,7 +637,7 @@ class FastParser(use_metaclass(CachedFastParser)):
                     # complicated and error-prone. Since this is not very often
                     # called - just ignore it.
                     src = ''.join(self._lines[code_part_end_line - 1:])
-                    self._parse_part(code_part, src, code_part_end_line, nodes)
+                    self._parse_part(code_part, src, 0, code_part_end_line, nodes)
                     last_end_line = self.current_node.end_pos[0]
                 debug.dbg("While parsing %s, starting with line %s wasn't included in split.",
                           self.module_path, code_part_end_line)
@@ -454,21 +665,27 @@ class FastParser(use_metaclass(CachedFastParser)):
                   % (self.module_path, self.number_parsers_used,
                      self.number_of_splits))
 
-    def _parse_part(self, source, parser_code, code_part_end_line, nodes):
+    def _parse_part(self, source, parser_code, start, code_part_end_line, nodes):
         """
+        Parses ``parser_code`` from ``start`` on, unless the part ``source``
+        can be reused.
+
         Side effect: Alters the list of nodes.
         """
         h = hash(source)
         for index, node in enumerate(nodes):
             if node.hash == h and node.source == source:
                 node.reset_node()
-                nodes.remove(node)
+                del nodes[index]
                 parser_code = source
                 break
         else:
+            parser_code = parser_code[start:]
             tokenizer = FastTokenizer(parser_code)
             self.number_parsers_used += 1
-            p = ParserWithRecovery(self._grammar, parser_code, self.module_path, tokenizer=tokenizer)
+            p = ParserWithRecovery(self._grammar, parser_code, self.module_path,
+                                   tokenizer=tokenizer,
+                                   record_checkpoints=self.record_checkpoints)
 
             end = code_part_end_line - 1 + p.module.end_pos[0]
             used_lines = self._lines[code_part_end_line - 1:end - 1]
@@ -482,6 +699,38 @@ class FastParser(use_metaclass(CachedFastParser)):
         self.current_node = node
 
 
+def edit_source(source, start_pos, end_pos, text):
+    """
+    Returns ``source`` with the code between ``start_pos`` and ``end_pos``
+    (``(line, column)`` tuples, lines start at 1) replaced by ``text``. Like
+    in editors, positions after the end of a line are at the end of the line
+    and positions after the last line are at the end of the source.
+    """
+    start = _get_offset(source, start_pos)
+    end = _get_offset(source, end_pos)
+    if start > end:
+        raise ValueError('The edit ends at %s before its start %s.'
+                         % (end_pos, start_pos))
+    return source[:start] + text + source[end:]
+
+
+def _get_offset(source, position):
+    line, column = position
+    if line < 1 or column < 0:
+        raise ValueError('%s is not a valid position.' % (position,))
+    index = 0
+    for _ in range(line - 1):
+        index = source.find('\n', index) + 1
+        if not index:
+            return len(source)
+    line_end = source.find('\n', index)
+    if line_end == -1:
+        line_end = len(source)
+    elif source[index:line_end].endswith('\r'):
+        line_end -= 1
+    return min(index + column, line_end)
+
+
 class FastTokenizer(object):
     """
     Breaks when certain conditions are met, i.e. a new function or class opens.
@@ -14,6 +14,9 @@ See Parser/parser.c in the Python distribution for additional info on
 how this parsing engine works.
 """
 
+# Python imports
+import weakref
+
 # Local imports
 from jedi.parser import tokenize
 
@@ -49,6 +52,46 @@ def token_to_ilabel(grammar, type_, value):
         return None
 
 
+_transitions_cache = weakref.WeakKeyDictionary()
+
+
+def get_transitions(grammar):
+    """
+    Returns the DFAs of ``grammar`` compiled to dense transition tables.
+
+    The result maps every symbol number to a list with an entry per DFA state:
+    ``(table, accepting, accept_only)``. ``table`` is a dict mapping the label
+    of a token to ``(newstate, symbol, dfa)``: ``symbol`` is None if the token
+    is shifted, otherwise the symbol (and its DFA) is pushed. If several arcs
+    accept a label, the first one wins, like in the arcs of the DFA.
+    ``accepting`` says if the state has an arc to pop the symbol and
+    ``accept_only`` if that's the only arc.
+    """
+    try:
+        return _transitions_cache[grammar]
+    except KeyError:
+        pass
+
+    transitions = {}
+    for type_, (states, first) in grammar.dfas.items():
+        state_tables = []
+        for state, arcs in enumerate(states):
+            table = {}
+            for i, newstate in arcs:
+                t, v = grammar.labels[i]
+                if t >= 256:
+                    itsdfa = grammar.dfas[t]
+                    for ilabel in itsdfa[1]:
+                        table.setdefault(ilabel, (newstate, t, itsdfa))
+                elif i != 0:
+                    table.setdefault(i, (newstate, None, None))
+            accepting = (0, state) in arcs
+            state_tables.append((table, accepting, accepting and len(arcs) == 1))
+        transitions[type_] = state_tables
+    _transitions_cache[grammar] = transitions
+    return transitions
+
+
 class PgenParser(object):
     """Parser engine.
 
@@ -106,6 +149,9 @@ class PgenParser(object):
 
         """
         self.grammar = grammar
+        self._transitions = get_transitions(grammar)
+        self._keywords = grammar.keywords
+        self._tokens = grammar.tokens
         self.convert_node = convert_node
         self.convert_leaf = convert_leaf
 
@@ -132,51 +178,64 @@ class PgenParser(object):
 
     def addtoken(self, type_, value, start_pos, prefix):
         """Add a token; return True if this is the end of the program."""
-        ilabel = token_to_ilabel(self.grammar, type_, value)
+        # Equal to token_to_ilabel(self.grammar, type_, value)
+        ilabel = None
+        if type_ == tokenize.NAME:
+            ilabel = self._keywords.get(value)
+        if ilabel is None:
+            ilabel = self._tokens.get(type_)
+        transitions = self._transitions
+        stack = self.stack
 
         # Loop until the token is shifted; may raise exceptions
         while True:
-            dfa, state, node = self.stack[-1]
-            states, first = dfa
-            arcs = states[state]
-            # Look for a state with this label
-            for i, newstate in arcs:
-                t, v = self.grammar.labels[i]
-                if ilabel == i:
-                    # Look it up in the list of labels
-                    assert t < 256
-                    # Shift a token; we're done with it
-                    self.shift(type_, value, newstate, prefix, start_pos)
-                    # Pop while we are in an accept-only state
-                    state = newstate
-                    while states[state] == [(0, state)]:
-                        self.pop()
-                        if not self.stack:
-                            # Done parsing!
-                            return True
-                        dfa, state, node = self.stack[-1]
-                        states, first = dfa
-                    # Done with this token
-                    return False
-                elif t >= 256:
-                    # See if it's a symbol and if we're in its first set
-                    itsdfa = self.grammar.dfas[t]
-                    itsstates, itsfirst = itsdfa
-                    if ilabel in itsfirst:
-                        # Push a symbol
-                        self.push(t, itsdfa, newstate)
-                        break  # To continue the outer while loop
-            else:
-                if (0, state) in arcs:
+            dfa, state, node = stack[-1]
+            table, accepting, _ = transitions[node[0]][state]
+            try:
+                newstate, symbol, itsdfa = table[ilabel]
+            except KeyError:
+                if accepting:
                     # An accepting state, pop it and try something else
                     self.pop()
-                    if not self.stack:
+                    if not stack:
                         # Done parsing, but another token is input
                         raise InternalParseError("too much input", type_, value, start_pos)
                 else:
-                    self.error_recovery(self.grammar, self.stack, arcs, type_,
+                    self.error_recovery(self.grammar, stack, dfa[0][state], type_,
                                         value, start_pos, prefix, self.addtoken)
                     break
+            else:
+                if symbol is not None:
+                    # The token is in the first set of a symbol, push it.
+                    # Equal to self.push(symbol, itsdfa, newstate)
+                    stack[-1] = (dfa, newstate, node)
+                    stack.append((itsdfa, 0, (symbol, [])))
+                    continue
+
+                # Shift a token; we're done with it
+                # Equal to self.shift(type_, value, newstate, prefix, start_pos)
+                node[-1].append(self.convert_leaf(self.grammar, type_, value,
+                                                  prefix, start_pos))
+                stack[-1] = (dfa, newstate, node)
+                # Pop while we are in an accept-only state
+                state = newstate
+                while transitions[node[0]][state][2]:
+                    # Equal to self.pop(), but without a call for the common
+                    # case of a symbol with only one child.
+                    stack.pop()
+                    node_type, children = node
+                    if len(children) == 1:
+                        newnode = children[0]
+                    else:
+                        newnode = self.convert_node(self.grammar, node_type, children)
+                    if not stack:
+                        # Done parsing!
+                        self.rootnode = newnode
+                        return True
+                    dfa, state, node = stack[-1]
+                    node[1].append(newnode)
+                # Done with this token
+                return False
 
     def shift(self, type_, value, newstate, prefix, start_pos):
         """Shift a token.  (Internal)"""
@@ -0,0 +1,537 @@
+"""
+A compact representation of parser trees for the filesystem cache.
+
+Pickling the tree objects directly means that pickle has to create and
+restore every single leaf and node with all its attributes. Here the tree is
+stored as a few flat lists instead:
+
+- a table of the used classes (and ``Node`` types),
+- the type of every node and leaf in pre-order and the number of children of
+  every node,
+- the value, prefix and position of every leaf, where values and prefixes
+  are interned in a string table,
+- the names dicts of scopes and the module's ``used_names`` and
+  ``global_names``, which refer to leaves by their index,
+- the function bodies of a :class:`jedi.parser.skeleton.SkeletonParser` that
+  were not parsed yet. They are stored as the position of their lines in the
+  source and stay unparsed after loading them.
+
+The tree is rebuilt in a single pass by :func:`load`. Most of the time only a
+small part of an imported module is ever used, therefore the bodies of
+classes and functions are not built immediately. They are built once
+somebody accesses their children (or one of their names).
+"""
+from bisect import bisect_right
+
+from jedi._compatibility import intern_string
+from jedi.parser import load_grammar, tree
+from jedi.parser.skeleton import (BodyInfo, SkeletonBody, SkeletonNamesDict,
+                                  SkeletonScopeNames, build_lock,
+                                  grammar_version)
+from jedi.parser.tokenize import MAX_INTERNED_PREFIX
+
+version = 3
+"""
+Increment this number if the format changes.
+"""
+
+
+class CachedParser(object):
+    """
+    The parser that is returned if a tree is loaded from the compact format.
+    It only provides what is used of a cached parser: the module and the
+    source code.
+    """
+    def __init__(self, module, source):
+        self.module = module
+        self.source = source
+
+    def get_parsed_node(self):
+        return self.module
+
+
+def _is_lazy_body(node):
+    return node.type == 'suite' and isinstance(node.parent, tree.ClassOrFunc)
+
+
+def dump(parser):
+    """
+    Converts the module of a parser to flat lists that can be pickled.
+    Raises a ``ValueError`` if the tree cannot be represented.
+    """
+    module = parser.get_parsed_node()
+    strings = []
+    string_index = {}
+
+    def intern(string):
+        try:
+            return string_index[string]
+        except KeyError:
+            string_index[string] = index = len(strings)
+            strings.append(string)
+            return index
+
+    classes = []
+    class_index = {}
+    kinds = []
+    child_counts = []
+    leaves = []
+    error_types = []
+    leaf_index = {}
+    scopes = []
+    # Bodies of classes and functions that can be loaded lazily.
+    bodies = []
+    # Function bodies that are not parsed yet.
+    skeletons = []
+
+    stack = [module]
+    while stack:
+        element = stack.pop()
+        if isinstance(element, list):
+            # The end of a body, see below.
+            element += (len(kinds), len(child_counts), len(leaf_index),
+                        len(error_types), len(scopes))
+            continue
+
+        cls = type(element)
+        if element is module:
+            # A FastModule is just a normal module after loading it.
+            cls = tree.Module
+        elif cls is SkeletonBody:
+            cls = tree.Node
+        if getattr(tree, cls.__name__, None) is not cls:
+            raise ValueError('Cannot serialize %s' % cls)
+        key = cls.__name__, element.type if cls is tree.Node else None
+        try:
+            kind = class_index[key]
+        except KeyError:
+            class_index[key] = kind = len(classes)
+            classes.append(key)
+        kinds.append(kind)
+
+        if isinstance(element, tree.Leaf):
+            leaf_index[id(element)] = len(leaf_index)
+            line, column = element.start_pos
+            leaves += intern(element.value), intern(element.prefix), line, column
+            if cls is tree.ErrorLeaf:
+                error_types.append(element.original_type)
+        else:
+            if isinstance(element, SkeletonBody) and not element.is_built():
+                # Only the newline, indent and dedent are part of the tree.
+                info = element.info
+                skeletons.append((len(kinds) - 1, len(leaf_index),
+                                  info.start_line, info.end_line,
+                                  sorted(info.names), info.no_newline,
+                                  grammar_version(info.grammar)))
+                children = element.skeleton
+                child_counts.append(len(children))
+                stack += reversed(children)
+                continue
+            children = element.children
+            child_counts.append(len(children))
+            if isinstance(element, tree.Scope):
+                scopes.append(element)
+            if children and _is_lazy_body(element):
+                body = [len(kinds) - 1]
+                body += element.start_pos + element.end_pos
+                body += (len(kinds), len(child_counts), len(leaf_index),
+                         len(error_types), len(scopes))
+                bodies.append(body)
+                stack.append(body)
+            stack += reversed(children)
+
+    def dump_names(names_dict):
+        result = []
+        for string, names in names_dict.items():
+            result.append(intern(string))
+            result.append(len(names))
+            try:
+                result += [leaf_index[id(name)] for name in names]
+            except KeyError:
+                raise ValueError('A name is not part of the tree.')
+        return result
+
+    scope_names = []
+    for scope in scopes:
+        try:
+            names_dict = scope.names_dict
+        except AttributeError:
+            scope_names.append(None)
+        else:
+            if isinstance(names_dict, SkeletonScopeNames):
+                # Only the names of the header, the body is not parsed.
+                names_dict = names_dict.names_dict
+            scope_names.append(dump_names(names_dict))
+
+    used_names = module.used_names
+    if isinstance(used_names, SkeletonNamesDict):
+        # The names of the skeletons are restored from their names.
+        used_names = used_names.built_names()
+
+    try:
+        global_names = [leaf_index[id(name)] for name in module.global_names]
+    except KeyError:
+        raise ValueError('A global name is not part of the tree.')
+
+    return (version, module.path, parser.source, classes, kinds,
+            child_counts, leaves, error_types, strings, scope_names,
+            dump_names(used_names), global_names,
+            [tuple(body) for body in bodies], skeletons)
+
+
+def load(data, lazy=True):
+    """
+    Rebuilds a tree that was converted by :func:`dump` and returns a
+    :class:`CachedParser`. If ``lazy`` is true, the bodies of classes and
+    functions are only built when they are used.
+    """
+    if data[0] != version:
+        raise ValueError('Incompatible format version %s' % data[0])
+    return _Loader(data, lazy).load()
+
+
+class _Body(object):
+    """
+    The position of a class or function body in the flat lists.
+    """
+    def __init__(self, element, start_line, start_column, end_line,
+                 end_column, element_start, count_start, leaf_start,
+                 error_start, scope_start, element_end, count_end, leaf_end,
+                 error_end, scope_end):
+        self.element = element
+        self.start_pos = start_line, start_column
+        self.end_pos = end_line, end_column
+        self.starts = element_start, count_start, leaf_start, error_start, scope_start
+        self.ends = element_end, count_end, leaf_end, error_end, scope_end
+        self.leaf_start = leaf_start
+        self.leaf_end = leaf_end
+        self.node = None
+        # Nested bodies, sorted by their position.
+        self.bodies = []
+        self.leaf_starts = []
+
+
+class _Loader(object):
+    def __init__(self, data, lazy):
+        (_, self.path, self.source, classes, self.kinds, self.child_counts,
+         self.leaves, self.error_types, strings, self.scope_names,
+         self.used_names, self.global_names, bodies, skeletons) = data
+        # Share names and whitespace with all the other modules.
+        self.strings = [intern_string(s) if len(s) <= MAX_INTERNED_PREFIX else s
+                        for s in strings]
+
+        self.position_modifier = tree.PositionModifier()
+        self.types = []
+        for class_name, node_type in classes:
+            cls = getattr(tree, class_name)
+            self.types.append((cls, node_type, issubclass(cls, tree.Leaf),
+                               issubclass(cls, tree.Scope),
+                               issubclass(cls, tree.Function)))
+
+        self.leaf_list = [None] * (len(self.leaves) // 4)
+        self.scopes = [None] * len(self.scope_names)
+
+        # Build the hierarchy of the bodies, they are sorted in pre-order.
+        self.root_body = _Body(-1, 0, 0, 0, 0, *((0,) * 10))
+        self.bodies = {}
+        if lazy:
+            stack = [self.root_body]
+            for b in bodies:
+                body = _Body(*b)
+                while stack[-1] is not self.root_body \
+                        and stack[-1].leaf_end <= body.leaf_start:
+                    stack.pop()
+                stack[-1].bodies.append(body)
+                stack[-1].leaf_starts.append(body.leaf_start)
+                stack.append(body)
+                self.bodies[body.element] = body
+
+        self.skeletons = {}
+        self._lines = None
+        for skeleton in skeletons:
+            self.skeletons[skeleton[0]] = skeleton
+
+    def load(self):
+        root = self._build((0, 0, 0, 0, 0), (len(self.kinds),) + (None,) * 4)
+        root.path = self.path
+        used_names = LazyNamesDict(self, self.used_names)
+        if self.skeletons:
+            pending = {}
+            for skeleton in self.skeletons.values():
+                handle = _SkeletonHandle(self, skeleton[1])
+                for string in skeleton[4]:
+                    pending.setdefault(string, []).append(handle)
+            used_names = SkeletonNamesDict(used_names, pending)
+        root.used_names = used_names
+        root.global_names = [self.get_leaf(i) for i in self.global_names]
+        return CachedParser(root, self.source)
+
+    def _build(self, starts, ends, parent=None, count=0, leaf_list=None):
+        """
+        Builds the elements between ``starts`` and ``ends`` (indexes of the
+        flat lists) and adds them as ``count`` children to ``parent``. Returns
+        the root element. The leaves are stored by their index in
+        ``leaf_list``, the loader's list by default.
+        """
+        kinds = self.kinds
+        leaves = self.leaves
+        strings = self.strings
+        child_counts = self.child_counts
+        error_types = self.error_types
+        types = self.types
+        bodies = self.bodies
+        if leaf_list is None:
+            leaf_list = self.leaf_list
+        position_modifier = self.position_modifier
+
+        element_index, count_index, leaf_index, error_index, scope_index = starts
+        element_end = ends[0]
+        new_scopes = []
+        new_skeletons = []
+        # A stack of [node, number of missing children].
+        stack = [] if parent is None else [[parent, count]]
+        root = parent
+        while element_index < element_end:
+            cls, node_type, is_leaf, is_scope, is_function = types[kinds[element_index]]
+            if is_leaf:
+                element = cls.__new__(cls)
+                element.position_modifier = position_modifier
+                offset = leaf_index * 4
+                element.value = strings[leaves[offset]]
+                element.prefix = strings[leaves[offset + 1]]
+                element._start_pos = leaves[offset + 2], leaves[offset + 3]
+                if cls is tree.ErrorLeaf:
+                    element.original_type = error_types[error_index]
+                    error_index += 1
+                leaf_list[leaf_index] = element
+                leaf_index += 1
+                count = 0
+            else:
+                count = child_counts[count_index]
+                count_index += 1
+                try:
+                    body = bodies[element_index]
+                except KeyError:
+                    if element_index in self.skeletons:
+                        element = self._new_skeleton(element_index)
+                        new_skeletons.append(element)
+                    else:
+                        element = cls.__new__(cls)
+                    element.children = []
+                else:
+                    element = _LazyBody.__new__(_LazyBody)
+                    element._loader = self
+                    element._body = body
+                    body.node = element
+                    # Skip everything in the body, it's built later.
+                    element_index, count_index, leaf_index, error_index, \
+                        scope_index = body.ends
+                    element_index -= 1
+                    count = 0
+                if node_type is not None:
+                    element.type = node_type
+                if is_scope:
+                    new_scopes.append((scope_index, element))
+                    self.scopes[scope_index] = element
+                    scope_index += 1
+                    if is_function:
+                        element.listeners = set()
+
+            if stack:
+                last = stack[-1]
+                element.parent = last[0]
+                last[0].children.append(element)
+                last[1] -= 1
+                while stack and not stack[-1][1]:
+                    stack.pop()
+            else:
+                element.parent = None
+                root = element
+
+            if count:
+                stack.append([element, count])
+            element_index += 1
+
+        for body in new_skeletons:
+            # The leaves are not the children of a skeleton.
+            body.skeleton = tuple(body.children)
+            tree.BaseNode.children.__delete__(body)
+
+        for scope_index, scope in new_scopes:
+            names = self.scope_names[scope_index]
+            if names is not None:
+                scope.names_dict = LazyNamesDict(self, names).resolve(leaf_list)
+                if isinstance(scope.children[-1], SkeletonBody):
+                    scope.names_dict = SkeletonScopeNames(scope.children[-1],
+                                                          scope.names_dict)
+        return root
+
+    def _new_skeleton(self, element_index):
+        if self._lines is None:
+            self._lines = self.source.split('\n')
+        _, _, start_line, end_line, names, no_newline, grammar = \
+            self.skeletons[element_index]
+        body = SkeletonBody.__new__(SkeletonBody)
+        body.info = BodyInfo(load_grammar(grammar), self._lines, start_line,
+                             end_line, set(names))
+        body.info.no_newline = no_newline
+        return body
+
+    def build_body(self, body):
+        node = body.node
+        # Other threads use the body without locking as soon as it has
+        # children, therefore the children are built in a temporary node.
+        temp = tree.Node.__new__(tree.Node)
+        temp.children = []
+        # The number of children is the last one before the body.
+        count = self.child_counts[body.starts[1] - 1]
+        leaves = {}
+        self._build(body.starts, body.ends, temp, count, leaves)
+        for child in temp.children:
+            child.parent = node
+        tree.BaseNode.children.__set__(node, temp.children)
+        # `get_leaf` returns the leaves without locking, they are only
+        # published once they are part of the tree.
+        for index, leaf in leaves.items():
+            self.leaf_list[index] = leaf
+
+    def get_leaf(self, index):
+        """
+        Returns the leaf with ``index`` and builds its body if necessary.
+        """
+        leaf = self.leaf_list[index]
+        if leaf is not None:
+            return leaf
+
+        # The body of the leaf is not built yet, another thread might be
+        # building it.
+        with build_lock:
+            leaf = self.leaf_list[index]
+            body = self.root_body
+            while leaf is None:
+                # Search the nested body that contains the leaf. If it's
+                # already built, the leaf must be in one of its bodies.
+                body = body.bodies[bisect_right(body.leaf_starts, index) - 1]
+                body.node.children
+                leaf = self.leaf_list[index]
+            return leaf
+
+
+class _LazyBody(tree.Node):
+    """
+    The body (a ``suite``) of a class or function, that is not built yet.
+    """
+    __slots__ = ('_loader', '_body')
+
+    @property
+    def children(self):
+        try:
+            return tree.BaseNode.children.__get__(self)
+        except AttributeError:
+            with build_lock:
+                if not self._is_built():
+                    self._loader.build_body(self._body)
+            return tree.BaseNode.children.__get__(self)
+
+    @children.setter
+    def children(self, value):
+        tree.BaseNode.children.__set__(self, value)
+
+    def _is_built(self):
+        try:
+            tree.BaseNode.children.__get__(self)
+        except AttributeError:
+            return False
+        return True
+
+    @property
+    def start_pos(self):
+        if self._is_built():
+            return super(_LazyBody, self).start_pos
+        return self._body.start_pos
+
+    @property
+    def end_pos(self):
+        if self._is_built():
+            return super(_LazyBody, self).end_pos
+        return self._body.end_pos
+
+
+class _SkeletonHandle(object):
+    """
+    Refers to a skeleton body that may be in a body that is not built yet.
+    """
+    def __init__(self, loader, leaf_index):
+        self._loader = loader
+        self._leaf_index = leaf_index
+
+    def build(self):
+        # The first leaf of a skeleton is its newline.
+        self._loader.get_leaf(self._leaf_index).parent.build()
+
+
+class LazyNamesDict(object):
+    """
+    A names dict whose names are looked up in the flat lists on demand. This
+    way looking up a name doesn't build all the bodies that use other names.
+    """
+    def __init__(self, loader, flat):
+        self._loader = loader
+        self._indexes = {}
+        self._names = {}
+        strings = loader.strings
+        i = 0
+        while i < len(flat):
+            count = flat[i + 1]
+            self._indexes[strings[flat[i]]] = flat[i + 2:i + 2 + count]
+            i += 2 + count
+
+    def resolve(self, leaf_list=None):
+        """
+        Returns a normal dict if all the names are already built, i.e. are in
+        ``leaf_list`` (the loader's list by default).
+        """
+        if leaf_list is None:
+            leaf_list = self._loader.leaf_list
+        names_dict = {}
+        for string, indexes in self._indexes.items():
+            try:
+                names = [leaf_list[i] for i in indexes]
+            except KeyError:
+                return self
+            if None in names:
+                return self
+            names_dict[string] = names
+        return names_dict
+
+    def __getitem__(self, string):
+        try:
+            return self._names[string]
+        except KeyError:
+            indexes = self._indexes[string]
+            names = self._names[string] = [self._loader.get_leaf(i) for i in indexes]
+            return names
+
+    def get(self, string, default=None):
+        try:
+            return self[string]
+        except KeyError:
+            return default
+
+    def __contains__(self, string):
+        return string in self._indexes
+
+    def __iter__(self):
+        return iter(self._indexes)
+
+    def __len__(self):
+        return len(self._indexes)
+
+    def keys(self):
+        return list(self._indexes)
+
+    def values(self):
+        return [self[string] for string in self._indexes]
+
+    def items(self):
+        return [(string, self[string]) for string in self._indexes]
@@ -0,0 +1,458 @@
+"""
+A parser mode for modules that are only imported. The evaluator mostly needs
+the structure of those modules: classes, the headers of functions and
+assignments. The bodies of functions are rarely used (e.g. to infer return
+types), therefore :class:`SkeletonParser` tokenizes them, but doesn't build
+their trees. A body is parsed once somebody accesses its children (or the
+names of the function).
+
+The names in the skipped bodies are still known, :class:`SkeletonNamesDict`
+only parses the bodies that contain a name, if it's looked up in the
+``used_names`` of the module.
+
+The trees of imported modules are shared by all threads, therefore bodies are
+only built while holding :data:`build_lock`.
+"""
+import threading
+
+from jedi._compatibility import unicode
+from jedi.parser import ParserWithRecovery, load_grammar, tokenize
+from jedi.parser import tree
+from jedi.parser.token import (NAME, NEWLINE, INDENT, DEDENT, ENDMARKER,
+                               ERRORTOKEN)
+
+build_lock = threading.RLock()
+"""
+Held while a lazy body is built, also by :mod:`jedi.parser.serialize`.
+"""
+
+
+class _Placeholder(unicode):
+    """
+    Replaces a skipped body in the token stream (as a ``pass`` statement).
+    """
+
+
+class BodyInfo(object):
+    """
+    What is needed to parse a skipped body later: the lines of the module,
+    the lines of the body and the names that are used in it.
+    """
+    def __init__(self, grammar, lines, start_line, end_line, names):
+        self.grammar = grammar
+        # Shared by all the bodies of a module.
+        self.lines = lines
+        self.start_line = start_line
+        self.end_line = end_line
+        self.names = names
+        # True if the body was at the end of a module without a newline.
+        self.no_newline = False
+
+    def get_code(self):
+        code = '\n'.join(self.lines[self.start_line - 1:self.end_line])
+        if self.no_newline:
+            return code
+        return code + '\n'
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['grammar'] = grammar_version(self.grammar)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.grammar = load_grammar(self.grammar)
+
+
+def grammar_version(grammar):
+    """
+    Returns the version of a grammar that was loaded by ``load_grammar``.
+    """
+    from jedi.parser import _loaded_grammars
+    for path, g in _loaded_grammars.items():
+        if g is grammar:
+            # The file name is e.g. `grammar3.4.txt`.
+            return path.rsplit('grammar', 1)[1][:-len('.txt')]
+    raise ValueError('Unknown grammar')
+
+
+class SkeletonParser(ParserWithRecovery):
+    """
+    A :class:`jedi.parser.ParserWithRecovery` that doesn't build the bodies
+    of functions. They are replaced by :class:`SkeletonBody` nodes.
+    """
+    def __init__(self, grammar, source, module_path=None):
+        self._placeholders = []
+        self._error_count = 0
+        super(SkeletonParser, self).__init__(grammar, source, module_path)
+
+        pending = {}
+        for leaf in self._placeholders:
+            body = _replace_placeholder(leaf)
+            for name in body.info.names:
+                pending.setdefault(name, []).append(body)
+        self.module.used_names = SkeletonNamesDict(self._used_names, pending)
+        del self._placeholders
+
+    def parse(self, tokenizer):
+        return super(SkeletonParser, self).parse(self._skip_bodies(tokenizer))
+
+    def error_recovery(self, *args):
+        self._error_count += 1
+        return super(SkeletonParser, self).error_recovery(*args)
+
+    def convert_leaf(self, grammar, type, value, prefix, start_pos):
+        leaf = super(SkeletonParser, self).convert_leaf(grammar, type, value,
+                                                        prefix, start_pos)
+        if value.__class__ is _Placeholder:
+            self._placeholders.append(leaf)
+        return leaf
+
+    def _skip_bodies(self, tokens):
+        """
+        Passes the tokens through, but replaces the tokens of function bodies
+        with a placeholder statement. Bodies with a ``global`` statement or
+        errors are not skipped.
+        """
+        keywords = self._grammar.keywords
+        lines = None
+        tokens = iter(tokens)
+        for token in tokens:
+            yield token
+            if token[0] != NAME or token[1] != 'def':
+                continue
+
+            # Search the colon at the end of the header.
+            errors = self._error_count
+            level = 0
+            for token in tokens:
+                yield token
+                typ, value = token[:2]
+                if typ in (NEWLINE, INDENT, DEDENT, ENDMARKER):
+                    break
+                elif value in ('(', '[', '{'):
+                    level += 1
+                elif value in (')', ']', '}'):
+                    level -= 1
+                elif value == ':' and not level:
+                    break
+            if token[1] != ':':
+                continue
+            token = next(tokens, None)
+            if token is None:
+                return
+            yield token
+            if token[0] != NEWLINE:
+                continue  # The body is on the same line.
+            newline = token
+            token = next(tokens, None)
+            if token is None:
+                return
+            if token[0] != INDENT or errors != self._error_count:
+                yield token
+                continue
+            indent = token
+
+            # Skip the body up to the matching DEDENT.
+            skipped = []
+            names = set()
+            last_newline = None
+            level = 1
+            for token in tokens:
+                typ = token[0]
+                if typ == DEDENT:
+                    level -= 1
+                    if not level:
+                        break
+                    skipped.append(token)
+                    continue
+                # Only dedents may follow the last newline of a body.
+                last_newline = token if typ == NEWLINE else None
+                if typ == INDENT:
+                    level += 1
+                elif typ == NAME:
+                    value = token[1]
+                    if value not in keywords:
+                        names.add(value)
+                    elif value == 'global':
+                        break
+                elif typ in (ENDMARKER, ERRORTOKEN):
+                    break
+                skipped.append(token)
+
+            if token[0] != DEDENT or level or last_newline is None:
+                # Not a normal body, just parse it.
+                yield indent
+                for t in skipped:
+                    yield t
+                yield token
+                continue
+
+            if lines is None:
+                lines = self.source.split('\n')
+            placeholder = _Placeholder('pass')
+            placeholder.info = BodyInfo(self._grammar, lines, newline[2][0] + 1,
+                                        last_newline[2][0], names)
+
+            yield indent
+            yield tokenize.TokenInfo(NAME, placeholder, indent[2], '')
+            yield tokenize.TokenInfo(NEWLINE, last_newline[1], last_newline[2], '')
+            yield token
+
+
+def _replace_placeholder(leaf):
+    """
+    Replaces the suite of the function that contains the placeholder ``leaf``
+    with a :class:`SkeletonBody`.
+    """
+    info = leaf.value.info
+    stmt = leaf.parent
+    suite = stmt.parent
+    function = suite.parent
+    children = suite.children
+    assert isinstance(function, tree.Function) and len(children) == 4 \
+        and children[2] is stmt, 'Unexpected placeholder position'
+    # The newline of the placeholder is removed if the module doesn't end
+    # with a newline.
+    info.no_newline = stmt.children[1].value == ''
+
+    body = SkeletonBody.__new__(SkeletonBody)
+    body.type = 'suite'
+    body.parent = function
+    body.info = info
+    body.skeleton = children[0], children[1], children[3]
+    for child in body.skeleton:
+        child.parent = body
+    function.children[-1] = body
+    function.names_dict = SkeletonScopeNames(body, function.names_dict)
+    return body
+
+
+class SkeletonBody(tree.Node):
+    """
+    The body (a ``suite``) of a function, that is only parsed when its
+    children are used. ``skeleton`` contains the leaves of the suite that
+    are known without parsing it: the newline, the indent and the dedent.
+    """
+    __slots__ = ('info', 'skeleton')
+
+    @property
+    def children(self):
+        try:
+            return tree.BaseNode.children.__get__(self)
+        except AttributeError:
+            self.build()
+            return tree.BaseNode.children.__get__(self)
+
+    @children.setter
+    def children(self, value):
+        tree.BaseNode.children.__set__(self, value)
+
+    def __getstate__(self):
+        # Pickling the body shouldn't parse it.
+        state = {'type': self.type, 'parent': self.parent, 'info': self.info,
+                 'skeleton': self.skeleton}
+        if self.is_built():
+            state['children'] = self.children
+        return None, state
+
+    def is_built(self):
+        try:
+            tree.BaseNode.children.__get__(self)
+        except AttributeError:
+            return False
+        return True
+
+    @property
+    def start_pos(self):
+        return self.skeleton[0].start_pos
+
+    @property
+    def end_pos(self):
+        if self.is_built():
+            return super(SkeletonBody, self).end_pos
+        return self.skeleton[-1].end_pos
+
+    def build(self):
+        """
+        Parses the body, if it wasn't parsed yet.
+        """
+        if self.is_built():
+            return
+        with build_lock:
+            if not self.is_built():
+                self._build()
+
+    def _build(self):
+        info = self.info
+        newline, indent, dedent = self.skeleton
+        # The body is parsed as the body of a function with a name that is
+        # not used in it.
+        fake_name = '_'
+        while fake_name in info.names:
+            fake_name += '_'
+        code = 'def %s():\n' % fake_name + info.get_code()
+        p = ParserWithRecovery(info.grammar, code, start_parsing=False)
+        # The leaves are part of the module, they share its modifier.
+        p.position_modifier = newline.position_modifier
+        offset = info.start_line - 2
+        p.parse(tokenize.TokenInfo(typ, value, (line + offset, column), prefix)
+                for typ, value, (line, column), prefix
+                in tokenize.source_tokens(p.source, use_exact_op_types=True))
+        function = p.get_parsed_node().children[0]
+        suite = function.children[-1]
+
+        statements = suite.children[2:-1]
+        for stmt in statements:
+            stmt.parent = self
+        _move_dedents(statements[-1], dedent)
+
+        # Update the names of the function and the module.
+        names_dict = self.parent.names_dict
+        if isinstance(names_dict, SkeletonScopeNames):
+            names_dict = dict(names_dict.names_dict.items())
+        function_names = function.names_dict
+        del function_names[fake_name]
+        for string, names in function_names.items():
+            names_dict.setdefault(string, []).extend(names)
+        self.parent.names_dict = names_dict
+
+        used_names = p._used_names
+        del used_names[fake_name]
+        module = self.get_parent_until()
+        try:
+            module_names = module.used_names
+        except AttributeError:
+            pass
+        else:
+            if isinstance(module_names, SkeletonNamesDict):
+                module_names.add(used_names)
+        # Other threads use the body without locking as soon as it has
+        # children, therefore they are set when everything else is done.
+        self.children = [newline, indent] + statements + [dedent]
+
+
+def _move_dedents(node, dedent):
+    """
+    The dedents at the end of the nested blocks of a body are at the end of
+    the body code, but they belong to the position of the body's ``dedent``.
+    """
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        try:
+            stack += node.children
+        except AttributeError:
+            if not isinstance(node, tree.Dedent):
+                break
+            node._start_pos = dedent._start_pos
+
+
+class SkeletonScopeNames(object):
+    """
+    The names dict of a function with a :class:`SkeletonBody`. The body is
+    parsed as soon as the names are used.
+    """
+    def __init__(self, body, names_dict):
+        self.body = body
+        # The names of the header (params).
+        self.names_dict = names_dict
+
+    def _get(self):
+        self.body.build()
+        return self.body.parent.names_dict
+
+    def __getitem__(self, string):
+        return self._get()[string]
+
+    def get(self, string, default=None):
+        return self._get().get(string, default)
+
+    def setdefault(self, string, default=None):
+        return self._get().setdefault(string, default)
+
+    def __contains__(self, string):
+        return string in self._get()
+
+    def __iter__(self):
+        return iter(self._get())
+
+    def __len__(self):
+        return len(self._get())
+
+    def keys(self):
+        return self._get().keys()
+
+    def values(self):
+        return self._get().values()
+
+    def items(self):
+        return self._get().items()
+
+
+class SkeletonNamesDict(object):
+    """
+    The ``used_names`` of a module with skipped function bodies. ``pending``
+    maps the names to the bodies that use them (or to objects with a
+    ``build`` method that builds them). A lookup builds the bodies that use
+    the name.
+    """
+    def __init__(self, names, pending):
+        self._names = names
+        self._pending = pending
+        # The names of bodies that were built later.
+        self._added = {}
+
+    def add(self, names_dict):
+        for string, names in names_dict.items():
+            self._added.setdefault(string, []).extend(names)
+
+    def built_names(self):
+        """
+        Returns a dict with the names of all the bodies that are already
+        built, without building anything.
+        """
+        result = {}
+        for string in set(self._names) | set(self._added):
+            result[string] = self._get(string)
+        return result
+
+    def _get(self, string):
+        names = self._names.get(string)
+        added = self._added.get(string)
+        if added is None:
+            if names is None:
+                raise KeyError(string)
+            return names
+        return sorted((names or []) + added, key=lambda name: name.start_pos)
+
+    def __getitem__(self, string):
+        with build_lock:
+            for body in self._pending.pop(string, ()):
+                body.build()
+            return self._get(string)
+
+    def get(self, string, default=None):
+        try:
+            return self[string]
+        except KeyError:
+            return default
+
+    def __contains__(self, string):
+        return string in self._names or string in self._added \
+            or string in self._pending
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def keys(self):
+        return list(set(self._names) | set(self._added) | set(self._pending))
+
+    def values(self):
+        return [self[string] for string in self.keys()]
+
+    def items(self):
+        return [(string, self[string]) for string in self.keys()]
@@ -18,7 +18,8 @@ from io import StringIO
 
 from jedi.parser.token import (tok_name, N_TOKENS, ENDMARKER, STRING, NUMBER, opmap,
                                NAME, OP, ERRORTOKEN, NEWLINE, INDENT, DEDENT)
-from jedi._compatibility import is_py3
+from jedi._compatibility import is_py3, intern_string
+from jedi import settings
 
 
 cookie_re = re.compile("coding[:=]\s*([-\w.]+)")
@@ -97,13 +98,31 @@ pseudo_extras = group(r'\\\r?\n', comment, triple)
 pseudo_token = group(whitespace) + \
     group(pseudo_extras, number, funny, cont_str, name)
 
+# The same as `pseudo_token`, but with a named group for every kind of token,
+# so that the tokenizer doesn't have to look at the token again. Names are the
+# most common tokens, therefore they are tried first if they cannot be the
+# start of a number or a string. Otherwise the order of the alternatives is
+# the same (newlines can be matched earlier, because no other alternative
+# matches them).
+master_token = whitespace + '(?:' + '|'.join([
+    r'(?P<first_name>(?=[^\W\d])(?![bBuU]?[rR]?[\'"])%s)' % name,
+    r'(?P<continuation>\\\r?\n)',
+    '(?P<comment>%s)' % comment,
+    '(?P<triple>%s)' % triple,
+    '(?P<number>%s)' % number,
+    r'(?P<newline>\r?\n)',
+    r'(?P<op>%s|%s|\.\.\.|[:;.,@])' % (operator, bracket),
+    '(?P<string>%s)' % cont_str,
+    '(?P<name>%s)' % name,
+]) + ')'
+
 
 def _compile(expr):
     return re.compile(expr, re.UNICODE)
 
 
-pseudoprog, single3prog, double3prog = map(
-    _compile, (pseudo_token, single3, double3))
+pseudoprog, masterprog, single3prog, double3prog = map(
+    _compile, (pseudo_token, master_token, single3, double3))
 
 endprogs = {"'": _compile(single), '"': _compile(double),
             "'''": single3prog, '"""': double3prog,
@@ -169,8 +188,9 @@ class TokenInfo(namedtuple('Token', ['type', 'string', 'start_pos', 'prefix'])):
 
 def source_tokens(source, use_exact_op_types=False):
     """Generate tokens from a the source code (string)."""
-    source = source
     readline = StringIO(source).readline
+    if settings.fast_tokenizer:
+        return fast_generate_tokens(readline, use_exact_op_types)
     return generate_tokens(readline, use_exact_op_types)
 
 
@@ -221,13 +241,17 @@ def generate_tokens(readline, use_exact_op_types=False):
         while pos < max:
             pseudomatch = pseudoprog.match(line, pos)
             if not pseudomatch:                             # scan for tokens
-                txt = line[pos]
-                if line[pos] in '"\'':
+                # The whitespace in front of the error belongs to its prefix.
+                start = max - len(line[pos:].lstrip(' \f\t'))
+                prefix = additional_prefix + line[pos:start]
+                additional_prefix = ''
+                txt = line[start]
+                if txt in '"\'':
                     # If a literal starts but doesn't end the whole rest of the
                     # line is an error token.
-                    txt = line[pos:]
-                yield TokenInfo(ERRORTOKEN, txt, (lnum, pos), prefix)
-                pos += 1
+                    txt = line[start:].rstrip('\r\n')
+                yield TokenInfo(ERRORTOKEN, txt, (lnum, start), prefix)
+                pos = start + len(txt)
                 continue
 
             prefix = additional_prefix + pseudomatch.group(1)
@@ -303,7 +327,9 @@ def generate_tokens(readline, use_exact_op_types=False):
             else:
                 if token in '([{':
                     paren_level += 1
-                elif token in ')]}':
+                elif token in ')]}' and paren_level:
+                    # A closing bracket without an opening one is an error,
+                    # newlines after it still end statements.
                     paren_level -= 1
 
                 try:
@@ -318,7 +344,8 @@ def generate_tokens(readline, use_exact_op_types=False):
                     typ = OP
                 yield TokenInfo(typ, token, spos, prefix)
 
-    if new_line or additional_prefix[-1:] == '\n':
+    if new_line or additional_prefix[-1:] == '\n' or contstr[-1:] == '\n':
+        # An unterminated string at the end may contain the last newline.
         end_pos = lnum + 1, 0
     else:
         end_pos = lnum, max
@@ -327,3 +354,199 @@ def generate_tokens(readline, use_exact_op_types=False):
     for indent in indents[1:]:
         yield TokenInfo(DEDENT, '', end_pos, '')
     yield TokenInfo(ENDMARKER, '', end_pos, additional_prefix)
+
+
+# The dispatch tables of `fast_generate_tokens`.
+_CONTINUATION, _COMMENT, _TRIPLE, _NUMBER, _NEWLINE, _OP, _STRING, _NAME = range(8)
+_group_kinds = {
+    'first_name': _NAME,
+    'continuation': _CONTINUATION,
+    'comment': _COMMENT,
+    'triple': _TRIPLE,
+    'number': _NUMBER,
+    'newline': _NEWLINE,
+    'op': _OP,
+    'string': _STRING,
+    'name': _NAME,
+}
+# Maps the index of a group to the kind of the token (`lastindex` is cheaper
+# than `lastgroup`).
+_token_kinds = [None] * (masterprog.groups + 1)
+for _name, _index in masterprog.groupindex.items():
+    _token_kinds[_index] = _group_kinds[_name]
+del _name, _index
+# Characters that start a name, non-ASCII characters are checked with
+# `is_identifier`.
+_name_start = frozenset(string.ascii_letters + '_')
+_paren_change = {'(': 1, '[': 1, '{': 1, ')': -1, ']': -1, '}': -1}
+# Prefixes up to this length are interned, longer ones are usually comments.
+MAX_INTERNED_PREFIX = 40
+_always_break_tokens = frozenset(ALWAYS_BREAK_TOKENS)
+
+
+def fast_generate_tokens(readline, use_exact_op_types=False):
+    """
+    The same as :func:`generate_tokens`, just faster: There's only one regex
+    match per token and the kind of the token is known from the named group
+    that matched, instead of checking the token's characters again.
+    Everything else (e.g. the handling of errors) works exactly like in
+    :func:`generate_tokens`, tokens are always equal.
+
+    Names, operators and short prefixes are interned, because the same ones
+    occur over and over again in parse trees.
+    """
+    # Avoids the overhead of the `__new__` of namedtuples.
+    new_token = tuple.__new__
+    match = masterprog.match
+    intern = intern_string
+    token_kinds = _token_kinds
+    name_start = _name_start
+    paren_change = _paren_change
+    always_break_tokens = _always_break_tokens
+
+    paren_level = 0
+    indents = [0]
+    lnum = 0
+    max = 0
+    contstr = ''
+    contline = None
+    new_line = True
+    prefix = ''
+    additional_prefix = ''
+    while True:
+        line = readline()
+        if not line:
+            if contstr:
+                yield new_token(TokenInfo, (ERRORTOKEN, contstr, contstr_start, prefix))
+            break
+
+        lnum += 1
+        pos, max = 0, len(line)
+
+        if contstr:
+            endmatch = endprog.match(line)
+            if endmatch:
+                pos = endmatch.end(0)
+                yield new_token(TokenInfo, (STRING, contstr + line[:pos],
+                                            contstr_start, prefix))
+                contstr = ''
+                contline = None
+            else:
+                contstr = contstr + line
+                contline = contline + line
+                continue
+
+        while pos < max:
+            pseudomatch = match(line, pos)
+            if not pseudomatch:
+                start = max - len(line[pos:].lstrip(' \f\t'))
+                prefix = additional_prefix + line[pos:start]
+                additional_prefix = ''
+                txt = line[start]
+                if txt in '"\'':
+                    txt = line[start:].rstrip('\r\n')
+                yield new_token(TokenInfo, (ERRORTOKEN, txt, (lnum, start), prefix))
+                pos = start + len(txt)
+                continue
+
+            index = pseudomatch.lastindex
+            kind = token_kinds[index]
+            start, end = pseudomatch.span(index)
+            prefix = additional_prefix + line[pos:start]
+            if 1 < len(prefix) <= MAX_INTERNED_PREFIX:
+                prefix = intern(prefix)
+            additional_prefix = ''
+            pos = end
+            spos = (lnum, start)
+            token = line[start:pos]
+
+            if new_line and kind != _NEWLINE and kind != _COMMENT:
+                new_line = False
+                if paren_level == 0:
+                    i = 0
+                    while line[i] == '\f':
+                        i += 1
+                        start -= 1
+                    if start > indents[-1]:
+                        yield new_token(TokenInfo, (INDENT, '', spos, ''))
+                        indents.append(start)
+                    while start < indents[-1]:
+                        yield new_token(TokenInfo, (DEDENT, '', spos, ''))
+                        indents.pop()
+
+            if kind == _NAME:
+                initial = token[0]
+                if initial in name_start or is_identifier(initial):
+                    if token in always_break_tokens:
+                        paren_level = 0
+                        while True:
+                            indent = indents.pop()
+                            if indent > start:
+                                yield new_token(TokenInfo, (DEDENT, '', spos, ''))
+                            else:
+                                indents.append(indent)
+                                break
+                    yield new_token(TokenInfo, (NAME, intern(token), spos, prefix))
+                    continue
+                # E.g. a unicode digit, it's handled like an operator below.
+                kind = _OP
+            elif kind == _NEWLINE:
+                if not new_line and paren_level == 0:
+                    yield new_token(TokenInfo, (NEWLINE, token, spos, prefix))
+                else:
+                    additional_prefix = prefix + token
+                new_line = True
+                continue
+            elif kind == _NUMBER:
+                yield new_token(TokenInfo, (NUMBER, token, spos, prefix))
+                continue
+            elif kind == _COMMENT:
+                additional_prefix = prefix + token
+                continue
+            elif kind == _STRING:
+                if token[-1] == '\n':
+                    contstr_start = lnum, start
+                    endprog = (endprogs.get(token[0]) or endprogs.get(token[1])
+                               or endprogs.get(token[2]))
+                    contstr = line[start:]
+                    contline = line
+                    break
+                yield new_token(TokenInfo, (STRING, token, spos, prefix))
+                continue
+            elif kind == _TRIPLE:
+                endprog = endprogs[token]
+                endmatch = endprog.match(line, pos)
+                if endmatch:
+                    pos = endmatch.end(0)
+                    yield new_token(TokenInfo, (STRING, line[start:pos], spos, prefix))
+                    continue
+                contstr_start = (lnum, start)
+                contstr = line[start:]
+                contline = line
+                break
+            elif kind == _CONTINUATION:
+                if line[start:] in ('\\\n', '\\\r\n'):
+                    additional_prefix += prefix + line[start:]
+                    break
+                kind = _OP
+
+            # Operators and everything else.
+            if token in paren_change and (paren_level or token in '([{'):
+                paren_level += paren_change[token]
+            try:
+                exact_type = opmap[token]
+            except KeyError:
+                exact_type = ERRORTOKEN
+            if use_exact_op_types:
+                typ = exact_type
+            else:
+                typ = OP
+            yield new_token(TokenInfo, (typ, intern(token), spos, prefix))
+
+    if new_line or additional_prefix[-1:] == '\n' or contstr[-1:] == '\n':
+        end_pos = lnum + 1, 0
+    else:
+        end_pos = lnum, max
+    for indent in indents[1:]:
+        yield new_token(TokenInfo, (DEDENT, '', end_pos, ''))
+    yield new_token(TokenInfo, (ENDMARKER, '', end_pos, additional_prefix))
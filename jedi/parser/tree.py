@@ -34,6 +34,7 @@ anaylsis documentation.
 """
 import os
 import re
+from bisect import bisect_left
 from inspect import cleandoc
 from itertools import chain
 import textwrap
@@ -55,7 +56,16 @@ def is_node(node, *symbol_names):
 
 
 class PositionModifier(object):
-    """A start_pos modifier for the fast parser."""
+    """
+    A start_pos modifier for the fast parser.
+
+    Leaves store their positions relative to the part of the module they were
+    parsed in. All the leaves of a part share a modifier, which contains the
+    line offset of the part. Moving a reused part is therefore just a matter
+    of changing ``line``.
+    """
+    __slots__ = ('line',)
+
     def __init__(self):
         self.line = 0
 
@@ -206,13 +216,12 @@ class Base(object):
         The node immediately following the invocant in their parent's children
         list. If the invocant does not have a next sibling, it is None
         """
-        # Can't use index(); we need to test by identity
-        for i, child in enumerate(self.parent.children):
-            if child is self:
-                try:
-                    return self.parent.children[i + 1]
-                except IndexError:
-                    return None
+        children = self.parent.children
+        try:
+            return children[_child_index(self.parent, self) + 1]
+        except (ValueError, IndexError):
+            # The invocant might not be in the children of its parent anymore.
+            return None
 
     def get_previous_sibling(self):
         """
@@ -220,12 +229,13 @@ class Base(object):
         children list. If the invocant does not have a previous sibling, it is
         None.
         """
-        # Can't use index(); we need to test by identity
-        for i, child in enumerate(self.parent.children):
-            if child is self:
-                if i == 0:
-                    return None
-                return self.parent.children[i - 1]
+        try:
+            i = _child_index(self.parent, self)
+        except ValueError:
+            return None
+        if i == 0:
+            return None
+        return self.parent.children[i - 1]
 
     def get_previous_leaf(self):
         """
@@ -234,14 +244,14 @@ class Base(object):
         """
         node = self
         while True:
-            c = node.parent.children
-            i = c.index(node)
+            parent = node.parent
+            i = _child_index(parent, node)
             if i == 0:
-                node = node.parent
+                node = parent
                 if node.parent is None:
                     raise IndexError('Cannot access the previous element of the first one.')
             else:
-                node = c[i - 1]
+                node = parent.children[i - 1]
                 break
 
         while True:
@@ -252,15 +262,16 @@ class Base(object):
 
     def get_next_leaf(self):
         """
-        Returns the previous leaf in the parser tree.
+        Returns the next leaf in the parser tree.
         Raises an IndexError if it's the last element.
         """
         node = self
         while True:
-            c = node.parent.children
-            i = c.index(node)
+            parent = node.parent
+            c = parent.children
+            i = _child_index(parent, node)
             if i == len(c) - 1:
-                node = node.parent
+                node = parent
                 if node.parent is None:
                     raise IndexError('Cannot access the next element of the last one.')
             else:
@@ -286,7 +297,8 @@ class Leaf(Base):
 
     @property
     def start_pos(self):
-        return self._start_pos[0] + self.position_modifier.line, self._start_pos[1]
+        line, column = self._start_pos
+        return line + self.position_modifier.line, column
 
     @start_pos.setter
     def start_pos(self, value):
@@ -304,8 +316,8 @@ class Leaf(Base):
 
     @property
     def end_pos(self):
-        return (self._start_pos[0] + self.position_modifier.line,
-                self._start_pos[1] + len(self.value))
+        line, column = self._start_pos
+        return line + self.position_modifier.line, column + len(self.value)
 
     def move(self, line_offset, column_offset):
         self._start_pos = (self._start_pos[0] + line_offset,
@@ -339,15 +351,15 @@ class LeafWithNewLines(Leaf):
         Literals and whitespace end_pos are more complicated than normal
         end_pos, because the containing newlines may change the indexes.
         """
-        end_pos_line, end_pos_col = self.start_pos
-        lines = self.value.split('\n')
-        end_pos_line += len(lines) - 1
-        # Check for multiline token
-        if self.start_pos[0] == end_pos_line:
-            end_pos_col += len(lines[-1])
+        line, column = self._start_pos
+        value = self.value
+        newlines = value.count('\n')
+        if newlines:
+            # Multiline token, the column starts again after the newline.
+            column = len(value) - value.rindex('\n') - 1
         else:
-            end_pos_col = len(lines[-1])
-        return end_pos_line, end_pos_col
+            column += len(value)
+        return line + self.position_modifier.line + newlines, column
 
     @utf8_repr
     def __repr__(self):
@@ -487,7 +499,9 @@ class BaseNode(Base):
     The super class for Scope, Import, Name and Statement. Every object in
     the parser tree inherits from this class.
     """
-    __slots__ = ('children', 'parent')
+    # `_child_indexes` is only set for nodes with many children, see
+    # `_child_index`.
+    __slots__ = ('children', 'parent', '_child_indexes')
     type = None
 
     def __init__(self, children):
@@ -529,47 +543,53 @@ class BaseNode(Base):
 
     @Python3Method
     def name_for_position(self, position):
-        for c in self.children:
-            if isinstance(c, Leaf):
-                if isinstance(c, Name) and c.start_pos <= position <= c.end_pos:
-                    return c
-            else:
-                result = c.name_for_position(position)
-                if result is not None:
-                    return result
-        return None
+        return _name_for_position(self, position, _get_position_index(self))
 
     def get_leaf_for_position(self, position, include_prefixes=False):
-        for c in self.children:
+        index = _get_position_index(self)
+        node = self
+        while True:
+            # Children that end before the position cannot contain it and if
+            # the next one starts after it, no child contains it.
+            children = node.children
+            i = index.first_child_ending_at(node, position)
+            if i == len(children):
+                return None
+            c = children[i]
             if include_prefixes:
                 start_pos = c.get_start_pos_of_prefix()
             else:
                 start_pos = c.start_pos
+            if start_pos > position:
+                return None
 
-            if start_pos <= position <= c.end_pos:
-                try:
-                    return c.get_leaf_for_position(position, include_prefixes)
-                except AttributeError:
-                    while c.type in ('indent', 'dedent'):
-                        # We'd rather not have indents and dedents as a leaf,
-                        # because they don't contain indentation information.
-                        c = c.get_next_leaf()
-                    return c
-
-        return None
+            try:
+                c.children
+            except AttributeError:
+                while c.type in ('indent', 'dedent'):
+                    # We'd rather not have indents and dedents as a leaf,
+                    # because they don't contain indentation information.
+                    c = c.get_next_leaf()
+                return c
+            node = c
 
     @Python3Method
     def get_statement_for_position(self, pos):
-        for c in self.children:
-            if c.start_pos <= pos <= c.end_pos:
-                if c.type not in ('decorated', 'simple_stmt', 'suite') \
-                        and not isinstance(c, (Flow, ClassOrFunc)):
-                    return c
-                else:
-                    try:
-                        return c.get_statement_for_position(pos)
-                    except AttributeError:
-                        pass  # Must be a non-scope
+        index = _get_position_index(self)
+        children = self.children
+        for c in children[index.first_child_ending_at(self, pos):]:
+            if c.start_pos > pos:
+                break
+            if c.end_pos < pos:
+                continue  # Only possible in broken code.
+            if c.type not in ('decorated', 'simple_stmt', 'suite') \
+                    and not isinstance(c, (Flow, ClassOrFunc)):
+                return c
+            else:
+                try:
+                    return c.get_statement_for_position(pos)
+                except AttributeError:
+                    pass  # Must be a non-scope
         return None
 
     def first_leaf(self):
@@ -578,18 +598,6 @@ class BaseNode(Base):
         except AttributeError:
             return self.children[0]
 
-    def get_next_leaf(self):
-        """
-        Raises an IndexError if it's the last node. (Would be the module)
-        """
-        c = self.parent.children
-        index = c.index(self)
-        if index == len(c) - 1:
-            # TODO WTF? recursion?
-            return self.get_next_leaf()
-        else:
-            return c[index + 1]
-
     def last_leaf(self):
         try:
             return self.children[-1].last_leaf()
@@ -632,6 +640,104 @@ class BaseNode(Base):
             (type(self).__name__, code, self.start_pos[0], self.start_pos[1])
 
 
+class PositionIndex(object):
+    """
+    Finds the child of a node for a position with bisect. The end positions
+    of the children are stored when a large node is queried for the first
+    time. Every module has an index, it's reset when the module changes (see
+    :meth:`jedi.parser.fast.FastModule.reset_caches`).
+    """
+    min_children = 20
+    """
+    Nodes with fewer children are just scanned.
+    """
+
+    def __init__(self):
+        self._ends = {}
+
+    def first_child_ending_at(self, node, position):
+        """
+        Returns the index of the first child of ``node`` that ends at or after
+        ``position`` (or the number of children if there's none).
+        """
+        children = node.children
+        if len(children) >= self.min_children:
+            try:
+                cached_children, length, ends = self._ends[id(node)]
+                # The children might have been changed in the meantime.
+                if cached_children is not children or length != len(children):
+                    raise KeyError
+            except KeyError:
+                ends = [c.end_pos for c in children]
+                if any(a > b for a, b in zip(ends, ends[1:])):
+                    # Not sorted, e.g. because of error recovery.
+                    ends = None
+                self._ends[id(node)] = children, len(children), ends
+            if ends is not None:
+                return bisect_left(ends, position)
+
+        for i, c in enumerate(children):
+            if c.end_pos >= position:
+                return i
+        return len(children)
+
+
+def _child_index(node, child):
+    """
+    Returns the index of ``child`` in the children of ``node``. Raises a
+    ``ValueError`` if it's not a child of ``node``.
+
+    Large nodes keep the indexes of their children, this way navigating
+    between siblings and leaves doesn't depend on the size of the parent or
+    the depth of the tree. The children might change, therefore the indexes
+    are verified.
+    """
+    children = node.children
+    if len(children) >= PositionIndex.min_children:
+        try:
+            i = node._child_indexes[id(child)]
+            if children[i] is child:
+                return i
+        except (AttributeError, KeyError, IndexError):
+            pass
+        indexes = dict((id(c), i) for i, c in enumerate(children))
+        node._child_indexes = indexes
+        try:
+            return indexes[id(child)]
+        except KeyError:
+            pass
+    else:
+        # Can't use index(); we need to test by identity
+        for i, c in enumerate(children):
+            if c is child:
+                return i
+    raise ValueError('%s is not a child of %s' % (child, node))
+
+
+def _get_position_index(node):
+    root = node
+    while root.parent is not None:
+        root = root.parent
+    if isinstance(root, Module):
+        return root.position_index
+    return PositionIndex()
+
+
+def _name_for_position(node, position, index):
+    children = node.children
+    for c in children[index.first_child_ending_at(node, position):]:
+        if c.start_pos > position:
+            break
+        if isinstance(c, Leaf):
+            if isinstance(c, Name) and position <= c.end_pos:
+                return c
+        else:
+            result = _name_for_position(c, position, index)
+            if result is not None:
+                return result
+    return None
+
+
 class Node(BaseNode):
     """Concrete implementation for interior nodes."""
     __slots__ = ('type',)
@@ -794,7 +900,7 @@ class Module(Scope):
     Depending on the underlying parser this may be a full module or just a part
     of a module.
     """
-    __slots__ = ('path', 'global_names', 'used_names', '_name')
+    __slots__ = ('path', 'global_names', 'used_names', '_name', '_position_index')
     type = 'file_input'
 
     def __init__(self, children):
@@ -826,6 +932,14 @@ class Module(Scope):
         name.parent = self
         return name
 
+    @property
+    @underscore_memoization
+    def position_index(self):
+        """
+        The :class:`PositionIndex` of this module.
+        """
+        return PositionIndex()
+
     @property
     def has_explicit_absolute_import(self):
         """
@@ -1,12 +1,18 @@
 import inspect
 import time
+import re
 import os
 import sys
-import json
 import hashlib
 import gc
 import shutil
 import pickle
+import tempfile
+import threading
+import weakref
+import sqlite3
+import mmap
+import struct
 
 from jedi import settings
 from jedi import debug
@@ -46,48 +52,309 @@ def underscore_memoization(func):
     return wrapper
 
 
+class ParserCache(object):
+    """
+    A dict-like LRU cache mapping module paths to ``ParserCacheItem``.
+
+    The cache is bounded by :data:`jedi.settings.parser_cache_max_entries`
+    and :data:`jedi.settings.parser_cache_max_bytes`. Least recently used
+    entries are evicted first, entries that are pinned by a living owner
+    (typically an ``Evaluator``) are never evicted.
+
+    The cache is shared by all threads, all its methods are atomic.
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._items = {}
+        # The estimated sizes of the items when they were added and the total.
+        self._sizes = {}
+        self._bytes = 0
+        # The order of use is a circular doubly linked list of `[previous,
+        # next, path]` links, from the least to the most recently used path.
+        # (`collections.OrderedDict` doesn't exist in Python 2.6.)
+        self._root = root = []
+        root[:] = [root, root, None]
+        self._links = {}
+        self._pins = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __getitem__(self, path):
+        with self._lock:
+            try:
+                item = self._items[path]
+            except KeyError:
+                self.misses += 1
+                raise
+            self.hits += 1
+            self._touch(path)
+            return item
+
+    def get(self, path, default=None):
+        try:
+            return self[path]
+        except KeyError:
+            return default
+
+    def peek(self, path, default=None):
+        """
+        Like :meth:`get`, but neither counted in the stats nor used for the
+        order of eviction. For checks that don't use the module.
+        """
+        return self._items.get(path, default)
+
+    def __setitem__(self, path, item):
+        with self._lock:
+            size = _estimate_size(item)
+            self._bytes += size - self._sizes.get(path, 0)
+            self._sizes[path] = size
+            self._items[path] = item
+            self._touch(path)
+            self._evict()
+
+    def __delitem__(self, path):
+        with self._lock:
+            del self._items[path]
+            self._bytes -= self._sizes.pop(path)
+            previous, following, _ = self._links.pop(path)
+            previous[1] = following
+            following[0] = previous
+            self._pins.pop(path, None)
+
+    def __contains__(self, path):
+        return path in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def keys(self):
+        with self._lock:
+            return list(self._items.keys())
+
+    def values(self):
+        with self._lock:
+            return list(self._items.values())
+
+    def items(self):
+        with self._lock:
+            return list(self._items.items())
+
+    def pop(self, path, *default):
+        with self._lock:
+            try:
+                item = self._items[path]
+            except KeyError:
+                if default:
+                    return default[0]
+                raise
+            del self[path]
+            return item
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._sizes.clear()
+            self._bytes = 0
+            self._root[:] = [self._root, self._root, None]
+            self._links.clear()
+            self._pins.clear()
+
+    def pin(self, path, owner):
+        """
+        Protect the entry of ``path`` from eviction as long as ``owner`` is
+        alive. Only a weak reference to the owner is kept.
+        """
+        with self._lock:
+            if path in self._items:
+                refs = self._pins.setdefault(path, [])
+                if not any(ref() is owner for ref in refs):
+                    refs.append(weakref.ref(owner))
+
+    def is_pinned(self, path):
+        with self._lock:
+            try:
+                refs = self._pins[path]
+            except KeyError:
+                return False
+            refs[:] = [ref for ref in refs if ref() is not None]
+            if not refs:
+                del self._pins[path]
+                return False
+            return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._items),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def _touch(self, path):
+        """
+        Moves ``path`` to the end of the order of use.
+        """
+        root = self._root
+        try:
+            link = self._links[path]
+        except KeyError:
+            link = self._links[path] = [None, None, path]
+        else:
+            previous, following, _ = link
+            previous[1] = following
+            following[0] = previous
+        last = root[0]
+        link[0] = last
+        link[1] = root
+        last[1] = root[0] = link
+
+    def _is_full(self):
+        max_entries = settings.parser_cache_max_entries
+        max_bytes = settings.parser_cache_max_bytes
+        return max_entries is not None and len(self._items) > max_entries \
+            or max_bytes is not None and self._bytes > max_bytes
+
+    def _evict(self):
+        root = self._root
+        link = root[1]
+        # The most recently added item is never evicted.
+        while self._is_full() and link[1] is not root:
+            path = link[2]
+            link = link[1]
+            if self.is_pinned(path):
+                continue
+            del self[path]
+            self.evictions += 1
+            debug.dbg('parser cache evicted: %s', path)
+
+
+def _estimate_size(parser_cache_item):
+    """
+    A very rough estimate of the memory a parser uses. Parse trees take about
+    a hundred times more memory than their source code.
+    """
+    source = getattr(parser_cache_item.parser, 'source', None)
+    try:
+        return len(source) * 100
+    except TypeError:
+        return 0
+
+
 # for fast_parser, should not be deleted
-parser_cache = {}
+parser_cache = ParserCache()
 
 
 class ParserCacheItem(object):
-    def __init__(self, parser, change_time=None):
+    # The parsers of the buffers of scripts are updated in place by the
+    # threads that use them, imports don't use them.
+    buffer = False
+
+    def __init__(self, parser, change_time=None, size=None, digest=None,
+                 buffer=False):
         self.parser = parser
         if change_time is None:
             change_time = time.time()
         self.change_time = change_time
+        # Only used by `settings.cache_content_validation`.
+        self.size = size
+        self.digest = digest
+        self.buffer = buffer
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        if settings.compact_filesystem_cache:
+            from jedi.parser import serialize
+            try:
+                state['tree'] = serialize.dump(self.parser)
+            except (ValueError, AttributeError):
+                pass  # Not a parser tree, just pickle it.
+            else:
+                del state['parser']
+        return state
+
+    def __setstate__(self, state):
+        try:
+            data = state.pop('tree')
+        except KeyError:
+            pass
+        else:
+            from jedi.parser import serialize
+            state['parser'] = serialize.load(data)
+        self.__dict__.update(state)
 
 
-def load_parser(path):
+def load_parser(path, buffer=False):
     """
-    Returns the module or None, if it fails.
+    Returns the module or None, if it fails. The parser of the buffer of a
+    script is only returned with ``buffer``, it might be updated by another
+    thread at any time. Imports load the file instead.
     """
     p_time = os.path.getmtime(path) if path else None
-    try:
-        parser_cache_item = parser_cache[path]
-        if not path or p_time <= parser_cache_item.change_time:
+    parser_cache_item = parser_cache.get(path)
+    if parser_cache_item is not None \
+            and (buffer or not parser_cache_item.buffer):
+        if not path or _is_up_to_date(path, p_time, parser_cache_item.change_time,
+                                      parser_cache_item.size,
+                                      parser_cache_item.digest):
+            if parser_cache_item.digest is not None:
+                # The content may have been validated by its digest, the
+                # file is not hashed again as long as it's not touched.
+                parser_cache_item.change_time = p_time
             return parser_cache_item.parser
-    except KeyError:
-        if settings.use_filesystem_cache:
-            return ParserPickling.load_parser(path, p_time)
+        return None
+
+    parser = SharedParserCache.load_parser(path, p_time)
+    if parser is None and settings.use_filesystem_cache:
+        parser = ParserPickling.load_parser(path, p_time)
+    return parser
+
+
+def _add_to_parser_cache(path, item):
+    """
+    Stores ``item`` in the parser cache, unless the path is the buffer of a
+    script and ``item`` is not (buffers without a path are never imported).
+    If a script saves its buffer at the same time, its parser might be
+    replaced, the next script then parses the buffer again.
+    """
+    old = parser_cache.get(path)
+    if item.buffer or path is None or old is None or not old.buffer:
+        parser_cache[path] = item
 
 
-def save_parser(path, parser, pickling=True):
+def save_parser(path, parser, pickling=True, buffer=False):
+    """
+    Saves the parser of ``path`` in the caches. The parsers of the buffers of
+    scripts (``buffer``) replace any other parser of the path in memory, other
+    parsers don't replace them.
+    """
     try:
         p_time = None if path is None else os.path.getmtime(path)
     except OSError:
         p_time = None
         pickling = False
 
-    item = ParserCacheItem(parser, p_time)
-    parser_cache[path] = item
+    size = digest = None
+    if settings.cache_content_validation and pickling and path is not None:
+        # Only files that are parsed from the file system are hashed, the
+        # source of a `Script` is not necessarily the same as the file.
+        size = os.path.getsize(path)
+        digest = _hash_file(path)
+
+    item = ParserCacheItem(parser, p_time, size, digest, buffer)
+    _add_to_parser_cache(path, item)
     if settings.use_filesystem_cache and pickling:
         ParserPickling.save_parser(path, item)
 
 
 class ParserPickling(object):
 
-    version = 26
+    version = 34
     """
     Version number (integer) for file system cache.
 
@@ -100,8 +367,16 @@ class ParserPickling(object):
     - Defined slot of the class is changed.
     """
 
+    _access_time_resolution = 60 * 60
+    _gc_interval = 60 * 60
+
     def __init__(self):
-        self.__index = None
+        # Sqlite connections must not be shared between threads, every
+        # thread has its own.
+        self._local = threading.local()
+        # Increased when the cache is cleared, the connections of other
+        # threads are replaced on their next use.
+        self._generation = 0
         self.py_tag = 'cpython-%s%s' % sys.version_info[:2]
         """
         Short name for distinguish Python implementations and versions.
@@ -115,71 +390,259 @@ class ParserPickling(object):
 
     def load_parser(self, path, original_changed_time):
         try:
-            pickle_changed_time = self._index[path]
-        except KeyError:
+            db = self._get_db()
+            row = db.execute(
+                'SELECT change_time, size, digest, last_access FROM modules '
+                'WHERE path = ?', (path,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            debug.warning('cache index not readable: %s', e)
+            return None
+        if row is None:
             return None
+        pickle_changed_time, size, digest, last_access = row
         if original_changed_time is not None \
-                and pickle_changed_time < original_changed_time:
+                and not _is_up_to_date(path, original_changed_time,
+                                       pickle_changed_time, size, digest):
             # the pickle file is outdated
             return None
 
-        with open(self._get_hashed_path(path), 'rb') as f:
-            try:
-                gc.disable()
-                parser_cache_item = pickle.load(f)
-            finally:
-                gc.enable()
+        try:
+            with open(self._get_hashed_path(path), 'rb') as f:
+                try:
+                    gc.disable()
+                    parser_cache_item = pickle.load(f)
+                finally:
+                    gc.enable()
+        except IOError:
+            # Another process might have removed the file.
+            return None
 
         debug.dbg('pickle loaded: %s', path)
-        parser_cache[path] = parser_cache_item
+        now = time.time()
+        # The content may have been validated by its digest, the new
+        # modification time is stored to avoid hashing the file again.
+        validated = original_changed_time is not None and digest is not None \
+            and original_changed_time != pickle_changed_time
+        if validated or last_access < now - self._access_time_resolution:
+            # Access times are used for garbage collection. Writing them on
+            # every load would be too expensive.
+            if validated:
+                pickle_changed_time = original_changed_time
+            try:
+                with db:
+                    db.execute('UPDATE modules SET change_time = ?, last_access = ? '
+                               'WHERE path = ?', (pickle_changed_time, now, path))
+            except sqlite3.Error as e:
+                debug.warning('cache index not writable: %s', e)
+
+        if original_changed_time is not None:
+            parser_cache_item.change_time = original_changed_time
+        _add_to_parser_cache(path, parser_cache_item)
         return parser_cache_item.parser
 
     def save_parser(self, path, parser_cache_item):
-        self.__index = None
         try:
-            files = self._index
-        except KeyError:
-            files = {}
-            self._index = files
+            # Connecting might clear an incompatible cache, which must not
+            # remove the new pickle.
+            db = self._get_db()
+        except sqlite3.Error as e:
+            debug.warning('cache index not writable: %s', e)
+            return
+
+        hashed_path = self._get_hashed_path(path)
+        # Write to a temporary file first, so that other processes never read
+        # a partially written pickle.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(hashed_path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(parser_cache_item, f, pickle.HIGHEST_PROTOCOL)
+            pickle_size = os.path.getsize(tmp_path)
+            _replace_file(tmp_path, hashed_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
 
-        with open(self._get_hashed_path(path), 'wb') as f:
-            pickle.dump(parser_cache_item, f, pickle.HIGHEST_PROTOCOL)
-            files[path] = parser_cache_item.change_time
+        try:
+            with db:
+                db.execute(
+                    'INSERT OR REPLACE INTO modules (path, change_time, size, '
+                    'digest, pickle_size, last_access) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (path, parser_cache_item.change_time,
+                     parser_cache_item.size, parser_cache_item.digest,
+                     pickle_size, time.time())
+                )
+            self._remove_old_modules()
+        except sqlite3.Error as e:
+            debug.warning('cache index not writable: %s', e)
+
+    def _get_db(self):
+        """
+        The index of the pickled modules is a sqlite database. Sqlite takes
+        care of locking, therefore multiple processes can use the same cache
+        and saving a module only writes a single row.
+        """
+        local = self._local
+        if getattr(local, 'key', None) != self._db_key():
+            local.db = self._connect()
+            # Connecting might clear an incompatible cache.
+            local.key = self._db_key()
+        return local.db
+
+    def _db_key(self):
+        # Connections must not be shared with forked processes.
+        return self._cache_directory(), os.getpid(), self._generation
+
+    def _connect(self):
+        db = sqlite3.connect(self._get_path('index.db'), timeout=30)
+        with db:
+            db.execute('CREATE TABLE IF NOT EXISTS meta '
+                       '(key TEXT PRIMARY KEY, value TEXT)')
+            db.execute('CREATE TABLE IF NOT EXISTS modules '
+                       '(path TEXT PRIMARY KEY, change_time REAL, '
+                       'size INTEGER, digest TEXT, pickle_size INTEGER, '
+                       'last_access REAL)')
+            created = db.execute('INSERT OR IGNORE INTO meta VALUES (?, ?)',
+                                 ('version', str(self.version))).rowcount
+            version, = db.execute('SELECT value FROM meta WHERE key = ?',
+                                  ('version',)).fetchone()
+            # Checked before committing, no other process knows the index
+            # yet.
+            legacy = created and self._has_legacy_files()
+        if version != str(self.version) or legacy:
+            # An incompatible cache, just delete everything.
+            db.close()
+            self.clear_cache()
+            return self._connect()
+        return db
+
+    def _has_legacy_files(self):
+        """
+        Returns True if the cache directory contains the files of caches
+        without a sqlite index, their pickles are never removed otherwise.
+        """
+        for name in os.listdir(self._cache_directory()):
+            if name == 'index.json' or re.match(r'[0-9a-f]{32}\.pkl$', name):
+                return True
+        return False
 
-        self._flush_index()
+    def load_grammar(self, grammar_path):
+        """
+        Returns the cached grammar tables for the grammar file at
+        ``grammar_path`` or None, if there's no valid cache entry.
+        """
+        from jedi.parser.pgen2.grammar import Grammar
 
-    @property
-    def _index(self):
-        if self.__index is None:
-            try:
-                with open(self._get_path('index.json')) as f:
-                    data = json.load(f)
-            except (IOError, ValueError):
-                self.__index = {}
-            else:
-                # 0 means version is not defined (= always delete cache):
-                if data.get('version', 0) != self.version:
-                    self.clear_cache()
-                else:
-                    self.__index = data['index']
-        return self.__index
+        source_hash = _hash_file(grammar_path)
+        grammar = Grammar()
+        try:
+            grammar.load(self._get_grammar_path(grammar_path, source_hash))
+        except IOError:
+            return None
+        except Exception:
+            # A truncated or otherwise corrupted pickle, just regenerate it.
+            debug.warning('grammar cache corrupted: %s', grammar_path)
+            return None
+
+        # Check that the tables were created from the same grammar file and
+        # with the same cache format.
+        if getattr(grammar, 'source_hash', None) != source_hash \
+                or getattr(grammar, 'cache_version', None) != self.version \
+                or not grammar.dfas or not grammar.labels:
+            debug.warning('grammar cache invalid: %s', grammar_path)
+            return None
+        debug.dbg('grammar loaded: %s', grammar_path)
+        return grammar
+
+    def save_grammar(self, grammar_path, grammar):
+        source_hash = _hash_file(grammar_path)
+        grammar.source_hash = source_hash
+        grammar.cache_version = self.version
+        path = self._get_grammar_path(grammar_path, source_hash)
+        # Write to a temporary file first, so that other processes never see
+        # a partially written grammar.
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        os.close(fd)
+        try:
+            grammar.dump(tmp_path)
+            _replace_file(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _get_grammar_path(self, grammar_path, source_hash):
+        name = os.path.splitext(os.path.basename(grammar_path))[0]
+        return self._get_path('%s-%s.pkl' % (name, source_hash))
 
     def _remove_old_modules(self):
-        # TODO use
-        change = False
-        if change:
-            self._flush_index(self)
-            self._index  # reload index
-
-    def _flush_index(self):
-        data = {'version': self.version, 'index': self._index}
-        with open(self._get_path('index.json'), 'w') as f:
-            json.dump(data, f)
-        self.__index = None
+        """
+        Collects garbage from time to time, but not more often than every
+        `_gc_interval` seconds (across all processes using the cache).
+        """
+        if settings.cache_max_bytes is None and settings.cache_max_age is None:
+            return
+        db = self._get_db()
+        now = time.time()
+        with db:
+            row = db.execute('SELECT value FROM meta WHERE key = ?',
+                             ('last_gc',)).fetchone()
+            if row is not None and float(row[0]) > now - self._gc_interval:
+                return
+            db.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)',
+                       ('last_gc', repr(now)))
+        self.garbage_collect()
+
+    def garbage_collect(self, max_bytes=None, max_age=None):
+        """
+        Removes pickled modules that were not used for longer than
+        ``max_age`` seconds and then the least recently used modules until the
+        pickles use less than ``max_bytes``. The defaults are
+        :data:`jedi.settings.cache_max_bytes` and
+        :data:`jedi.settings.cache_max_age`.
+
+        Returns the number of removed modules and the freed bytes.
+        """
+        if max_bytes is None:
+            max_bytes = settings.cache_max_bytes
+        if max_age is None:
+            max_age = settings.cache_max_age
+
+        db = self._get_db()
+        removed = []
+        with db:
+            rows = db.execute(
+                'SELECT path, pickle_size, last_access FROM modules '
+                'ORDER BY last_access'
+            ).fetchall()
+            total = sum(size for _, size, _ in rows)
+            oldest_access = None if max_age is None else time.time() - max_age
+            for path, size, last_access in rows:
+                if (oldest_access is None or last_access >= oldest_access) \
+                        and (max_bytes is None or total <= max_bytes):
+                    break
+                removed.append((path, size))
+                total -= size
+            db.executemany('DELETE FROM modules WHERE path = ?',
+                           [(path,) for path, _ in removed])
+
+        for path, _ in removed:
+            try:
+                os.remove(self._get_hashed_path(path))
+            except OSError:
+                pass
+        freed = sum(size for _, size in removed)
+        if removed:
+            debug.dbg('cache gc removed %s modules (%s bytes)', len(removed), freed)
+        return len(removed), freed
 
     def clear_cache(self):
-        shutil.rmtree(self._cache_directory())
-        self.__index = {}
+        db = getattr(self._local, 'db', None)
+        if db is not None:
+            db.close()
+            self._local.db = self._local.key = None
+        self._generation += 1
+        shutil.rmtree(self._cache_directory(), ignore_errors=True)
 
     def _get_hashed_path(self, path):
         return self._get_path('%s.pkl' % hashlib.md5(path.encode("utf-8")).hexdigest())
@@ -187,12 +650,251 @@ class ParserPickling(object):
     def _get_path(self, file):
         dir = self._cache_directory()
         if not os.path.exists(dir):
-            os.makedirs(dir)
+            try:
+                os.makedirs(dir)
+            except OSError:
+                # Another process might have created it in the meantime.
+                if not os.path.isdir(dir):
+                    raise
         return os.path.join(dir, file)
 
     def _cache_directory(self):
         return os.path.join(settings.cache_directory, self.py_tag)
 
 
+class SharedParserCache(object):
+    """
+    A prebuilt, read-only store of modules in the compact format (see
+    :mod:`jedi.parser.serialize`), configured by
+    :data:`jedi.settings.shared_cache_path`.
+
+    The store is a single file that is memory mapped. Processes that use the
+    same store share the serialized modules in the page cache and don't open
+    and read a pickle per module. The trees themselves are not shared: A
+    module is only deserialized when it is used, into the private memory of
+    the process, and then kept in the per-process :data:`parser_cache`. Modules that
+    are not in the store (or that have changed since the store was built) and
+    unsaved buffers are handled as usual.
+
+    The layout of the file is a header (``magic`` and the offset of the
+    index), the pickled modules and the pickled index at the end.
+    """
+    magic = b'jedi-shared-cache'
+    _offset_format = '<Q'
+
+    def __init__(self):
+        # Guards the mapping, another thread might replace it.
+        self._lock = threading.Lock()
+        self._store_path = None
+        self._mmap = None
+        self._modules = {}
+
+    def load_parser(self, path, original_changed_time):
+        """
+        Returns the parser of ``path`` or None, if it's not in the store.
+        """
+        with self._lock:
+            if not self._open() or path not in self._modules:
+                return None
+            offset, length, change_time, size, digest = self._modules[path]
+            data = self._mmap[offset:offset + length]
+        if original_changed_time is not None \
+                and not _is_up_to_date(path, original_changed_time,
+                                       change_time, size, digest):
+            return None
+
+        from jedi.parser import serialize
+        try:
+            gc.disable()
+            parser = serialize.load(pickle.loads(data))
+        except Exception as e:
+            debug.warning('shared cache entry not readable: %s (%s)', path, e)
+            return None
+        finally:
+            gc.enable()
+
+        debug.dbg('shared cache loaded: %s', path)
+        if original_changed_time is not None:
+            change_time = original_changed_time
+        _add_to_parser_cache(path, ParserCacheItem(parser, change_time, size, digest))
+        return parser
+
+    def _open(self):
+        """
+        Maps the configured store, if it isn't mapped yet. Returns False if
+        there's no usable store.
+        """
+        store_path = settings.shared_cache_path
+        if store_path == self._store_path:
+            return self._mmap is not None
+        self._close()
+        self._store_path = store_path
+        if store_path is None:
+            return False
+
+        try:
+            with open(store_path, 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (IOError, OSError, ValueError) as e:
+            debug.warning('shared cache not readable: %s (%s)', store_path, e)
+            return False
+        try:
+            header_end = len(self.magic) + struct.calcsize(self._offset_format)
+            if mapped[:len(self.magic)] != self.magic:
+                raise ValueError('not a shared cache')
+            index_offset, = struct.unpack(self._offset_format,
+                                          mapped[len(self.magic):header_end])
+            versions, modules = pickle.loads(mapped[index_offset:])
+            if versions != self._versions():
+                raise ValueError('incompatible versions %s' % (versions,))
+        except Exception as e:
+            debug.warning('shared cache not usable: %s (%s)', store_path, e)
+            mapped.close()
+            return False
+        self._mmap = mapped
+        self._modules = modules
+        return True
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+        self._store_path = None
+        self._mmap = None
+        self._modules = {}
+
+    def _versions(self):
+        from jedi.parser import serialize
+        from jedi.parser.skeleton import grammar_version
+        # Modules parsed with another grammar would be error-recovered trees
+        # for this interpreter.
+        return (ParserPickling.py_tag, ParserPickling.version,
+                serialize.version, grammar_version(_runtime_grammar()))
+
+    def build(self, store_path, paths):
+        """
+        Parses the Python files ``paths`` and writes them to a new store at
+        ``store_path``. An existing store is replaced atomically, processes
+        that still map the old one are not affected.
+
+        Returns the number of modules in the store.
+        """
+        from jedi.parser import serialize
+
+        grammar = _runtime_grammar()
+        modules = {}
+        directory = os.path.dirname(os.path.abspath(store_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(self.magic + struct.pack(self._offset_format, 0))
+                for path in paths:
+                    path = os.path.abspath(path)
+                    try:
+                        parser, source, change_time = _parse_file(grammar, path)
+                    except (IOError, OSError) as e:
+                        debug.warning('shared cache: cannot read %s (%s)', path, e)
+                        continue
+                    try:
+                        data = pickle.dumps(serialize.dump(parser),
+                                            pickle.HIGHEST_PROTOCOL)
+                    except ValueError as e:
+                        debug.warning('shared cache: cannot store %s (%s)', path, e)
+                        continue
+                    modules[path] = (f.tell(), len(data), change_time, len(source),
+                                     hashlib.sha1(source).hexdigest())
+                    f.write(data)
+
+                index_offset = f.tell()
+                pickle.dump((self._versions(), modules), f, pickle.HIGHEST_PROTOCOL)
+                f.seek(len(self.magic))
+                f.write(struct.pack(self._offset_format, index_offset))
+            _replace_file(tmp_path, store_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return len(modules)
+
+
+def _parse_file(grammar, path):
+    """
+    Parses a Python file like imported modules are parsed. Returns the parser,
+    the source (bytes) and the modification time of the file.
+    """
+    from jedi import common
+    from jedi.parser.fast import FastParser
+    from jedi.parser.skeleton import SkeletonParser
+
+    change_time = os.path.getmtime(path)
+    with open(path, 'rb') as f:
+        source = f.read()
+    if settings.skeleton_parser:
+        parser_cls = SkeletonParser
+    else:
+        parser_cls = FastParser
+    parser = parser_cls(grammar, common.source_to_unicode(source), path)
+    return parser, source, change_time
+
+
+def _runtime_grammar():
+    """
+    The grammar of the running interpreter, the one scripts are parsed with.
+    """
+    from jedi.parser import load_grammar
+    return load_grammar(version='%s.%s' % sys.version_info[:2])
+
+
+def cache_file(path):
+    """
+    Parses the Python file at ``path`` and saves it in the filesystem cache,
+    unless it's already cached. Returns the number of bytes that were parsed.
+    """
+    if load_parser(path) is not None:
+        return 0
+    parser, source, _ = _parse_file(_runtime_grammar(), path)
+    save_parser(path, parser)
+    return len(source)
+
+
+def _is_up_to_date(path, p_time, cached_time, cached_size, cached_digest):
+    """
+    Checks if a cached module for ``path`` is still valid. By default only the
+    modification time is compared. With `settings.cache_content_validation`
+    the modification time and size have to match exactly, otherwise the
+    content digest decides.
+    """
+    if not settings.cache_content_validation or cached_digest is None:
+        return p_time <= cached_time
+
+    try:
+        if p_time == cached_time and os.path.getsize(path) == cached_size:
+            return True
+        return _hash_file(path) == cached_digest
+    except (IOError, OSError):
+        return False
+
+
+def _hash_file(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _replace_file(src, dst):
+    try:
+        replace = os.replace
+    except AttributeError:
+        # Python 2: On Windows the destination must not exist.
+        if os.name == 'nt' and os.path.exists(dst):
+            os.remove(dst)
+        replace = os.rename
+    replace(src, dst)
+
+
 # is a singleton
 ParserPickling = ParserPickling()
+
+# is a singleton
+SharedParserCache = SharedParserCache()
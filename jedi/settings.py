@@ -5,6 +5,8 @@ behavior of |jedi|, change the variables defined in :mod:`jedi.settings`.
 Plugins should expose an interface so that the user can adjust the
 configuration.
 
+The settings are shared by all threads, |jedi| itself never changes them.
+
 
 Example usage::
 
@@ -26,12 +28,26 @@ Filesystem cache
 
 .. autodata:: cache_directory
 .. autodata:: use_filesystem_cache
+.. autodata:: cache_content_validation
+.. autodata:: compact_filesystem_cache
+.. autodata:: cache_max_bytes
+.. autodata:: cache_max_age
+.. autodata:: shared_cache_path
+
+
+Memory cache
+~~~~~~~~~~~~
+
+.. autodata:: parser_cache_max_entries
+.. autodata:: parser_cache_max_bytes
 
 
 Parser
 ~~~~~~
 
 .. autodata:: fast_parser
+.. autodata:: fast_tokenizer
+.. autodata:: skeleton_parser
 
 
 Dynamic stuff
@@ -108,6 +124,45 @@ use_filesystem_cache = True
 Use filesystem cache to save once parsed files with pickle.
 """
 
+cache_content_validation = False
+"""
+Modification times are not always reliable, e.g. on network file systems,
+after a ``git checkout`` or in containers where the modification times are
+reset. If this is set, a cached module is only reused if its modification time
+and size are unchanged or if the content of the file still has the same hash.
+This also allows reusing caches that were created on a different machine.
+"""
+
+compact_filesystem_cache = True
+"""
+Store parser trees in a compact format of flat lists instead of pickling the
+tree objects. This is a lot smaller and faster to load.
+"""
+
+cache_max_bytes = 1024 * 1024 * 1024
+"""
+The maximum size of the pickled modules in the filesystem cache (in bytes).
+The least recently used modules are removed first. Garbage is collected from
+time to time while saving modules or by calling ``python -m jedi cache gc``.
+``None`` means no limit.
+"""
+
+cache_max_age = 60 * 60 * 24 * 30
+"""
+Pickled modules that haven't been used for this amount of time (in seconds)
+are removed from the filesystem cache. ``None`` means no limit.
+"""
+
+shared_cache_path = None
+"""
+The path of a read-only store of parsed modules, that is memory mapped by all
+the processes that use it (e.g. a pool of completion workers). Only the
+serialized modules in the page cache are shared, every process deserializes the
+modules it uses into its own memory. The store is created by
+``jedi.parser.utils.SharedParserCache.build(path, files)``. Modules that are
+not in the store are cached as usual.
+"""
+
 if platform.system().lower() == 'windows':
     _cache_directory = os.path.join(os.getenv('APPDATA') or '~', 'Jedi',
                                     'Jedi')
@@ -126,6 +181,24 @@ On Linux, if environment variable ``$XDG_CACHE_HOME`` is set,
 ``$XDG_CACHE_HOME/jedi`` is used instead of the default one.
 """
 
+# ----------------
+# Memory cache
+# ----------------
+
+parser_cache_max_entries = 1000
+"""
+The maximum number of parsed modules that are kept in memory. The least
+recently used modules are removed first, modules that are still used by a
+``Script`` are kept. ``None`` means no limit.
+"""
+
+parser_cache_max_bytes = 500 * 1024 * 1024
+"""
+An approximate limit for the memory (in bytes) the parsed modules may use.
+The size of a module is estimated from its source code. ``None`` means no
+limit.
+"""
+
 # ----------------
 # parser
 # ----------------
@@ -137,6 +210,18 @@ something has been changed e.g. to a function. If this happens, only the
 function is being reparsed.
 """
 
+fast_tokenizer = True
+"""
+Use :func:`jedi.parser.tokenize.fast_generate_tokens`, that produces exactly
+the same tokens as the normal tokenizer, but faster.
+"""
+
+skeleton_parser = True
+"""
+Parse imported modules with :class:`jedi.parser.skeleton.SkeletonParser`. The
+bodies of their functions are only parsed once they are used.
+"""
+
 # ----------------
 # dynamic stuff
 # ----------------
@@ -0,0 +1,85 @@
+#! /usr/bin/env python
+"""
+Compares the filesystem cache formats: pickled parser objects and the compact
+format of :mod:`jedi.parser.serialize`.
+
+Every module is parsed once, then the size of both formats and the best time
+of loading them (unpickling and rebuilding the tree) is recorded. The compact
+format is loaded lazily by default, the time of loading the complete tree is
+recorded as well.
+
+You can provide the modules via command line arguments, by default a few
+large standard library modules are used.
+"""
+import gc
+import os
+import pickle
+import sys
+import time
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__) + '/..'))
+from jedi import settings
+from jedi.parser import load_grammar
+from jedi.parser import serialize
+from jedi.parser.fast import FastParser
+from jedi.parser.utils import ParserCacheItem
+
+
+def module_path(name):
+    module = __import__(name, fromlist=['__name__'])
+    path = module.__file__
+    if path.endswith(('.pyc', '.pyo')):
+        path = path[:-1]
+    return path
+
+
+def best_time(func, number=5):
+    best = float('inf')
+    for _ in range(number):
+        gc.disable()
+        try:
+            t0 = time.time()
+            func()
+            best = min(best, time.time() - t0)
+        finally:
+            gc.enable()
+    return best
+
+
+def dump(item, compact):
+    old = settings.compact_filesystem_cache
+    settings.compact_filesystem_cache = compact
+    try:
+        return pickle.dumps(item, pickle.HIGHEST_PROTOCOL)
+    finally:
+        settings.compact_filesystem_cache = old
+
+
+def main(mods):
+    grammar = load_grammar()
+    print('Pickle (KB) | Load (ms) | Compact (KB) | Load (ms) | Eager (ms) | Module')
+    print('---------------------------------------------------------------------------')
+    totals = [0, 0, 0, 0, 0]
+    for mod in mods:
+        path = module_path(mod)
+        with open(path) as f:
+            source = f.read()
+        item = ParserCacheItem(FastParser(grammar, source, path))
+        results = []
+        for compact in (False, True):
+            data = dump(item, compact)
+            results += len(data) / 1024.0, best_time(lambda: pickle.loads(data)) * 1000
+        data = pickle.dumps(serialize.dump(item.parser), pickle.HIGHEST_PROTOCOL)
+        results.append(best_time(lambda: serialize.load(pickle.loads(data), False)) * 1000)
+        totals = [t + r for t, r in zip(totals, results)]
+        print('%11d | %9.1f | %12d | %9.1f | %10.1f | %s' % tuple(results + [mod]))
+    print('---------------------------------------------------------------------------')
+    print('%11d | %9.1f | %12d | %9.1f | %10.1f | %s' % tuple(totals + ['Total']))
+
+
+if __name__ == '__main__':
+    if sys.argv[1:]:
+        mods = sys.argv[1:]
+    else:
+        mods = ['argparse', 'decimal', 'difflib', 'inspect', 'logging',
+                'pydoc', 'subprocess', 'tarfile', 'typing', 'unittest.case']
+    main(mods)
@@ -0,0 +1,127 @@
+#! /usr/bin/env python
+"""
+Measures the cost of error recovery on syntax-broken buffers, like the ones
+an editor has while somebody is typing.
+
+Every module of the corpus is broken in a few typical ways (an unclosed
+bracket or string near the top, a missing colon, a wrong indentation, ...)
+and parsed with ``ParserWithRecovery`` and the ``FastParser``. The best time
+of a few runs is compared with the time of parsing the unbroken modules. The
+corpus also contains a deeply nested module with an error on every line.
+Broken code should never be much slower to parse than correct code.
+
+You can provide the modules via command line arguments, by default a few
+large standard library modules are used.
+"""
+import gc
+import os
+import sys
+import time
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__) + '/..'))
+from jedi import common
+from jedi.parser import ParserWithRecovery, load_grammar
+from jedi.parser.fast import FastParser
+
+MUTATIONS = [
+    ('unclosed paren', 'x = foo(a,\n'),
+    ('unclosed bracket', 'x = [1, 2\n'),
+    ('unclosed nested', 'x = {1: (2, [3\n'),
+    ('unclosed def', 'def f(a, b\n'),
+    ('unclosed string', 'x = "abc\n'),
+    ('unclosed triple', 'x = """abc\n'),
+    ('missing colon', 'if x\n'),
+    ('bad indent', '        y = 2\n'),
+    ('dangling operator', 'x = 1 +\n'),
+    ('stray closing', 'x = 1)]\n'),
+    ('double operator', 'x = = 1\n'),
+]
+
+
+def module_path(name):
+    module = __import__(name, fromlist=['__name__'])
+    path = module.__file__
+    if path.endswith(('.pyc', '.pyo')):
+        path = path[:-1]
+    return path
+
+
+def deeply_nested(depth=80, lines=2000):
+    head = ''.join('    ' * i + 'if x:\n' for i in range(depth))
+    body = ''.join('    ' * depth + 'a%d = = 1)\n' % i for i in range(lines))
+    return head + body
+
+
+def best_time(func, number=3):
+    best = float('inf')
+    for _ in range(number):
+        gc.disable()
+        try:
+            t0 = time.time()
+            func()
+            best = min(best, time.time() - t0)
+        finally:
+            gc.enable()
+    return best
+
+
+def mutate(source, text):
+    """
+    Inserts ``text`` at a tenth and at the half of ``source``.
+    """
+    lines = source.splitlines(True)
+    for position in (len(lines) // 10, len(lines) // 2):
+        yield ''.join(lines[:position] + [text] + lines[position:])
+
+
+def run(grammar, sources):
+    """
+    Returns the time of parsing all the sources with both parsers and the
+    number of sources whose tree doesn't contain the complete code.
+    """
+    lost = 0
+    times = [0, 0]
+    for source in sources:
+        for i, cls in enumerate((ParserWithRecovery, FastParser)):
+            times[i] += best_time(lambda: cls(grammar, source))
+        if cls(grammar, source).module.get_code() != source:
+            lost += 1
+    return times, lost
+
+
+def main(mods):
+    grammar = load_grammar()
+    corpus = []
+    for mod in mods:
+        with open(module_path(mod), 'rb') as f:
+            corpus.append(common.source_to_unicode(f.read()))
+
+    print('Recovery (ms) | Ratio | Fast (ms) | Ratio | Lost code | Buffers')
+    print('----------------------------------------------------------------------')
+    cases = [('clean', corpus)]
+    cases += [(name, [s for source in corpus for s in mutate(source, text)])
+              for name, text in MUTATIONS]
+    clean = None
+    for name, sources in cases:
+        (seconds, fast), lost = run(grammar, sources)
+        if clean is None:
+            clean, clean_fast = seconds, fast
+        # Every module is broken in two places, the ratio is per module.
+        factor = len(sources) // len(corpus)
+        print('%13.1f | %5.2f | %9.1f | %5.2f | %9d | %s'
+              % (seconds * 1000, seconds / clean / factor, fast * 1000,
+                 fast / clean_fast / factor, lost, name))
+
+    print('----------------------------------------------------------------------')
+    for depth in (1, 20, 40, 80):
+        source = deeply_nested(depth)
+        seconds = best_time(lambda: ParserWithRecovery(grammar, source))
+        print('%13.1f |       |           |       |           | nesting depth %s'
+              % (seconds * 1000, depth))
+
+
+if __name__ == '__main__':
+    if sys.argv[1:]:
+        mods = sys.argv[1:]
+    else:
+        mods = ['argparse', 'decimal', 'difflib', 'inspect', 'subprocess']
+    main(mods)
@@ -19,8 +19,8 @@ import jedi
 
 
 def used_memory():
-    """Return the total MB of System Memory in use."""
-    return psutil.virtual_memory().used / 2 ** 20
+    """Return the MB of memory used by this process (resident set size)."""
+    return psutil.Process().memory_info().rss / 2 ** 20
 
 
 def profile_preload(mod):
@@ -0,0 +1,73 @@
+#! /usr/bin/env python
+"""
+Compares the throughput of the tokenizers in :mod:`jedi.parser.tokenize`:
+``generate_tokens`` and ``fast_generate_tokens``.
+
+All the Python files in the given directories are tokenized (by default the
+standard library), the best of a few runs is reported. The tokens of both
+tokenizers are checked to be identical.
+"""
+import gc
+import os
+import sys
+import time
+from io import StringIO
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__) + '/..'))
+from jedi import common
+from jedi.parser import tokenize
+
+
+def read_sources(directories):
+    sources = []
+    for directory in directories:
+        for root, dirnames, filenames in os.walk(directory):
+            for filename in filenames:
+                if filename.endswith('.py'):
+                    with open(os.path.join(root, filename), 'rb') as f:
+                        try:
+                            sources.append(common.source_to_unicode(f.read()))
+                        except (LookupError, UnicodeDecodeError):
+                            pass
+    return sources
+
+
+def run(generate_tokens, sources):
+    count = 0
+    for source in sources:
+        for _ in generate_tokens(StringIO(source).readline, True):
+            count += 1
+    return count
+
+
+def best_time(func, number=3):
+    best = float('inf')
+    for _ in range(number):
+        gc.disable()
+        try:
+            t0 = time.time()
+            result = func()
+            best = min(best, time.time() - t0)
+        finally:
+            gc.enable()
+    return best, result
+
+
+def main(directories):
+    sources = read_sources(directories)
+    size = sum(len(s) for s in sources) / 1024.0 / 1024
+    print('%s files, %.1f MB' % (len(sources), size))
+    for source in sources:
+        readline = StringIO(source).readline
+        if list(tokenize.generate_tokens(readline, True)) != \
+                list(tokenize.fast_generate_tokens(StringIO(source).readline, True)):
+            print('The tokenizers differ!')
+            sys.exit(1)
+
+    for func in (tokenize.generate_tokens, tokenize.fast_generate_tokens):
+        seconds, count = best_time(lambda: run(func, sources))
+        print('%-20s %6.2f s  %9.0f tokens/s  %5.2f MB/s'
+              % (func.__name__, seconds, count / seconds, size / seconds))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:] or [os.path.dirname(os.__file__)])
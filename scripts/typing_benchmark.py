@@ -0,0 +1,78 @@
+#! /usr/bin/env python
+"""
+Simulates typing at the top of a large file with the fast parser.
+
+A new line is typed character by character at the top of the file (by default
+a generated module with 5000 lines of classes, functions and statements).
+After every keystroke the module is reparsed with ``FastParser.update`` and
+the positions of all the names are read, like the name finder does when it
+filters names by their position. The best and the average time of a
+keystroke are reported.
+
+Usage: typing_benchmark.py [FILE]
+"""
+import gc
+import os
+import sys
+import time
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__) + '/..'))
+from jedi._compatibility import u
+from jedi.parser import load_grammar
+from jedi.parser.fast import FastParser
+
+TYPED = u('import collections.abc as abc_module\n')
+
+
+def generate_source(lines=5000):
+    parts = []
+    i = 0
+    while sum(p.count('\n') for p in parts) < lines:
+        parts.append(u('class Class%s(object):\n'
+                       '    attribute = %s\n\n'
+                       '    def method(self, a, b=None):\n'
+                       '        result = [a + x for x in range(b)]\n'
+                       '        return self.attribute, result\n\n\n'
+                       'def function%s(*args, **kwargs):\n'
+                       '    return Class%s().method(*args, **kwargs)\n\n\n'
+                       'value%s = function%s(1, b=2)\n\n\n') % ((i,) * 6))
+        i += 1
+    return u('').join(parts)
+
+
+def keystrokes(source):
+    for i in range(1, len(TYPED) + 1):
+        yield TYPED[:i] + source
+
+
+def main(source):
+    grammar = load_grammar()
+    parser = FastParser(grammar, source)
+    print('%s lines, %s keystrokes' % (source.count('\n'), len(TYPED)))
+
+    times = []
+    names = 0
+    gc.disable()
+    try:
+        for code in keystrokes(source):
+            t0 = time.time()
+            parser.update(code)
+            module = parser.module
+            for name_list in module.used_names.values():
+                for name in name_list:
+                    name.start_pos
+                    name.end_pos
+                    names += 1
+            times.append(time.time() - t0)
+    finally:
+        gc.enable()
+    print('Best: %.1f ms, average: %.1f ms per keystroke (%s names)'
+          % (min(times) * 1000, sum(times) / len(times) * 1000,
+             names // len(times)))
+
+
+if __name__ == '__main__':
+    if sys.argv[1:]:
+        with open(sys.argv[1]) as f:
+            main(u(f.read()))
+    else:
+        main(generate_source())
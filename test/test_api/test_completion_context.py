@@ -1,5 +1,12 @@
 from textwrap import dedent
+
 from jedi import Script
+from jedi._compatibility import u
+from jedi.api import helpers
+from jedi.common import splitlines
+from jedi.parser import ParserWithRecovery, load_grammar
+from jedi.parser.fast import FastParser
+from jedi.parser.utils import parser_cache
 
 
 def test_in_whitespace():
@@ -7,3 +14,54 @@ def test_in_whitespace():
     def x():
         pass''')
     assert len(Script(code, column=2).completions()) > 20
+
+
+def get_stack(module, code, position):
+    grammar = load_grammar()
+    stack = helpers.get_stack_at_position(grammar, splitlines(code), module, position)
+    return list(stack.get_node_names(grammar)), list(stack.get_nodes())
+
+
+def test_stack_from_checkpoint():
+    code = dedent('''
+    import os
+    if x:
+        a = 1
+        b = 2
+    elif os.''')
+    position = 6, 8
+    module = FastParser(load_grammar(), u(code), 'checkpoint.py',
+                        record_checkpoints=True).module
+    checkpoint = helpers._get_checkpoint(load_grammar(), module, position)
+    assert checkpoint[0] == (6, 0)
+
+    # The stack is the same as the stack of parsing the whole statement, but
+    # the block before the line is not part of it.
+    names, nodes = get_stack(module, code, position)
+    module = ParserWithRecovery(load_grammar(), u(code)).module
+    expected_names, expected_nodes = get_stack(module, code, position)
+    assert names == expected_names
+    assert [n.value for n in nodes] == ['elif', 'os', '.']
+    assert expected_nodes[0] == 'if'
+
+
+def test_checkpoints():
+    code = u('def f(a,\n      b):\n    x = 1\n    return x\n\nf(1,\n  2)\n')
+    p = ParserWithRecovery(load_grammar(), code, record_checkpoints=True)
+    assert [pos for pos, stack in p.checkpoints] == [(1, 0), (3, 4), (4, 4), (6, 0)]
+    # Lines within the same block share the stack.
+    assert p.checkpoints[1][1] is p.checkpoints[2][1]
+
+
+def test_checkpoints_of_libraries():
+    # Only the parsers of the buffer keep checkpoints, not the ones of
+    # imported modules.
+    script = Script('import textwrap\ntextwrap.')
+    assert script.completions()
+    assert all(p.checkpoints for p in script._get_module().parsers)
+
+    module = script._evaluator.modules['textwrap']
+    parser = parser_cache[module.path].parser
+    assert not getattr(parser, 'checkpoints', None)
+    for p in getattr(parser.module, 'parsers', []):
+        assert not p.checkpoints
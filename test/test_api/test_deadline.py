@@ -0,0 +1,67 @@
+"""
+Tests of ``jedi.Deadline``, type inference that stops in time.
+"""
+from jedi import Deadline, Project, Script
+
+
+class CountingDeadline(Deadline):
+    """
+    Expires after it was checked ``count`` times, in the middle of the
+    evaluation.
+    """
+    def __init__(self, count):
+        super(CountingDeadline, self).__init__()
+        self.count = count
+
+    def is_expired(self):
+        self.count -= 1
+        return self.count < 0 or super(CountingDeadline, self).is_expired()
+
+
+def completions(source, **kwargs):
+    return set(c.name for c in Script(source, **kwargs).completions())
+
+
+def cancelled():
+    deadline = Deadline()
+    deadline.cancel()
+    return deadline
+
+
+def test_deadline():
+    assert not Deadline().is_expired()
+    assert not Deadline(100).is_expired()
+    assert Deadline(-1).is_expired()
+    assert cancelled().is_expired()
+
+
+def test_partial_results():
+    source = 'import json; json.l'
+    assert 'loads' in completions(source, deadline=Deadline(100))
+    assert completions(source, deadline=cancelled()) == set()
+    # Names that don't need type inference are still there.
+    assert 'foo' in completions('def foo(): pass\nfo', deadline=cancelled())
+
+    for count in range(0, 40, 3):
+        names = completions(source, deadline=CountingDeadline(count))
+        assert names <= set(['load', 'loads'])
+    assert not Script('str.upper', deadline=cancelled()).goto_definitions()
+
+
+def test_incomplete_results_are_not_cached():
+    source = 'def f():\n    return 1\nx = f()\nx.'
+    for count in range(10):
+        project = Project()
+        completions(source, project=project, deadline=CountingDeadline(count))
+        assert 'real' in completions(source, project=project)
+
+
+def test_deadline_of_project_script():
+    # The deadline only applies to the calls of its script, not to the other
+    # scripts of the project.
+    project = Project()
+    source = 'import json; json.l'
+    script = Script(source, project=project, deadline=cancelled())
+    assert 'loads' in completions(source, project=project)
+    assert not script.completions()
+    assert 'loads' in completions(source, project=project)
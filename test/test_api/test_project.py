@@ -0,0 +1,121 @@
+"""
+Tests of ``jedi.Project``, scripts that share their evaluator.
+"""
+import os
+
+import pytest
+
+from jedi import Project, Script, settings
+
+
+def completions(project, source, path='/foo/bar.py'):
+    script = Script(source, path=path, project=project)
+    return set(c.name for c in script.completions())
+
+
+def test_shared_evaluator():
+    project = Project()
+    s1 = Script('import json; json.l', path='/foo/bar.py', project=project)
+    s2 = Script('import os', path='/foo/baz.py', project=project)
+    assert s1._evaluator is s2._evaluator
+    assert Script('')._evaluator is not s1._evaluator
+
+
+def test_modules_are_reused():
+    project = Project()
+    assert 'loads' in completions(project, 'import json; json.l')
+    module = project._evaluator.modules['json']
+    # The source changed, but the imported module is still valid.
+    assert 'loads' in completions(project, 'import json\njson.l')
+    assert project._evaluator.modules['json'] is module
+
+
+def test_changed_source():
+    project = Project()
+    assert 'real' in completions(project, 'x = 1\nx.')
+    names = completions(project, 'x = ""\nx.')
+    assert 'real' not in names
+    assert 'upper' in names
+
+
+def test_changed_module(tmpdir):
+    path = tmpdir.join('project_module.py')
+    path.write('def foo(): pass\n')
+    project = Project(sys_path=[str(tmpdir)])
+    source = 'import project_module; project_module.'
+    assert 'foo' in completions(project, source)
+
+    path.write('def bar(): pass\n')
+    # Make sure that the modification time changes.
+    mtime = os.path.getmtime(str(path)) + 10
+    os.utime(str(path), (mtime, mtime))
+    names = completions(project, source)
+    assert 'foo' not in names
+    assert 'bar' in names
+
+
+def test_touched_module(monkeypatch, tmpdir):
+    monkeypatch.setattr(settings, 'cache_content_validation', True)
+    path = tmpdir.join('project_touched.py')
+    path.write('def foo(): pass\n')
+    project = Project(sys_path=[str(tmpdir)])
+    source = 'import project_touched; project_touched.'
+    assert 'foo' in completions(project, source)
+    module = project._evaluator.modules['project_touched']
+
+    # The content didn't change, only the modification time.
+    mtime = os.path.getmtime(str(path)) + 10
+    os.utime(str(path), (mtime, mtime))
+    assert 'foo' in completions(project, source)
+    assert project._evaluator.modules['project_touched'] is module
+
+
+def test_unchanged_results_are_kept():
+    project = Project()
+    assert 'loads' in completions(project, 'import json; json.l')
+    evaluator = project._evaluator
+    module = evaluator.modules['json']
+    assert evaluator.wrap(module.base) is module
+
+    completions(project, 'import json\njson.l')
+    # The results of the json module don't depend on the changed script.
+    assert evaluator.wrap(module.base) is module
+
+
+def test_changed_indirect_import(tmpdir):
+    tmpdir.join('project_a.py').write('from project_b import foo\n')
+    path = tmpdir.join('project_b.py')
+    path.write('def foo(): return 1\n')
+    project = Project(sys_path=[str(tmpdir)])
+    source = 'import project_a; project_a.foo().'
+    assert 'real' in completions(project, source)
+
+    path.write('def foo(): return ""\n')
+    mtime = os.path.getmtime(str(path)) + 10
+    os.utime(str(path), (mtime, mtime))
+    names = completions(project, source)
+    assert 'real' not in names
+    assert 'upper' in names
+
+
+def test_apply_edit():
+    project = Project()
+    source = 'def f():\n    return 1\n\n\nx = f()\nx.'
+    assert 'real' in completions(project, source)
+
+    source = project.apply_edit('/foo/bar.py', (2, 11), (2, 12), '""')
+    assert source == 'def f():\n    return ""\n\n\nx = f()\nx.'
+    names = completions(project, source)
+    assert 'real' not in names
+    assert 'upper' in names
+
+    # Positions after the end of a line or of the source.
+    source = project.apply_edit('/foo/bar.py', (2, 100), (2, 100), '.lower()')
+    source = project.apply_edit('/foo/bar.py', (9, 0), (9, 0), 'j')
+    assert source == 'def f():\n    return "".lower()\n\n\nx = f()\nx.j'
+    assert 'join' in completions(project, source)
+
+    with pytest.raises(ValueError):
+        project.apply_edit('/foo/bar.py', (2, 0), (1, 0), '')
+    with pytest.raises(ValueError):
+        project.apply_edit('/foo/other.py', (1, 0), (1, 0), '')
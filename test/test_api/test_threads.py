@@ -0,0 +1,131 @@
+"""
+Tests of scripts that are used by different threads at the same time.
+"""
+from multiprocessing.pool import ThreadPool
+
+import jedi
+from jedi import debug, settings
+from jedi._compatibility import u
+from jedi.parser import load_grammar
+from jedi.parser.fast import FastParser
+from jedi.parser.utils import save_parser
+
+SOURCES = [
+    'import json; json.l',
+    'import os; os.path.jo',
+    'import collections; collections.Ord',
+    'def f(a): return a\nf("").up',
+    'x = [1]\nx.append("")\nx[0].',
+]
+
+
+def completions(source):
+    return sorted(c.name for c in jedi.Script(source).completions())
+
+
+def test_concurrent_scripts():
+    expected = [completions(source) for source in SOURCES]
+    pool = ThreadPool(4)
+    try:
+        results = pool.map(completions, SOURCES * 4)
+    finally:
+        pool.close()
+        pool.join()
+    assert results == expected * 4
+
+
+def test_parser_of_other_thread():
+    def parse(source):
+        parser = FastParser(load_grammar(), u(source), 'thread.py')
+        save_parser('thread.py', parser, pickling=False)
+        return parser
+
+    source = 'def f():\n    return 1\n\n\ndef g():\n    pass\n'
+    parser = parse(source)
+    new_source = source.replace('pass', 'return 2')
+    pool = ThreadPool(1)
+    try:
+        other = pool.apply(parse, (new_source,))
+    finally:
+        pool.close()
+        pool.join()
+    # The other thread updated the parser, only the changed part was parsed.
+    assert other is parser
+    assert parser.number_parsers_used == 1
+    assert parser.module.get_code() == new_source
+
+
+def test_scripts_of_same_path():
+    sources = ['x = 1\nx.', 'x = ""\nx.', 'import json\njson.']
+
+    def completions(source):
+        script = jedi.Script(source, path='same_path.py')
+        return sorted(c.name for c in script.completions())
+
+    expected = [completions(source) for source in sources]
+    pool = ThreadPool(4)
+    try:
+        results = pool.map(completions, sources * 4)
+    finally:
+        pool.close()
+        pool.join()
+    assert results == expected * 4
+
+
+def test_import_of_edited_path(tmpdir):
+    source = 'def foo():\n    return 1\n'
+    module_path = tmpdir.join('edited.py')
+    module_path.write(source)
+
+    def edit(i):
+        edited = source + 'def bar%s():\n    pass\n' % i + 'bar'
+        script = jedi.Script(edited, path=str(module_path))
+        return [c.name for c in script.completions()]
+
+    def import_(i):
+        script = jedi.Script('import edited\nedited.',
+                             path=str(tmpdir.join('other.py')),
+                             sys_path=[str(tmpdir)])
+        return sorted(c.name for c in script.completions()
+                      if not c.name.startswith('__'))
+
+    pool = ThreadPool(4)
+    try:
+        edits = pool.map_async(edit, range(20))
+        imports = pool.map(import_, range(20))
+        edits = edits.get()
+    finally:
+        pool.close()
+        pool.join()
+    # The imports load the file, they never see the buffers of the scripts.
+    assert imports == [['foo']] * 20
+    assert edits == [['bar%s' % i] for i in range(20)]
+
+
+def test_settings_are_not_changed():
+    source = 'x = 1\nif isinstance(x, int):\n    x\n'
+    script = jedi.Script(source, 3, 5)
+    evaluator = script._evaluator
+    with evaluator.override_settings(dynamic_flow_information=False):
+        # Other threads still see the settings.
+        assert settings.dynamic_flow_information
+        assert not evaluator.get_setting('dynamic_flow_information')
+    assert evaluator.get_setting('dynamic_flow_information')
+    assert script.usages()
+
+
+def test_debug_indent():
+    @debug.increase_indent
+    def indented():
+        pool = ThreadPool(1)
+        try:
+            return _state_indent(), pool.apply(_state_indent)
+        finally:
+            pool.close()
+            pool.join()
+
+    assert indented() == (1, 0)
+
+
+def _state_indent():
+    return debug._state.indent
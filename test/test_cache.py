@@ -2,13 +2,18 @@
 Test all things related to the ``jedi.cache`` module.
 """
 
+import os
 import time
 
 import pytest
 
 import jedi
 from jedi import settings, cache
-from jedi.parser.utils import ParserCacheItem, ParserPickling
+from jedi import parser
+from jedi.parser.pgen2 import pgen
+from jedi.parser import utils
+from jedi.parser.utils import (ParserCacheItem, ParserPickling, ParserCache,
+                               _hash_file)
 
 
 ParserPicklingCls = type(ParserPickling)
@@ -62,6 +67,330 @@ def test_modulepickling_delete_incompatible_cache():
     assert cached2 is None
 
 
+@pytest.mark.usefixtures("isolated_jedi_cache")
+def test_modulepickling_delete_legacy_cache():
+    pickling = ParserPicklingCls()
+    # The files of a cache that was indexed by a json file.
+    legacy_pickle = pickling._get_hashed_path('old path')
+    for path in (pickling._get_path('index.json'), legacy_pickle):
+        with open(path, 'w') as f:
+            f.write('{}')
+
+    pickling.save_parser('path', ParserCacheItem('new parser'))
+    assert not os.path.exists(pickling._get_path('index.json'))
+    assert not os.path.exists(legacy_pickle)
+    assert pickling.load_parser('path', None) == 'new parser'
+
+    # Only a new index checks the directory.
+    with open(legacy_pickle, 'w') as f:
+        f.write('{}')
+    assert ParserPicklingCls().load_parser('path', None) == 'new parser'
+
+
+@pytest.mark.usefixtures("isolated_jedi_cache")
+def test_modulepickling_garbage_collect(monkeypatch):
+    pickling = ParserPicklingCls()
+    for i in range(4):
+        pickling.save_parser('path %s' % i, ParserCacheItem('x' * 1000))
+    db = pickling._get_db()
+    with db:
+        for i in range(4):
+            db.execute('UPDATE modules SET last_access = ? WHERE path = ?',
+                       (1000 + i, 'path %s' % i))
+
+    # Nothing is too old and the cache is small enough.
+    assert pickling.garbage_collect(max_age=10 ** 20)[0] == 0
+    # The least recently used modules are removed first.
+    count, freed = pickling.garbage_collect(max_bytes=2500, max_age=10 ** 20)
+    assert count == 2
+    assert freed > 2000
+    assert pickling.load_parser('path 0', None) is None
+    assert pickling.load_parser('path 1', None) is None
+    assert not os.path.exists(pickling._get_hashed_path('path 0'))
+    assert pickling.load_parser('path 2', None) == 'x' * 1000
+
+    monkeypatch.setattr(settings, 'cache_max_age', 0)
+    assert pickling.garbage_collect()[0] == 2
+
+
+def _save_items(args):
+    cache_directory, prefix = args
+    settings.cache_directory = cache_directory
+    pickling = ParserPicklingCls()
+    for i in range(20):
+        pickling.save_parser('%s %s' % (prefix, i), ParserCacheItem(i))
+
+
+def test_modulepickling_concurrent_processes(tmpdir):
+    """
+    Multiple processes are able to write to the same cache at the same time.
+    """
+    import multiprocessing
+    cache_directory = str(tmpdir)
+    pool = multiprocessing.Pool(4)
+    try:
+        pool.map(_save_items, [(cache_directory, p) for p in 'abcd'])
+    finally:
+        pool.close()
+        pool.join()
+
+    old, settings.cache_directory = settings.cache_directory, cache_directory
+    try:
+        pickling = ParserPicklingCls()
+        for prefix in 'abcd':
+            for i in range(20):
+                assert pickling.load_parser('%s %s' % (prefix, i), None) == i
+    finally:
+        settings.cache_directory = old
+
+
+@pytest.mark.usefixtures("isolated_jedi_cache")
+def test_modulepickling_concurrent_threads():
+    """
+    Sqlite connections are not shared between threads.
+    """
+    from multiprocessing.pool import ThreadPool
+    pickling = ParserPicklingCls()
+    pickling.save_parser('path', ParserCacheItem(1))
+
+    def load(i):
+        pickling.save_parser('path %s' % i, ParserCacheItem(i))
+        return pickling.load_parser('path', None), pickling.load_parser('path %s' % i, None)
+
+    pool = ThreadPool(4)
+    try:
+        assert pool.map(load, range(8)) == [(1, i) for i in range(8)]
+    finally:
+        pool.close()
+        pool.join()
+
+
+@pytest.mark.usefixtures("isolated_jedi_cache")
+def test_grammar_cache(monkeypatch):
+    monkeypatch.setattr(parser, '_loaded_grammars', {})
+    grammar = parser.load_grammar()
+
+    def fail(*args, **kwargs):
+        raise AssertionError('The grammar should be loaded from the cache.')
+
+    # A "new process" should not need the parser generator anymore.
+    monkeypatch.setattr(parser, '_loaded_grammars', {})
+    monkeypatch.setattr(pgen, 'ParserGenerator', fail)
+    cached = parser.load_grammar()
+    assert cached is not grammar
+    assert cached.dfas == grammar.dfas
+    assert cached.labels == grammar.labels
+    assert cached.keywords == grammar.keywords
+
+
+@pytest.mark.usefixtures("isolated_jedi_cache")
+def test_grammar_cache_corrupted(monkeypatch):
+    monkeypatch.setattr(parser, '_loaded_grammars', {})
+    path = os.path.join(os.path.dirname(parser.__file__), 'grammar3.4.txt')
+    parser.load_grammar()
+
+    cache_path = ParserPickling._get_grammar_path(path, _hash_file(path))
+    with open(cache_path, 'wb') as f:
+        f.write(b'garbage')
+    assert ParserPickling.load_grammar(path) is None
+
+    monkeypatch.setattr(parser, '_loaded_grammars', {})
+    assert parser.load_grammar().dfas
+    # The broken cache file has been replaced.
+    assert ParserPickling.load_grammar(path) is not None
+
+
+@pytest.mark.usefixtures("isolated_jedi_cache")
+def test_cache_content_validation(monkeypatch, tmpdir):
+    monkeypatch.setattr(settings, 'cache_content_validation', True)
+    monkeypatch.setattr(utils, 'parser_cache', ParserCache())
+    path = str(tmpdir.join('mod.py'))
+    with open(path, 'w') as f:
+        f.write('a = 1\n')
+    utils.save_parser(path, FakeParser('a = 1\n'))
+
+    # Only the modification time changed (e.g. after a checkout).
+    os.utime(path, (0, 0))
+    assert utils.load_parser(path) is not None
+    utils.parser_cache.clear()
+    assert utils.load_parser(path) is not None
+
+    # After the digest matched once, the file is not hashed again.
+    os.utime(path, (1000, 1000))
+    assert utils.load_parser(path) is not None
+    utils.parser_cache.clear()
+    assert utils.load_parser(path) is not None
+    monkeypatch.setattr(utils, '_hash_file', None)
+    assert utils.load_parser(path) is not None
+    utils.parser_cache.clear()
+    assert utils.load_parser(path) is not None
+    monkeypatch.setattr(utils, '_hash_file', _hash_file)
+
+    with open(path, 'w') as f:
+        f.write('a = 22\n')
+    os.utime(path, (0, 0))
+    assert utils.load_parser(path) is None
+    utils.parser_cache.clear()
+    assert utils.load_parser(path) is None
+
+
+@pytest.mark.usefixtures("isolated_jedi_cache")
+def test_shared_parser_cache(monkeypatch, tmpdir):
+    monkeypatch.setattr(settings, 'use_filesystem_cache', False)
+    monkeypatch.setattr(utils, 'parser_cache', ParserCache())
+    shared = type(utils.SharedParserCache)()
+    monkeypatch.setattr(utils, 'SharedParserCache', shared)
+    path = str(tmpdir.join('mod.py'))
+    with open(path, 'w') as f:
+        f.write('def foo():\n    return 1\n')
+    os.utime(path, (1000, 1000))
+    store = str(tmpdir.join('store'))
+    assert shared.build(store, [path, str(tmpdir.join('missing.py'))]) == 1
+
+    assert utils.load_parser(path) is None
+    monkeypatch.setattr(settings, 'shared_cache_path', store)
+    parser = utils.load_parser(path)
+    assert parser.module.get_code() == 'def foo():\n    return 1\n'
+    assert parser.module.subscopes[0].name.value == 'foo'
+    # It's now in the memory cache of this process.
+    assert utils.load_parser(path) is parser
+
+    # Changed files are not loaded from the store.
+    utils.parser_cache.clear()
+    os.utime(path, (2000, 2000))
+    assert utils.load_parser(path) is None
+    shared.close()
+
+
+@pytest.mark.usefixtures("isolated_jedi_cache")
+def test_shared_parser_cache_grammar(monkeypatch, tmpdir):
+    monkeypatch.setattr(settings, 'use_filesystem_cache', False)
+    monkeypatch.setattr(utils, 'parser_cache', ParserCache())
+    shared = type(utils.SharedParserCache)()
+    path = str(tmpdir.join('mod.py'))
+    with open(path, 'w') as f:
+        f.write('x = 1\n')
+    store = str(tmpdir.join('store'))
+    monkeypatch.setattr(settings, 'shared_cache_path', store)
+
+    # A store of another interpreter's grammar is not used.
+    other = '2.7' if utils.sys.version_info[0] == 3 else '3.4'
+    with monkeypatch.context() as m:
+        m.setattr(utils, '_runtime_grammar', lambda: parser.load_grammar(other))
+        assert shared.build(store, [path]) == 1
+        assert shared.load_parser(path, None) is not None
+    shared.close()
+    assert shared.load_parser(path, None) is None
+    shared.close()
+
+    assert shared.build(store, [path]) == 1
+    assert shared.load_parser(path, None) is not None
+    shared.close()
+
+
+@pytest.mark.usefixtures("isolated_jedi_cache")
+def test_cache_file(monkeypatch, tmpdir):
+    monkeypatch.setattr(utils, 'parser_cache', ParserCache())
+    path = str(tmpdir.join('mod.py'))
+    with open(path, 'w') as f:
+        f.write('import os\n')
+    assert utils.cache_file(path) == 10
+    # The second time it's loaded from the filesystem cache.
+    utils.parser_cache.clear()
+    assert utils.cache_file(path) == 0
+    assert utils.parser_cache[path].parser.module.get_code() == 'import os\n'
+
+
+@pytest.mark.skipif('sys.version_info < (3, 6)')
+@pytest.mark.usefixtures("isolated_jedi_cache")
+def test_cache_file_grammar(monkeypatch, tmpdir):
+    """
+    Warmed modules are parsed with the grammar of the running interpreter,
+    like imported modules.
+    """
+    monkeypatch.setattr(utils, 'parser_cache', ParserCache())
+    path = str(tmpdir.join('warmed.py'))
+    with open(path, 'w') as f:
+        f.write('class A:\n    x: int = 3\n    async def run(self): pass\n')
+    assert utils.cache_file(path)
+    utils.parser_cache.clear()
+
+    script = jedi.Script('import warmed\nwarmed.A().', sys_path=[str(tmpdir)])
+    names = set(c.name for c in script.completions())
+    assert 'run' in names
+    assert 'int' not in names
+
+
+class FakeParser(object):
+    def __init__(self, source=''):
+        self.source = source
+
+
+class Owner(object):
+    pass
+
+
+def test_parser_cache_lru(monkeypatch):
+    monkeypatch.setattr(settings, 'parser_cache_max_entries', 2)
+    monkeypatch.setattr(settings, 'parser_cache_max_bytes', None)
+    lru = ParserCache()
+    lru['a'] = ParserCacheItem(FakeParser())
+    lru['b'] = ParserCacheItem(FakeParser())
+    lru['a']  # a is now more recently used than b.
+    lru['c'] = ParserCacheItem(FakeParser())
+    assert sorted(lru.keys()) == ['a', 'c']
+    assert lru.get('b') is None
+    assert lru.stats()['hits'] == 1
+    assert lru.stats()['misses'] == 1
+    assert lru.stats()['evictions'] == 1
+
+    # Peeking doesn't count and doesn't change the order of eviction.
+    assert lru.peek('a') is not None
+    assert lru.peek('b') is None
+    lru['a']
+    lru.peek('c')
+    lru['d'] = ParserCacheItem(FakeParser())
+    assert sorted(lru.keys()) == ['a', 'd']
+    assert lru.stats()['hits'] == 2
+    assert lru.stats()['misses'] == 1
+
+
+def test_parser_cache_bytes(monkeypatch):
+    monkeypatch.setattr(settings, 'parser_cache_max_entries', None)
+    monkeypatch.setattr(settings, 'parser_cache_max_bytes', 1000)
+    lru = ParserCache()
+    lru['a'] = ParserCacheItem(FakeParser('x' * 6))
+    lru['b'] = ParserCacheItem(FakeParser('x' * 5))
+    assert sorted(lru.keys()) == ['b']
+    # A single item that is too large is still kept.
+    lru['c'] = ParserCacheItem(FakeParser('x' * 20))
+    assert lru.keys() == ['c']
+    assert lru.stats()['bytes'] == 2000
+
+    # The total follows replaced and removed items.
+    lru['c'] = ParserCacheItem(FakeParser('x' * 3))
+    assert lru.stats()['bytes'] == 300
+    lru['d'] = ParserCacheItem(FakeParser('x' * 4))
+    del lru['c']
+    assert lru.stats()['bytes'] == 400
+    lru.clear()
+    assert lru.stats()['bytes'] == 0
+
+
+def test_parser_cache_pinning(monkeypatch):
+    monkeypatch.setattr(settings, 'parser_cache_max_entries', 1)
+    lru = ParserCache()
+    owner = Owner()
+    lru['a'] = ParserCacheItem(FakeParser())
+    lru.pin('a', owner)
+    lru['b'] = ParserCacheItem(FakeParser())
+    assert sorted(lru.keys()) == ['a', 'b']
+
+    del owner
+    lru['c'] = ParserCacheItem(FakeParser())
+    assert lru.keys() == ['c']
+
+
 @pytest.mark.skipif('True', message='Currently the star import cache is not enabled.')
 def test_star_import_cache_duration():
     new = 0.01
@@ -6,7 +6,7 @@ import jedi
 from jedi._compatibility import u
 from jedi import cache
 from jedi.parser import load_grammar
-from jedi.parser.fast import FastParser
+from jedi.parser.fast import FastParser, edit_source
 from jedi.parser.utils import save_parser
 
 
@@ -69,6 +69,7 @@ def test_split_parts():
         class Mock(FastParser):
             def __init__(self, *args):
                 self.number_of_splits = 0
+                self._lines = self._parts = self._checkpoints = []
 
         return tuple(FastParser._split_parts(Mock(None, None), source))
 
@@ -494,3 +495,140 @@ def test_parentheses_in_string():
 
     abc.''')
     check_fp(code, 2, 1, 1)
+
+
+def test_position_index_update():
+    """
+    The position index of a module is reset when it's reparsed.
+    """
+    src = u(''.join('a%s = b\n' % i for i in range(30)))
+    p = FastParser(load_grammar(), src)
+    module = p.module
+    assert module.name_for_position((20, 1)).value == 'a19'
+    assert module.position_index is module.position_index
+
+    p.update(u('c = 1\n\n\n') + src)
+    assert module.name_for_position((20, 1)).value == 'a16'
+    assert module.get_leaf_for_position((20, 4)).get_code() == ' ='
+    assert module.get_statement_for_position((20, 1)).get_code() == 'a16 = b'
+
+
+def test_leaf_navigation_update():
+    """
+    Parts of the tree are reused when reparsing, the leaves of the new tree
+    are still connected correctly.
+    """
+    def check(module):
+        leaf = module.first_leaf()
+        leaves = [leaf]
+        while True:
+            try:
+                leaf = leaf.get_next_leaf()
+            except IndexError:
+                break
+            leaves.append(leaf)
+        assert ''.join(l.get_code() for l in leaves) == module.get_code()
+        for previous, leaf in zip(leaves, leaves[1:]):
+            assert leaf.get_previous_leaf() is previous
+
+    src = u(''.join('def f%s():\n    a%s = b\n\n' % (i, i) for i in range(30)))
+    p = FastParser(load_grammar(), src)
+    check(p.module)
+    p.update(u('c = 1\n\n\n') + src + u('d = 2\n'))
+    check(p.module)
+    p.update(src.replace('a15', 'x15'))
+    check(p.module)
+
+
+def test_moved_multiline_leaves():
+    """
+    Reused parts only change their line offset, multiline leaves move with
+    them.
+    """
+    src = u('def f():\n    """\n    doc\n    """\n\n\nx = """a\nbc"""\n')
+    p = FastParser(load_grammar(), src)
+    string = p.module.get_leaf_for_position((7, 4))
+    assert (string.start_pos, string.end_pos) == ((7, 4), (8, 5))
+
+    p.update(u('a = 1\n\n\n') + src)
+    assert p.module.get_leaf_for_position((10, 4)) is string
+    assert (string.start_pos, string.end_pos) == ((10, 4), (11, 5))
+    doc = p.module.get_leaf_for_position((5, 4))
+    assert (doc.start_pos, doc.end_pos) == ((5, 4), (7, 7))
+    newline = doc.get_next_leaf()
+    assert (newline.start_pos, newline.end_pos) == ((7, 7), (8, 0))
+
+
+def test_incremental_split():
+    """
+    Splitting stops after the changed lines, the result is the same as
+    splitting everything.
+    """
+    cache.parser_cache.pop(None, None)
+    src = u(''.join('def f%s():\n    x = (1,\n         2)\n\n' % i for i in range(20)))
+    p = FastParser(load_grammar(), src)
+    for new in (src.replace('f10', 'g10'),
+                src.replace('f10():', 'f10(a,'),
+                u('class A:\n') + src,
+                src.replace('def f15', '@dec\ndef f15'),
+                src + u('x = 1 \\\n    + 2\n')):
+        p.update(new)
+        cache.parser_cache.pop(None, None)
+        assert p._parts == FastParser(load_grammar(), new)._parts
+        assert p.module.get_code() == new
+
+
+def test_apply_edit():
+    cache.parser_cache.pop(None, None)
+    src = u('def f():\n    a = 1\n\n\ndef g():\n    b = 2\r\n    return b\n')
+    p = FastParser(load_grammar(), src)
+    p.apply_edit((6, 4), (6, 5), u('bc'))
+    assert p.number_parsers_used == 1
+    assert p.module.get_code() == src.replace('b = 2', 'bc = 2')
+    p.apply_edit((1, 0), (1, 0), u('import os\n\n\n'))
+    assert p.module.get_code() == 'import os\n\n\n' + src.replace('b = 2', 'bc = 2')
+    assert [n.start_pos for n in p.module.used_names['bc']] == [(9, 4)]
+
+
+def test_edit_source():
+    src = u('a = 1\r\nb = 2\n')
+    assert edit_source(src, (1, 4), (1, 5), u('3')) == u('a = 3\r\nb = 2\n')
+    # Positions after the end of a line or of the source.
+    assert edit_source(src, (1, 9), (1, 9), u('0')) == u('a = 10\r\nb = 2\n')
+    assert edit_source(src, (2, 9), (2, 9), u('0')) == u('a = 1\r\nb = 20\n')
+    assert edit_source(src, (5, 0), (5, 0), u('c')) == src + u('c')
+    with pytest.raises(ValueError):
+        edit_source(src, (0, 0), (1, 0), u(''))
+    with pytest.raises(ValueError):
+        edit_source(src, (2, 0), (1, 0), u(''))
+
+
+def test_names_update():
+    """
+    The merged names of a module are updated with the names of the changed
+    parts.
+    """
+    def names(names_dict):
+        return sorted((key, [n.start_pos for n in names_dict[key]])
+                      for key in names_dict)
+
+    cache.parser_cache.pop(None, None)
+    src = u(''.join('def f%s(a):\n    return a + x%s\n\n\n' % (i, i % 3)
+                    for i in range(20)))
+    p = FastParser(load_grammar(), src)
+    used_names = p.module.used_names
+    assert [n.start_pos for n in used_names['x1']] == \
+        [(4 * i + 2, 15) for i in range(1, 20, 3)]
+    for new in (src.replace('x1\n', 'y\n', 1),
+                u('x1 = 3\n') + src,
+                src.replace('def f5', 'def g5').replace('def f6(a', 'def f6(x1'),
+                src + u('global x1\n'),
+                src):
+        p.update(new)
+        assert p.module.used_names is used_names
+        cache.parser_cache.pop(None, None)
+        module = FastParser(load_grammar(), new).module
+        assert names(p.module.used_names) == names(module.used_names)
+        assert names(p.module.names_dict) == names(module.names_dict)
+        assert [n.start_pos for n in p.module.global_names] == \
+            [n.start_pos for n in module.global_names]
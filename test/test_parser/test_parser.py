@@ -183,6 +183,22 @@ def test_end_pos_error_correction():
     assert m.end_pos == (2, 2)
 
 
+def test_error_recovery_deeply_nested():
+    """
+    Errors are recovered in the innermost suite, no matter how deep it is.
+    """
+    depth = 60
+    source = ''.join('    ' * i + 'if x:\n' for i in range(depth))
+    source += '    ' * depth + 'a = = 1)\n' + '    ' * depth + 'b\n'
+    module = ParserWithRecovery(load_grammar(), u(source)).module
+    assert module.get_code() == source
+    error = module.get_leaf_for_position((depth + 1, depth * 4 + 4))
+    assert error.type == 'error_leaf'
+    suite = error.parent
+    assert suite.type == 'suite' and suite.parent.start_pos == (depth, (depth - 1) * 4)
+    assert suite.children[-2].get_code() == '    ' * depth + 'b\n'
+
+
 def test_param_splitting():
     """
     Jedi splits parameters into params, this is not what the grammar does,
@@ -236,3 +252,29 @@ def test_python3_octal():
         assert module.children[0].children[0].type == 'number'
     else:
         assert module.children[0].type == 'error_node'
+
+
+def test_node_classes():
+    source = u(dedent('''
+        global x
+        class A:
+            def f(self):
+                return [lambda: y for y in z]
+        '''))
+    parser = ParserWithRecovery(load_grammar(), source)
+    module = parser.module
+    assert [n.value for n in module.global_names] == ['x']
+    cls = module.subscopes[0]
+    assert isinstance(cls, pt.Class) and 'A' in module.names_dict
+    func = cls.subscopes[0]
+    assert isinstance(func, pt.Function) and 'f' in cls.names_dict
+    return_stmt, = func.returns
+    assert isinstance(return_stmt, pt.ReturnStmt)
+    comprehension = return_stmt.children[1].children[1]
+    assert comprehension.type == 'testlist_comp'
+    assert isinstance(comprehension.children[0], pt.Lambda)
+    assert isinstance(comprehension.children[1], pt.CompFor)
+    # The name of a comprehension is not part of the function's names.
+    assert not func.names_dict['y']
+    assert [type(leaf) for leaf in return_stmt.children[1].children[::2]] == \
+        [pt.Operator, pt.Operator]
@@ -67,3 +67,62 @@ class TestsFunctionAndLambdaParsing(object):
 
     def test_doc(self, node, expected):
         assert node.doc == expected.get('doc') or (expected['call_sig'] + '\n\n')
+
+
+def test_position_index():
+    source = u(''.join('a%s  = b.c\n' % i for i in range(100)))
+    module = ParserWithRecovery(load_grammar(), source).module
+    assert len(module.children) > pt.PositionIndex.min_children
+    for line in (1, 50, 100):
+        name = 'a%s' % (line - 1)
+        assert module.name_for_position((line, 0)).value == name
+        assert module.name_for_position((line, len(name))).value == name
+        assert module.name_for_position((line, len(name) + 1)) is None
+        # The end of `b` is also the start of the dot.
+        assert module.name_for_position((line, len(name) + 5)).value == 'b'
+        assert module.get_leaf_for_position((line, len(name) + 7)).value == 'c'
+        assert module.get_leaf_for_position((line, len(name) + 1)) is None
+        leaf = module.get_leaf_for_position((line, len(name) + 1), include_prefixes=True)
+        assert leaf.value == '='
+        stmt = module.get_statement_for_position((line, 1))
+        assert stmt.type == 'expr_stmt' and stmt.start_pos == (line, 0)
+    assert module.get_leaf_for_position((102, 0)) is None
+
+
+def all_leaves(node):
+    try:
+        children = node.children
+    except AttributeError:
+        return [node]
+    return [leaf for child in children for leaf in all_leaves(child)]
+
+
+def test_leaf_navigation(monkeypatch):
+    source = u(''.join('a%s = (b, c)\n' % i for i in range(100)))
+    module = ParserWithRecovery(load_grammar(), source).module
+    leaves = all_leaves(module)
+    # The parents keep the indexes of their children, the index of the module
+    # is not needed.
+    monkeypatch.setattr(pt, '_get_position_index', None)
+    for previous, leaf in zip(leaves, leaves[1:]):
+        assert previous.get_next_leaf() is leaf
+        assert leaf.get_previous_leaf() is previous
+    with pytest.raises(IndexError):
+        leaves[0].get_previous_leaf()
+    with pytest.raises(IndexError):
+        leaves[-1].get_next_leaf()
+
+    stmt = module.children[50]
+    assert stmt.get_previous_sibling() is module.children[49]
+    assert stmt.get_next_sibling() is module.children[51]
+    assert module.children[-1].get_next_sibling() is None
+
+    # Replacing a child doesn't confuse the index.
+    new = ParserWithRecovery(load_grammar(), u('x = 1\n')).module.children[0]
+    module.children[50] = new
+    new.parent = module
+    assert new.first_leaf().get_previous_leaf() is leaves[50 * 8 - 1]
+    assert new.get_next_sibling() is module.children[51]
+    # Like before the indexes, a replaced child has no siblings.
+    assert stmt.get_next_sibling() is None
+    assert stmt.get_previous_sibling() is None
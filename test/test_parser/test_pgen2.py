@@ -277,3 +277,32 @@ class TestLiterals(GrammarTest):
                     "6f630fad67cda0ee1fb1f562db3aa53e")
             """
         parse(s)
+
+
+@pytest.mark.parametrize('version', ['2.7', '3.4'])
+def test_transitions(version):
+    """
+    The transition tables do the same as walking the arcs of the DFAs.
+    """
+    from jedi.parser.pgen2.parse import get_transitions
+
+    grammar = load_grammar(version=version)
+    transitions = get_transitions(grammar)
+    assert get_transitions(grammar) is transitions
+    token_labels = [i for i, (t, v) in enumerate(grammar.labels) if 0 < t < 256]
+    for type_, (states, first) in grammar.dfas.items():
+        for state, arcs in enumerate(states):
+            table, accepting, accept_only = transitions[type_][state]
+            assert accepting == ((0, state) in arcs)
+            assert accept_only == (arcs == [(0, state)])
+            for ilabel in token_labels:
+                expected = None
+                for i, newstate in arcs:
+                    t, v = grammar.labels[i]
+                    if ilabel == i:
+                        expected = newstate, None, None
+                        break
+                    elif t >= 256 and ilabel in grammar.dfas[t][1]:
+                        expected = newstate, t, grammar.dfas[t]
+                        break
+                assert table.get(ilabel) == expected
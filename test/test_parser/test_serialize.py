@@ -0,0 +1,175 @@
+import pickle
+from textwrap import dedent
+
+from jedi._compatibility import u
+from jedi.parser import ParserWithRecovery, load_grammar
+from jedi.parser import serialize
+from jedi.parser import tree as pt
+from jedi.parser.fast import FastParser
+from jedi.parser.skeleton import SkeletonParser, SkeletonBody
+from jedi.parser.utils import ParserCacheItem
+
+
+SOURCE = dedent(u('''
+    import os
+    from a import (b,
+                   c)
+
+    class Foo(object):
+        """Docstring"""
+        def __init__(self, a, b=3, *args, **kwargs):
+            self.a = [x for x in a]
+            return lambda y: y + b
+
+    def func():
+        global z
+        yield 1
+
+    broken(
+    '''))
+
+
+def leaves(node):
+    try:
+        children = node.children
+    except AttributeError:
+        yield node
+    else:
+        for child in children:
+            for leaf in leaves(child):
+                yield leaf
+
+
+def positions(names_dict):
+    return sorted((key, [n.start_pos for n in names])
+                  for key, names in names_dict.items())
+
+
+def assert_same_tree(original, loaded):
+    assert isinstance(loaded, type(original)) or isinstance(original, type(loaded))
+    assert original.type == loaded.type
+    assert original.start_pos == loaded.start_pos
+    assert original.end_pos == loaded.end_pos
+    if isinstance(original, pt.Scope):
+        assert positions(original.names_dict) == positions(loaded.names_dict)
+    try:
+        children = original.children
+    except AttributeError:
+        assert original.value == loaded.value
+        assert original.prefix == loaded.prefix
+    else:
+        assert len(children) == len(loaded.children)
+        for c1, c2 in zip(children, loaded.children):
+            assert c2.parent is loaded
+            assert_same_tree(c1, c2)
+
+
+def check_roundtrip(parser, lazy=True):
+    data = pickle.loads(pickle.dumps(serialize.dump(parser)))
+    loaded = serialize.load(data, lazy)
+    assert loaded.source == parser.source
+    module = loaded.module
+    assert module.get_code() == parser.module.get_code()
+    assert module.path == parser.module.path
+    assert_same_tree(parser.module, module)
+    assert positions(module.used_names) == positions(parser.module.used_names)
+    assert [n.start_pos for n in module.global_names] == \
+        [n.start_pos for n in parser.module.global_names]
+
+    # Names in the names dicts are the leaves of the tree.
+    all_leaves = set(id(leaf) for leaf in leaves(module))
+    for names in module.used_names.values():
+        assert all(id(n) in all_leaves for n in names)
+    return module
+
+
+def test_roundtrip():
+    check_roundtrip(ParserWithRecovery(load_grammar(), SOURCE, 'foo.py'))
+    check_roundtrip(ParserWithRecovery(load_grammar(), SOURCE, 'foo.py'), lazy=False)
+
+
+def test_roundtrip_fast_parser():
+    module = check_roundtrip(FastParser(load_grammar(), SOURCE, 'bar.py'))
+    func = module.subscopes[0].subscopes[0]
+    assert func.listeners == set()
+    assert [p.name.value for p in func.params] == ['self', 'a', 'b', 'args', 'kwargs']
+
+
+def test_roundtrip_skeleton_parser():
+    check_roundtrip(SkeletonParser(load_grammar(), SOURCE, 'foo.py'))
+    check_roundtrip(SkeletonParser(load_grammar(), SOURCE, 'foo.py'), lazy=False)
+
+    # Bodies that are not parsed yet stay unparsed after loading them.
+    parser = SkeletonParser(load_grammar(), SOURCE, 'foo.py')
+    module = serialize.load(serialize.dump(parser)).module
+    init = module.subscopes[0].subscopes[0]
+    body = init.children[-1]
+    assert isinstance(body, SkeletonBody)
+    assert not body.is_built()
+    assert [n.start_pos for n in module.used_names['y']] == [(10, 22), (10, 25)]
+    assert body.is_built()
+    expected = ParserWithRecovery(load_grammar(), SOURCE).module
+    assert positions(init.names_dict) == \
+        positions(expected.subscopes[0].subscopes[0].names_dict)
+
+
+def test_parser_cache_item_pickling():
+    parser = ParserWithRecovery(load_grammar(), SOURCE, 'foo.py')
+    item = ParserCacheItem(parser, 10)
+    loaded = pickle.loads(pickle.dumps(item, pickle.HIGHEST_PROTOCOL))
+    assert isinstance(loaded.parser, serialize.CachedParser)
+    assert loaded.change_time == 10
+    assert loaded.parser.module.get_code() == parser.module.get_code()
+
+
+def is_built(scope):
+    node = scope.children[-1]
+    try:
+        pt.BaseNode.children.__get__(node)
+    except AttributeError:
+        return False
+    return True
+
+
+def test_lazy_bodies():
+    parser = ParserWithRecovery(load_grammar(), SOURCE, 'foo.py')
+    module = serialize.load(serialize.dump(parser)).module
+    cls, func = module.subscopes
+    assert not is_built(cls)
+    # The global statement is in the function, global names are always built.
+    assert is_built(func)
+    # Positions are known without building the body.
+    assert cls.end_pos == parser.module.subscopes[0].end_pos
+    assert not is_built(cls)
+
+    # Names of the class are in the class body.
+    init = cls.names_dict['__init__'][0].parent
+    assert is_built(cls)
+    assert not is_built(init)
+    assert [n.value for n in init.names_dict['a']] == ['a', 'a', 'a']
+    assert is_built(init)
+
+
+def test_lazy_used_names():
+    parser = ParserWithRecovery(load_grammar(), SOURCE, 'foo.py')
+    module = serialize.load(serialize.dump(parser)).module
+    cls = module.subscopes[0]
+    assert [n.start_pos for n in module.used_names['broken']] == [(16, 0)]
+    assert not is_built(cls)
+
+    # Looking up a name only builds the bodies that contain it.
+    names = module.used_names['y']
+    assert [n.start_pos for n in names] == [(10, 22), (10, 25)]
+    assert is_built(cls)
+    assert is_built(cls.subscopes[0])
+
+
+def test_interned_strings():
+    def load(source):
+        parser = ParserWithRecovery(load_grammar(), u(source), 'foo.py')
+        return serialize.load(pickle.loads(pickle.dumps(serialize.dump(parser))))
+
+    name1 = load('if 1:\n        some_name\n').module.used_names['some_name'][0]
+    name2 = load('if 2:\n        some_name\n').module.used_names['some_name'][0]
+    assert name1.value is name2.value
+    assert name1.prefix is name2.prefix
@@ -0,0 +1,123 @@
+from textwrap import dedent
+
+import pytest
+
+from jedi._compatibility import u
+from jedi.parser import ParserWithRecovery, load_grammar
+from jedi.parser.skeleton import SkeletonParser, SkeletonBody
+
+
+SOURCE = dedent(u('''
+    import os
+
+    class Foo(object):
+        def __init__(self, a, b=3):
+            # comment
+            self.a = [x for x in a]
+            if b:
+                for _ in a:
+                    return lambda y: y + b
+        # comment after the body
+
+    def func():
+        global z
+        z = 1
+
+    def outer(c):
+        """Docstring"""
+        def inner():
+            return c
+        return inner
+    '''))
+
+
+def leaves(node):
+    try:
+        children = node.children
+    except AttributeError:
+        yield node
+    else:
+        for child in children:
+            for leaf in leaves(child):
+                yield leaf
+
+
+def dump_leaves(module):
+    return [(type(l).__name__, l.value, l.prefix, l.start_pos, l.end_pos)
+            for l in leaves(module)]
+
+
+def positions(names_dict):
+    return sorted((key, [n.start_pos for n in names])
+                  for key, names in names_dict.items())
+
+
+def scopes(scope):
+    yield scope
+    for subscope in scope.subscopes:
+        for s in scopes(subscope):
+            yield s
+
+
+@pytest.mark.parametrize('source', [
+    SOURCE,
+    SOURCE.rstrip('\n'),
+    u('def f():\n    if x:\n        return 1'),
+    u('@dec\ndef f(a=(1,\n        2)):\n    return a\n\nx = 3\n'),
+    u('def f(:\n    x\n'),
+    u('def f():\n    asd(\n indentback\n\nx\n'),
+])
+@pytest.mark.parametrize('version', ['2.7', '3.4'])
+def test_same_tree(source, version):
+    grammar = load_grammar(version)
+    expected = ParserWithRecovery(grammar, source).module
+    module = SkeletonParser(grammar, source).module
+    assert positions(module.used_names) == positions(expected.used_names)
+    assert dump_leaves(module) == dump_leaves(expected)
+    for s1, s2 in zip(scopes(module), scopes(expected)):
+        assert positions(s1.names_dict) == positions(s2.names_dict)
+
+
+def is_built(function):
+    return function.children[-1].is_built()
+
+
+def test_lazy_bodies():
+    expected = ParserWithRecovery(load_grammar(), SOURCE).module
+    module = SkeletonParser(load_grammar(), SOURCE).module
+    init = module.subscopes[0].subscopes[0]
+    func, outer = module.subscopes[1:]
+    assert isinstance(init.children[-1], SkeletonBody)
+    assert not is_built(init)
+    # Bodies with global statements are always parsed.
+    assert not isinstance(func.children[-1], SkeletonBody)
+
+    # The positions and params are known without parsing the body.
+    assert init.end_pos == expected.subscopes[0].subscopes[0].end_pos
+    assert [p.name.value for p in init.params] == ['self', 'a', 'b']
+    assert not is_built(init)
+
+    # The names of a function are in its body.
+    assert [n.start_pos for n in init.names_dict['b']] == [(5, 26), (8, 11)]
+    assert is_built(init)
+
+    assert not is_built(outer)
+    assert outer.raw_doc == 'Docstring'
+    assert is_built(outer)
+    assert outer.subscopes[0].name.value == 'inner'
+
+
+def test_lazy_used_names():
+    module = SkeletonParser(load_grammar(), SOURCE).module
+    init = module.subscopes[0].subscopes[0]
+    outer = module.subscopes[2]
+    assert [n.start_pos for n in module.used_names['os']] == [(2, 7)]
+    assert 'y' in module.used_names
+    assert not is_built(init)
+
+    # Looking up a name only parses the bodies that contain it.
+    assert [n.start_pos for n in module.used_names['y']] == [(10, 30), (10, 33)]
+    assert is_built(init)
+    assert not is_built(outer)
+    assert [n.start_pos for n in module.used_names['c']] == [(17, 10), (20, 15)]
+    assert is_built(outer)
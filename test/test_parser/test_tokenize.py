@@ -6,7 +6,7 @@ from textwrap import dedent
 import pytest
 
 from jedi._compatibility import u, is_py3
-from jedi.parser.token import NAME, OP, NEWLINE, STRING, INDENT
+from jedi.parser.token import NAME, OP, NEWLINE, STRING, INDENT, ENDMARKER
 from jedi.parser import ParserWithRecovery, load_grammar, tokenize
 
 
@@ -150,3 +150,64 @@ def test_ur_literals():
     # Must be in the right order.
     with pytest.raises(AssertionError):
         check('Rb""')
+
+
+@pytest.mark.parametrize('source', [
+    'def foo(a, b=3):\n    return a.b[1:2] ** -b\n',
+    'x = .5 + 1e3j + 0x1f ... 07\n',
+    'if x:\n\tpass\n  \f y\n#comment\n',
+    'a = """doc\nstring""" + r\'x\' + b"y\\\n"\n',
+    '"""unterminated\n',
+    '"foo\nbar',
+    'foo \\\n    bar\n',
+    'a \\ b $ ?\n',
+    'class X:\n def f(self): import os\n',
+    '(1,\n 2)\n',
+    u('\u0663abc = \u00e4\n'),
+    'Rb""\n',
+])
+def test_fast_tokenizer(source):
+    for use_exact_op_types in (False, True):
+        tokens = tokenize.generate_tokens(StringIO(u(source)).readline,
+                                          use_exact_op_types)
+        fast_tokens = tokenize.fast_generate_tokens(StringIO(u(source)).readline,
+                                                    use_exact_op_types)
+        assert list(fast_tokens) == list(tokens)
+
+
+def test_fast_tokenizer_interning():
+    def tokens(source):
+        readline = StringIO(u(source)).readline
+        return list(tokenize.fast_generate_tokens(readline))
+
+    first = tokens('if x:\n        foo_bar == 3\n')
+    second = tokens('while y:\n        foo_bar == 4\n')
+    name1, op1 = first[5:7]
+    name2, op2 = second[5:7]
+    assert name1.string is name2.string
+    assert name1.prefix is name2.prefix
+    assert op1.string is op2.string
+
+
+@pytest.mark.parametrize('source', [
+    'x = "abc\ny = 1\n',
+    "f(a, 'b\n)\n",
+    'a $ b ?\n',
+    'x = """abc\ndef f():\n    pass\n',
+])
+def test_error_tokens_keep_code(source):
+    """
+    Error tokens must not repeat whitespace or the rest of a line, otherwise
+    the tree of a broken buffer contains more code than the buffer.
+    """
+    tokens = list(tokenize.source_tokens(u(source)))
+    assert ''.join(t.prefix + t.string for t in tokens) == source
+    assert tokens[-1].start_pos == (source.count('\n') + 1, 0)
+
+
+def test_stray_closing_bracket():
+    # The newline after a closing bracket without an opening one still ends
+    # the statement.
+    for generate_tokens in (tokenize.generate_tokens, tokenize.fast_generate_tokens):
+        tokens = list(generate_tokens(StringIO(u('a)]\nb\n')).readline))
+        assert [t.type for t in tokens] == [NAME, OP, OP, NEWLINE, NAME, NEWLINE, ENDMARKER]